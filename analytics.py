@@ -0,0 +1,162 @@
+# analytics.py
+"""
+장기 기록 분석: 습관-기분-날씨 관계를 NumPy 벡터 연산으로 계산합니다.
+- 습관별 기분 상승폭(lift): 달성한 날 평균 기분 - 달성하지 못한 날 평균 기분
+- 습관 동시 달성 행렬, 요일별 기분/달성 수
+- 날씨 수치(기온/습도/바람)와 기분의 상관계수
+- 입력은 HabitColumns의 (masks, moods) 배열이라 수만 일도 한 번의 배열 연산으로 처리
+"""
+from datetime import date
+
+import numpy as np
+
+from history_store import get_history_store
+
+WEEKDAY_NAMES = ("월", "화", "수", "목", "금", "토", "일")
+WEATHER_FIELDS = ("temp_c", "humidity", "wind_mps")
+# 표본이 이보다 적으면 평균/상관계수를 내지 않음
+MIN_DAYS = 3
+
+
+def habit_matrix(masks: np.ndarray, n_habits: int) -> np.ndarray:
+    """(일수, 습관 수) bool 행렬. i번째 열 = HABITS[i] 달성 여부"""
+    return np.unpackbits(masks.astype(np.uint8)[:, None], axis=1, bitorder="little")[:, :n_habits].astype(bool)
+
+
+def _mean(values: np.ndarray) -> float | None:
+    return float(values.mean()) if len(values) >= MIN_DAYS else None
+
+
+def _corr(x: np.ndarray, y: np.ndarray) -> float | None:
+    if len(x) < MIN_DAYS or x.std() == 0 or y.std() == 0:
+        return None
+    return float(np.corrcoef(x, y)[0, 1])
+
+
+def compute_analytics(
+    masks: np.ndarray,
+    moods: np.ndarray,
+    start_ordinal: int,
+    n_habits: int,
+    weather_rows: list[tuple] | None = None,
+) -> dict:
+    """
+    masks/moods: start_ordinal부터 하루 한 칸인 배열 (기분 0 = 기록 없는 날)
+    weather_rows: (day ordinal, temp_c, humidity, wind_mps) 튜플 목록
+    """
+    recorded = moods > 0
+    bits = habit_matrix(masks[recorded], n_habits)
+    mood = moods[recorded].astype(np.float64)
+    done = bits.sum(axis=1)
+    days = int(recorded.sum())
+
+    mood_lift = []
+    for h in range(n_habits):
+        hit = bits[:, h]
+        mood_done, mood_not = _mean(mood[hit]), _mean(mood[~hit])
+        mood_lift.append({
+            "done_days": int(hit.sum()),
+            "mood_done": mood_done,
+            "mood_not_done": mood_not,
+            "lift": None if mood_done is None or mood_not is None else mood_done - mood_not,
+        })
+
+    # 동시 달성 일수 / 습관 i를 달성한 날 중 습관 j도 달성한 비율
+    as_int = bits.astype(np.int64)
+    co_counts = as_int.T @ as_int
+    diag = np.diag(co_counts).astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        co_rate = np.where(diag[:, None] > 0, co_counts / diag[:, None], np.nan)
+
+    # ordinal 1(0001-01-01)이 월요일
+    weekday = (np.flatnonzero(recorded) + start_ordinal - 1) % 7
+    wd_days = np.bincount(weekday, minlength=7)
+    wd_mood = np.bincount(weekday, weights=mood, minlength=7)
+    wd_done = np.bincount(weekday, weights=done, minlength=7)
+    by_weekday = [
+        {
+            "weekday": WEEKDAY_NAMES[i],
+            "days": int(wd_days[i]),
+            "mean_mood": float(wd_mood[i] / wd_days[i]) if wd_days[i] else None,
+            "mean_done": float(wd_done[i] / wd_days[i]) if wd_days[i] else None,
+        }
+        for i in range(7)
+    ]
+
+    weather = {"days": 0, **{field: None for field in WEATHER_FIELDS}}
+    if weather_rows:
+        table = np.array(weather_rows, dtype=np.float64)
+        idx = table[:, 0].astype(np.int64) - start_ordinal
+        inside = (idx >= 0) & (idx < len(moods))
+        idx, values = idx[inside], table[inside, 1:]
+        on_record = recorded[idx]
+        idx, values = idx[on_record], values[on_record]
+        day_mood = moods[idx].astype(np.float64)
+        weather["days"] = int(len(idx))
+        for col, field in enumerate(WEATHER_FIELDS):
+            valid = ~np.isnan(values[:, col])
+            weather[field] = _corr(values[valid, col], day_mood[valid])
+
+    return {
+        "days": days,
+        "mean_mood": _mean(mood),
+        "mood_lift": mood_lift,
+        "co_counts": co_counts,
+        "co_rate": co_rate,
+        "weekday": by_weekday,
+        "weather": weather,
+    }
+
+
+def load_analytics(user_id: str, columns, n_habits: int, end: date | None = None) -> dict | None:
+    """사용자 전체 기록(HabitColumns)과 저장된 날씨로 분석합니다. 기록이 없으면 None"""
+    if columns.base is None:
+        return None
+    end = end or date.today()
+    start = date.fromordinal(columns.base)
+    masks, moods = columns.window(start, end)
+    weather_rows = get_history_store().scan_weather(user_id, start, end)
+    return compute_analytics(masks, moods, columns.base, n_habits, weather_rows)
+
+
+def load_export_analytics(path: str, user_id: str, n_habits: int) -> dict | None:
+    """
+    내보낸 기록 파일(Arrow/Parquet/CSV)로 같은 분석을 합니다. 기록 저장소/세션을 거치지 않음.
+    - Arrow IPC 파일은 메모리 맵 그대로 읽어 수년치 여러 사용자 파일도 dict 변환 없이 처리
+    """
+    from history_export import export_arrays, read_export
+
+    arrays = export_arrays(read_export(path), user_id)
+    if arrays is None:
+        return None
+    masks, moods, start_ordinal, weather_rows = arrays
+    return compute_analytics(masks, moods, start_ordinal, n_habits, weather_rows)
+
+
+def summarize_insights(result: dict | None, habit_names: list[str]) -> str | None:
+    """리포트 프롬프트에 넣을 짧은 장기 패턴 요약 (의미 있는 항목만)"""
+    if not result or result["days"] < 14:
+        return None
+    lines = []
+    lifts = [(item["lift"], name) for item, name in zip(result["mood_lift"], habit_names) if item["lift"] is not None]
+    if lifts:
+        best_lift, best_name = max(lifts)
+        if best_lift >= 0.5:
+            lines.append(f"'{best_name}'을(를) 달성한 날 기분이 평균 {best_lift:+.1f}점 높음")
+        worst_lift, worst_name = min(lifts)
+        if worst_lift <= -0.5:
+            lines.append(f"'{worst_name}'을(를) 달성한 날 기분이 평균 {worst_lift:+.1f}점 낮음")
+    weekdays = [w for w in result["weekday"] if w["days"] >= MIN_DAYS]
+    if len(weekdays) >= 2:
+        best = max(weekdays, key=lambda w: w["mean_mood"])
+        worst = min(weekdays, key=lambda w: w["mean_mood"])
+        if best["mean_mood"] - worst["mean_mood"] >= 0.5:
+            lines.append(f"기분이 가장 좋은 요일 {best['weekday']}({best['mean_mood']:.1f}), 가장 낮은 요일 {worst['weekday']}({worst['mean_mood']:.1f})")
+    labels = {"temp_c": "기온", "humidity": "습도", "wind_mps": "바람"}
+    for field in WEATHER_FIELDS:
+        r = result["weather"][field]
+        if r is not None and abs(r) >= 0.3:
+            lines.append(f"{labels[field]}와(과) 기분의 상관계수 {r:+.2f}")
+    if not lines:
+        return None
+    return f"최근 {result['days']}일 기록 기준: " + " / ".join(lines)
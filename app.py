@@ -1,20 +1,66 @@
-
 # app.py
+# 시작 프로파일링(HABIT_PROFILE_STARTUP=1)은 다른 import보다 먼저 시작해야 import 시간을 잴 수 있음
+import startup_profile
+
+startup_profile.start()
+
+import math
+import tempfile
 import os
-import json
-import requests
+import re
 import calendar
+import uuid
 from datetime import date, timedelta
 
-import pandas as pd
 import streamlit as st
 
+from analytics import load_analytics, summarize_insights
+from book_catalog import get_book_catalog
+from circuit_breaker import breaker_states
+from daily_cache import get_cached, get_latest_before, put_cached
+from daily_refresher import get_daily_refresher
+from fanout import Deadline, fetch_concurrently
+from fetchers import get_daily_book, get_daily_inspiration, get_dog_image, get_weather
+from habit_core import (
+    CALENDAR_COLUMNS,
+    HABITS,
+    build_book_reason,
+    build_calendar_rows,
+    cities,
+    coach_styles,
+    demo_history_rows,
+    habits_state_from_flags,
+    mission_for_day,
+    summarize_checkin,
+)
+from habit_stats import WINDOWS
+from history_export import EXPORT_DIR, FORMATS, export_history, import_history, new_export_file
+from history_store import get_history_store
+from image_cache import cached_image
+from instrumentation import snapshot, span, start_metrics_server, timed, timed_iter, to_jsonl, to_prometheus
+from report import generate_report, stream_report
+from report_archive import get_report_archive
+from report_cache import get_report_cache
+from report_stream import StreamIncomplete, StreamTimeout
+from session_store import get_session_store, get_user_session
+from weather_cache import get_cached_weather, get_weather_prefetcher
+
+startup_profile.mark("imports")
+
+# Streamlit 1.37+는 st.fragment, 그 이전은 experimental_fragment, 둘 다 없으면 일반 함수로 실행
+fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None) or (lambda fn: fn)
+
+# 로컬 스크레이퍼용 /metrics 엔드포인트 (설정 시에만)
+if os.getenv("HABIT_METRICS_PORT"):
+    start_metrics_server(int(os.getenv("HABIT_METRICS_PORT")))
+
 
 # -----------------------------
 # 기본 설정
 # -----------------------------
 st.set_page_config(page_title="AI 습관 트래커", page_icon="📊", layout="wide")
 st.title("📊 AI 습관 트래커")
+startup_profile.mark("first_paint")
 
 # -----------------------------
 # Sidebar: API Keys
@@ -22,422 +68,104 @@ st.title("📊 AI 습관 트래커")
 st.sidebar.header("🔑 API 설정")
 openai_api_key = st.sidebar.text_input("OpenAI API Key", type="password", value=os.getenv("OPENAI_API_KEY", ""))
 owm_api_key = st.sidebar.text_input("OpenWeatherMap API Key", type="password", value=os.getenv("OPENWEATHERMAP_API_KEY", ""))
+# 서버에 키가 설정돼 있으면 도시 날씨를 백그라운드에서 미리 받아 둠 (입력한 키는 이 세션에서만 사용)
+weather_prefetcher = get_weather_prefetcher(cities)
+# 사용자 ID: HABIT_USER_ID(단일 사용자 배포) > 로그인 계정(st.user) > 주소의 ?uid= 토큰
+# - 토큰은 처음 방문할 때 무작위로 만들어 주소에 넣음 → 새로고침/북마크한 주소로 다시 와도 같은 기록
+# - 세션 상태(st.session_state)는 새로고침마다 비워지므로 ID를 두지 않음
+USER_TOKEN_PARAM = "uid"
+_USER_TOKEN = re.compile(r"^[0-9a-f]{32}$")
+
+
+def _resolve_user_id() -> str:
+    if os.getenv("HABIT_USER_ID"):
+        return os.getenv("HABIT_USER_ID")
+    if getattr(st.user, "is_logged_in", False) and st.user.get("email"):
+        return f"user:{st.user.email}"
+    token = st.query_params.get(USER_TOKEN_PARAM, "")
+    if not _USER_TOKEN.match(token):
+        token = uuid.uuid4().hex
+        st.query_params[USER_TOKEN_PARAM] = token
+    return token
+
+
+user_id = _resolve_user_id()
+st.sidebar.caption(f"👤 사용자 ID: {user_id[:8]}")
+if not os.getenv("HABIT_USER_ID"):
+    st.sidebar.caption("🔖 다른 기기/탭에서도 같은 기록을 보려면 지금 주소를 저장해 두세요.")
 
 st.sidebar.markdown("---")
 st.sidebar.caption("💡 키는 브라우저 세션에만 사용되며, 앱 코드에 저장되지 않도록 구성하세요.")
+startup_profile.mark("shell")
 
 
 # -----------------------------
-# API 연동 함수
+# 기록 저장소 초기화: 기록이 없는 사용자는 데모 6일
 # -----------------------------
-def get_weather(city: str, api_key: str):
-    """
-    OpenWeatherMap에서 현재 날씨를 가져옵니다.
-    - 한국어, 섭씨
-    - 실패 시 None
-    - timeout=10
-    """
-    if not api_key:
-        return None
-
-    try:
-        url = "https://api.openweathermap.org/data/2.5/weather"
-        params = {
-            "q": city,
-            "appid": api_key,
-            "units": "metric",
-            "lang": "kr",
-        }
-        r = requests.get(url, params=params, timeout=10)
-        if r.status_code != 200:
-            return None
-        data = r.json()
-
-        weather_desc = None
-        if isinstance(data.get("weather"), list) and data["weather"]:
-            weather_desc = data["weather"][0].get("description")
-
-        main = data.get("main", {})
-        wind = data.get("wind", {})
-
-        return {
-            "city": city,
-            "temp_c": main.get("temp"),
-            "feels_like_c": main.get("feels_like"),
-            "humidity": main.get("humidity"),
-            "desc": weather_desc,
-            "wind_mps": wind.get("speed"),
-        }
-    except Exception:
-        return None
+history_store = get_history_store()
 
 
-def get_dog_image():
-    """
-    Dog CEO에서 랜덤 강아지 이미지 URL과 품종을 가져옵니다.
-    - 실패 시 None
-    - timeout=10
-    """
-    try:
-        url = "https://dog.ceo/api/breeds/image/random"
-        r = requests.get(url, timeout=10)
-        if r.status_code != 200:
-            return None
-        data = r.json()
-        if data.get("status") != "success":
-            return None
-
-        img_url = data.get("message")
-        if not img_url or not isinstance(img_url, str):
-            return None
-
-        # 품종 추정: .../breeds/{breed}/... 또는 .../breeds/{breed-sub}/...
-        # 예: https://images.dog.ceo/breeds/hound-afghan/n02088094_1003.jpg
-        breed = "알 수 없음"
-        try:
-            parts = img_url.split("/breeds/")
-            if len(parts) > 1:
-                breed_part = parts[1].split("/")[0]  # hound-afghan
-                breed = breed_part.replace("-", " ").strip()
-        except Exception:
-            pass
-
-        return {"image_url": img_url, "breed": breed}
-    except Exception:
-        return None
-
-
-def get_daily_inspiration():
-    """
-    무료 공개 API로부터 오늘의 영감을 가져옵니다.
-    - ZenQuotes(quote) + NASA APOD(optional image)
-    - 실패 시 None
-    - timeout=10
-    """
-    try:
-        result = {
-            "image_url": None,
-            "title": None,
-            "description": None,
-            "quote": None,
-            "author": None,
-        }
-
-        nasa_key = os.getenv("NASA_API_KEY", "").strip()
-        if nasa_key:
-            url = "https://api.nasa.gov/planetary/apod"
-            params = {"api_key": nasa_key}
-            r = requests.get(url, params=params, timeout=10)
-            if r.status_code == 200:
-                data = r.json()
-                if data.get("media_type") == "image":
-                    result["image_url"] = data.get("url")
-                    result["title"] = data.get("title")
-                    result["description"] = data.get("explanation")
-
-        quote_url = "https://zenquotes.io/api/today"
-        r = requests.get(quote_url, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
-            if isinstance(data, list) and data:
-                result["quote"] = data[0].get("q")
-                result["author"] = data[0].get("a")
-
-        if any(value is not None for value in result.values()):
-            return result
-        return None
-    except Exception:
-        return None
-
-
-def get_daily_book():
-    """
-    OpenLibrary에서 오늘의 추천 도서를 가져옵니다.
-    - 실패 시 None
-    - timeout=10
-    """
-    try:
-        url = "https://openlibrary.org/subjects/self_help.json?limit=30"
-        r = requests.get(url, timeout=10)
-        if r.status_code != 200:
-            return None
-        data = r.json()
-        works = data.get("works", [])
-        if not isinstance(works, list) or not works:
-            return None
-
-        idx = date.today().toordinal() % len(works)
-        work = works[idx]
-
-        title = work.get("title") or "알 수 없음"
-        author = "알 수 없음"
-        if isinstance(work.get("authors"), list) and work["authors"]:
-            author = work["authors"][0].get("name") or author
-
-        cover_url = None
-        cover_id = work.get("cover_id")
-        cover_edition = work.get("cover_edition_key")
-        if cover_id:
-            cover_url = f"https://covers.openlibrary.org/b/id/{cover_id}-L.jpg"
-        elif cover_edition:
-            cover_url = f"https://covers.openlibrary.org/b/olid/{cover_edition}-L.jpg"
-
-        short_summary = None
-        work_key = work.get("key")
-        if work_key:
-            work_url = f"https://openlibrary.org{work_key}.json"
-            wr = requests.get(work_url, timeout=10)
-            if wr.status_code == 200:
-                wdata = wr.json()
-                desc = wdata.get("description")
-                if isinstance(desc, dict):
-                    short_summary = desc.get("value")
-                elif isinstance(desc, str):
-                    short_summary = desc
-
-        return {
-            "title": title,
-            "author": author,
-            "cover_url": cover_url,
-            "short_summary": short_summary,
-        }
-    except Exception:
-        return None
-
-
-def build_book_reason(book: dict | None, mood: int, habits: dict, mission_text: str) -> str:
-    if not book:
-        return "오늘은 가볍게 몰입할 수 있는 주제로 분위기를 환기하기 좋아요."
-
-    reasons = []
-    if mood <= 4:
-        reasons.append("기분이 조금 가라앉은 날이라 부담 없는 자기돌봄 메시지가 도움이 돼요.")
-    elif mood >= 8:
-        reasons.append("에너지가 높은 날이라 실행력을 끌어올리는 메시지가 잘 맞아요.")
-    else:
-        reasons.append("무난한 컨디션이라 균형 잡힌 자기계발 주제가 어울려요.")
-
-    if habits.get("공부/독서") or habits.get("리딩 미션"):
-        reasons.append("이미 학습 흐름이 이어지고 있어, 한 챕터만 읽어도 성취감을 얻기 쉬워요.")
-    else:
-        reasons.append("짧은 미션으로 시작하면 독서 습관에 부담 없이 진입할 수 있어요.")
+def _init_history_if_needed(user_id: str):
+    if st.session_state.get("history_user") == user_id:
+        return
+    st.session_state["history_user"] = user_id
+    if history_store.has_history(user_id):
+        return
 
-    reasons.append(f"오늘의 미션은 '{mission_text}'로 설정했어요.")
-    return " ".join(reasons)
+    # 오늘은 입력값으로 저장/갱신
+    for row in demo_history_rows(date.today()):
+        history_store.upsert(user_id, row["day"], done=row["done"], rate=row["rate"], mood=row["mood"], habits=row["habits"])
 
 
-def _system_prompt_for_style(style: str) -> str:
-    if style == "스파르타 코치":
-        return (
-            "너는 매우 엄격하고 직설적인 습관 코치다. 핑계는 받아주지 않는다. "
-            "하지만 모욕적이거나 공격적이면 안 된다. 짧고 강하게, 실행 중심으로 말해라."
-        )
-    if style == "따뜻한 멘토":
-        return (
-            "너는 따뜻하고 공감적인 멘토다. 사용자의 노력과 감정을 존중하고, "
-            "작은 성공을 칭찬하며 부드럽게 다음 행동을 제안한다."
-        )
-    # 게임 마스터
-    return (
-        "너는 RPG 세계관의 게임 마스터다. 사용자의 하루를 퀘스트/스탯/버프로 묘사한다. "
-        "너무 길게 늘어놓지 말고, 재미있지만 실행 가능한 미션으로 마무리해라."
-    )
+_init_history_if_needed(user_id)
 
 
-def generate_report(
-    openai_key: str,
-    coach_style: str,
-    habits: dict,
-    mood: int,
-    weather: dict | None,
-    dog: dict | None,
-    inspiration: dict | None,
-    book: dict | None,
-):
+def _read_daily(fetchers: dict) -> tuple[dict, dict]:
     """
-    습관 + 기분 + 날씨 + 강아지 품종 + 영감 + 책 정보를 묶어 OpenAI에 전달해 리포트를 생성합니다.
-    - 모델: gpt-5-mini
-    - 실패 시 None
+    일일 콘텐츠를 프로세스 공용 디스크 캐시에서만 읽습니다 (네트워크 없음).
+    - 오늘 값이 없어도 이전 날짜 값이 남아 있으면 그 값을 보여주고 백그라운드 갱신만 요청
+    - 이전 값조차 없는 소스(첫 실행)는 화면을 다 그린 뒤 _fetch_daily로 조회
+    - 이 세션에서 오늘 이미 실패한 소스는 rerun마다 다시 호출하지 않음
+    - (소스별 데이터, 나중에 조회할 {소스: 호출}) 반환
     """
-    if not openai_key:
-        return None
-
-    weather_summary = "날씨 정보 없음"
-    if weather:
-        weather_summary = (
-            f"{weather.get('city')} / {weather.get('desc')} / "
-            f"{weather.get('temp_c')}°C (체감 {weather.get('feels_like_c')}°C) / "
-            f"습도 {weather.get('humidity')}% / 바람 {weather.get('wind_mps')} m/s"
-        )
-
-    dog_summary = "강아지 정보 없음"
-    if dog:
-        dog_summary = f"오늘의 강아지 품종: {dog.get('breed')}"
-
-    inspiration_summary = "오늘의 영감 정보 없음"
-    if inspiration:
-        inspiration_parts = []
-        if inspiration.get("title"):
-            inspiration_parts.append(f"제목: {inspiration.get('title')}")
-        if inspiration.get("description"):
-            inspiration_parts.append(f"설명: {inspiration.get('description')}")
-        if inspiration.get("quote"):
-            quote_author = inspiration.get("author") or "익명"
-            inspiration_parts.append(f"문구: \"{inspiration.get('quote')}\" — {quote_author}")
-        if inspiration_parts:
-            inspiration_summary = " / ".join(inspiration_parts)
-
-    book_summary = "오늘의 책 정보 없음"
-    if book:
-        book_parts = [f"{book.get('title')} - {book.get('author')}"]
-        if book.get("short_summary"):
-            book_parts.append(f"요약: {book.get('short_summary')}")
-        if book.get("reason"):
-            book_parts.append(f"추천 이유: {book.get('reason')}")
-        book_summary = " / ".join(book_parts)
-
-    habits_kor = "\n".join([f"- {k}: {'✅' if v else '❌'}" for k, v in habits.items()])
-    system_prompt = _system_prompt_for_style(coach_style)
-
-    # 출력 형식 고정
-    format_spec = """
-아래 형식(섹션 제목 포함)을 반드시 지켜서 한국어로 작성해.
-각 섹션은 2~5문장 정도로 간결하게.
-
-[컨디션 등급] (S/A/B/C/D 중 하나)
-[습관 분석]
-[날씨 코멘트]
-[내일 미션] (3개, 체크박스처럼 '1) ...' 형태)
-[오늘의 한마디] (한 줄)
-""".strip()
-
-    user_prompt = f"""
-오늘 체크인 데이터야.
-
-[습관]
-{habits_kor}
-
-[기분 점수] {mood}/10
-
-[날씨]
-{weather_summary}
-
-[강아지]
-{dog_summary}
-
-[오늘의 영감]
-{inspiration_summary}
-
-[오늘의 책]
-{book_summary}
-
-리포트에는 오늘의 영감 내용을 반드시 언급하고, 책의 주제나 메시지를 사용자의 습관/기분과 연결해줘.
-
-요구 출력 형식:
-{format_spec}
-""".strip()
-
-    # OpenAI Responses API (HTTP) 사용
-    try:
-        url = "https://api.openai.com/v1/responses"
-        headers = {
-            "Authorization": f"Bearer {openai_key}",
-            "Content-Type": "application/json",
-        }
-        payload = {
-            "model": "gpt-4.1-mini",
-            "input": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-        }
-        r = requests.post(url, headers=headers, data=json.dumps(payload), timeout=10)
-        if r.status_code != 200:
-            return None
-
-        data = r.json()
-
-        # responses API는 output_text 또는 output 배열을 가질 수 있음
-        text = data.get("output_text")
-        if text and isinstance(text, str):
-            return text.strip()
-
-        # fallback: output 구조 파싱
-        out = data.get("output", [])
-        chunks = []
-        if isinstance(out, list):
-            for item in out:
-                content = item.get("content", [])
-                if isinstance(content, list):
-                    for c in content:
-                        if c.get("type") in ("output_text", "text") and isinstance(c.get("text"), str):
-                            chunks.append(c["text"])
-        if chunks:
-            return "\n".join(chunks).strip()
-
-        return None
-    except Exception:
-        return None
-
-
-# -----------------------------
-# Session State 초기화: 데모 6일 + 오늘
-# -----------------------------
-def _init_history_if_needed():
-    if "history" in st.session_state:
-        return
-
-    today = date.today()
-
-    # 데모용 6일 샘플(고정값)
-    demo = []
-    demo_counts = [3, 4, 4, 2, 5, 3]   # 6개 습관 중 달성 개수
-    demo_moods = [5, 6, 7, 4, 8, 6]    # 기분 1~10
-    for i in range(6, 0, -1):
-        d = today - timedelta(days=i)
-        idx = 6 - i
-        demo.append(
-            {
-                "date": d.isoformat(),
-                "done": int(demo_counts[idx]),
-                "rate": int(round(demo_counts[idx] / 6 * 100)),
-                "mood": int(demo_moods[idx]),
-            }
-        )
-
-    st.session_state.history = demo  # 오늘은 버튼으로 저장/갱신
-
-
-_init_history_if_needed()
+    refresher = get_daily_refresher(fetchers)
+    today_key = date.today().isoformat()
+    daily = {}
+    deferred = {}
+    for source, (fetch_fn, _) in fetchers.items():
+        cached = get_cached(source)
+        if cached is not None:
+            daily[source] = cached
+            continue
+        previous = get_latest_before(source)
+        if previous is not None:
+            daily[source] = previous
+            refresher.request_refresh(source)
+        elif st.session_state.get(f"{source}_failed_date") != today_key:
+            deferred[source] = lambda fetch_fn=fetch_fn: fetch_fn(date.today())
+    return daily, deferred
 
 
-def _get_daily_cached(cache_key: str, fetch_fn):
+def _fetch_daily(deferred: dict) -> tuple[dict, list[str]]:
+    """캐시에 없던 소스를 한 번에 동시 조회해 캐시에 저장합니다. (결과, 마감을 넘긴 소스 이름 목록)"""
     today_key = date.today().isoformat()
-    date_key = f"{cache_key}_date"
-    data_key = f"{cache_key}_data"
-    if st.session_state.get(date_key) != today_key:
-        st.session_state[date_key] = today_key
-        st.session_state[data_key] = fetch_fn()
-    return st.session_state.get(data_key)
+    fetched, missed = fetch_concurrently(deferred)
+    for source, data in fetched.items():
+        if data is None:
+            st.session_state[f"{source}_failed_date"] = today_key
+        put_cached(source, data)
+    return fetched, missed
 
 
 # -----------------------------
 # 공용 설정
 # -----------------------------
-HABITS = [
-    ("🌅 기상 미션", "wake"),
-    ("💧 물 마시기", "water"),
-    ("📚 공부/독서", "study"),
-    ("🏋️ 운동하기", "workout"),
-    ("😴 수면", "sleep"),
-    ("📖 리딩 미션", "reading"),
-]
-
-cities = [
-    "Seoul", "Busan", "Incheon", "Daegu", "Daejeon",
-    "Gwangju", "Suwon", "Ulsan", "Sejong", "Jeju"
-]
-coach_styles = ["스파르타 코치", "따뜻한 멘토", "게임 마스터"]
+total_habits = len(HABITS)
+habit_names = [label.split(" ", 1)[1] for label, _ in HABITS]
+# 사용자별 통계/컬럼은 서버 측 세션 저장소에서 (메모리 상한을 넘으면 오래 안 쓴 사용자부터 디스크로)
+user_session = get_user_session(user_id, total_habits)
+habit_stats = user_session.stats
+habit_columns = user_session.columns
 
 # 오늘 날짜가 바뀌면 입력 기본값 리셋(체크 상태)
 today_key = date.today().isoformat()
@@ -450,201 +178,454 @@ if st.session_state.get("today_key") != today_key:
     st.session_state["coach_style"] = "따뜻한 멘토"
 
 
+def _current_habits_state() -> dict:
+    """위젯 key에 저장된 오늘 체크 상태 (프래그먼트 밖에서도 읽을 수 있음)"""
+    return habits_state_from_flags({key: st.session_state.get(f"habit_{key}") for _, key in HABITS})
+
+
+def _book_with_reason(book: dict | None, mood: int, habits_state: dict) -> tuple[str, dict | None]:
+    book_reason = build_book_reason(book, mood, habits_state, mission_for_day(date.today()))
+    book_with_reason = dict(book) if book else None
+    if book_with_reason is not None:
+        book_with_reason["reason"] = book_reason
+    return book_reason, book_with_reason
+
+
+def record_today_weather(weather: dict | None):
+    """분석용으로 오늘 고른 도시의 날씨를 하루(도시가 바뀌면 다시) 한 번 저장합니다."""
+    if not weather:
+        return
+    marker = f"{date.today().isoformat()}|{weather.get('city')}"
+    if user_session.prefs.get("weather_recorded") != marker:
+        history_store.upsert_weather(user_id, date.today(), weather)
+        user_session.prefs["weather_recorded"] = marker
+
+
+@timed("history.upsert")
+def upsert_today_history(done: int, rate: int, mood: int, habits: int):
+    """값이 바뀐 rerun에서만 저장소에 쓰고 증분 통계/컬럼 표현을 함께 갱신합니다."""
+    if habit_stats.record(date.today(), habits, done, mood):
+        history_store.upsert(user_id, date.today(), done=done, rate=rate, mood=mood, habits=habits)
+        habit_columns.set(date.today(), habits, mood)
+
+
+# 도서 카탈로그 스냅샷: 오늘의 책은 메모리 색인에서 고르고, 갱신은 백그라운드에서
+book_catalog = get_book_catalog()
+book_catalog.start_refresh()
+
+
+def _todays_book(mood: int) -> dict | None:
+    """기분 구간에 맞춘 오늘의 책. 카탈로그가 아직 비어 있으면 일일 콘텐츠의 책"""
+    return book_catalog.select(date.today(), mood) or fallback_book
+
+
 # -----------------------------
 # 오늘의 영감
+# 캐시에 있는 값으로 먼저 그리고, 처음 조회해야 하는 소스는 페이지를 다 그린 뒤 채움
 # -----------------------------
-st.subheader("🌟 오늘의 영감")
-inspiration = _get_daily_cached("inspiration", get_daily_inspiration)
-with st.container():
-    if inspiration:
-        left, right = st.columns([1, 2])
-        with left:
-            if inspiration.get("image_url"):
-                st.image(inspiration["image_url"], use_container_width=True)
-        with right:
-            if inspiration.get("title"):
-                st.markdown(f"**{inspiration.get('title')}**")
-            if inspiration.get("description"):
-                st.caption(inspiration.get("description"))
-            if inspiration.get("quote"):
-                quote_author = inspiration.get("author") or "익명"
-                st.markdown(f"> {inspiration.get('quote')}")
-                st.write(f"— {quote_author}")
+with span("section.daily_content"):
+    daily_fetchers = {
+        # 영감(APOD/ZenQuotes)은 그날이 되어야 조회 가능, 도서는 날짜로 고르므로 미리 조회 가능
+        "inspiration": (lambda day: get_daily_inspiration(), False),
+    }
+    if book_catalog.ready():
+        # 오늘의 책은 카탈로그 스냅샷에서 고르므로 OpenLibrary 백그라운드 갱신도 멈춤
+        get_daily_refresher(daily_fetchers).unregister("daily_book")
     else:
+        daily_fetchers["daily_book"] = (get_daily_book, True)
+    daily_content, deferred_daily = _read_daily(daily_fetchers)
+inspiration = daily_content.get("inspiration")
+fallback_book = daily_content.get("daily_book")
+
+
+def render_inspiration(inspiration: dict | None, missed: list[str]):
+    if missed:
+        st.caption(f"⏱️ 시간 내 응답하지 않아 다음 새로고침에 다시 시도합니다: {', '.join(missed)}")
+    if not inspiration:
         st.info("오늘의 영감 정보를 가져오지 못했어요. (네트워크/API 확인)")
+        return
+    left, right = st.columns([1, 2])
+    with left:
+        if inspiration.get("image_url"):
+            st.image(cached_image(inspiration["image_url"]), use_container_width=True)
+    with right:
+        if inspiration.get("title"):
+            st.markdown(f"**{inspiration.get('title')}**")
+        if inspiration.get("description"):
+            st.caption(inspiration.get("description"))
+        if inspiration.get("quote"):
+            quote_author = inspiration.get("author") or "익명"
+            st.markdown(f"> {inspiration.get('quote')}")
+            st.write(f"— {quote_author}")
 
 
-# -----------------------------
-# 습관 체크인 UI
-# -----------------------------
-st.subheader("✅ 오늘의 습관 체크인")
-
-c1, c2 = st.columns(2)
-with c1:
-    h_wake = st.checkbox("🌅 기상 미션", key="habit_wake")
-    h_water = st.checkbox("💧 물 마시기", key="habit_water")
-    h_study = st.checkbox("📚 공부/독서", key="habit_study")
-with c2:
-    h_workout = st.checkbox("🏋️ 운동하기", key="habit_workout")
-    h_sleep = st.checkbox("😴 수면", key="habit_sleep")
-
-mood = st.slider("🙂 오늘 기분은 어때? (1~10)", min_value=1, max_value=10, value=st.session_state.get("mood", 6), key="mood")
-
-u1, u2 = st.columns(2)
-with u1:
-    city = st.selectbox("🏙️ 도시 선택", options=cities, index=cities.index(st.session_state.get("city", "Seoul")), key="city")
-with u2:
-    coach_style = st.radio("🎙️ 코치 스타일", options=coach_styles, index=coach_styles.index(st.session_state.get("coach_style", "따뜻한 멘토")), horizontal=True, key="coach_style")
-
-book = _get_daily_cached("daily_book", get_daily_book)
-mission_options = [
-    "5쪽 읽기",
-    "10분 읽기",
-    "핵심 문장 1개 기록하기",
-    "챕터 1개 훑어보기",
-]
-mission_text = mission_options[date.today().toordinal() % len(mission_options)]
-
-# -----------------------------
-# 오늘의 리딩 미션
-# -----------------------------
-st.subheader("📖 오늘의 리딩 미션")
-with st.container():
-    bcol, tcol = st.columns([1, 2])
-    with bcol:
-        if book and book.get("cover_url"):
-            st.image(book["cover_url"], use_container_width=True)
-    with tcol:
-        if book:
-            st.markdown(f"**{book.get('title')}**")
-            st.write(f"저자: {book.get('author')}")
-            if book.get("short_summary"):
-                st.caption(book.get("short_summary"))
-        else:
-            st.info("오늘의 책 정보를 가져오지 못했어요. (OpenLibrary 네트워크 확인)")
-        st.markdown(f"**오늘의 미션:** {mission_text}")
-        h_reading = st.checkbox("✅ 리딩 미션 완료", key="habit_reading")
+st.subheader("🌟 오늘의 영감")
+inspiration_slot = st.empty()
+if "inspiration" in deferred_daily:
+    inspiration_slot.caption("⏳ 오늘의 영감을 불러오는 중...")
+else:
+    with inspiration_slot.container():
+        render_inspiration(inspiration, [])
 
-habits_state = {
-    "기상 미션": bool(h_wake),
-    "물 마시기": bool(h_water),
-    "공부/독서": bool(h_study),
-    "운동하기": bool(h_workout),
-    "수면": bool(h_sleep),
-    "리딩 미션": bool(h_reading),
-}
 
-book_reason = build_book_reason(book, mood, habits_state, mission_text)
-book_with_reason = dict(book) if book else None
-if book_with_reason is not None:
-    book_with_reason["reason"] = book_reason
+# -----------------------------
+# 요약 메트릭 / 31일 차트
+# 체크인 프래그먼트 안에서 호출되어 체크 상태가 바뀔 때만 다시 그림
+# -----------------------------
+@timed("section.summary")
+def render_summary(summary: dict, mood: int):
+    st.subheader("📈 오늘의 요약")
+    rate = summary["rate"]
+    rate_7d = habit_stats.rolling_rate(7)
+    mood_7d = habit_stats.rolling_mood(7)
+    m1, m2, m3 = st.columns(3)
+    m1.metric("달성률", f"{rate}%", delta=f"{rate - rate_7d:+.0f}%p (7일 평균 대비)")
+    m2.metric("달성 습관", f"{summary['done']}/{summary['total']}")
+    m3.metric("기분", f"{mood}/10", delta=None if mood_7d is None else f"{mood - mood_7d:+.1f} (7일 평균 대비)")
+
+    s1, s2 = st.columns(2)
+    with s1:
+        st.markdown("**🔥 습관별 연속 달성**")
+        streak_rows = [
+            {"습관": label, "현재": current, "최장": longest}
+            for (label, _), (current, longest) in zip(HABITS, habit_stats.streaks())
+        ]
+        st.dataframe(streak_rows, use_container_width=True, hide_index=True)
+    with s2:
+        st.markdown("**📐 이동 달성률 / 평균 기분**")
+        rolling_rows = []
+        for window in WINDOWS:
+            window_mood = habit_stats.rolling_mood(window)
+            rolling_rows.append(
+                {
+                    "기간": f"{window}일",
+                    "달성률": f"{habit_stats.rolling_rate(window):.0f}%",
+                    "평균 기분": "-" if window_mood is None else f"{window_mood:.1f}",
+                }
+            )
+        st.dataframe(rolling_rows, use_container_width=True, hide_index=True)
+
+
+@timed("section.chart")
+def render_recent_chart():
+    with span("build.chart"):
+        recent_history = history_store.get_range(user_id, date.today() - timedelta(days=30), date.today())
+        chart_data = {
+            "date": [row["date"] for row in recent_history],
+            "rate": [row["rate"] for row in recent_history],
+        }
 
-done_count = sum(1 for v in habits_state.values() if v)
-total_habits = len(habits_state)
-rate = int(round(done_count / total_habits * 100))
+    st.subheader("📊 최근 31일 달성률")
+    st.bar_chart(chart_data, x="date", y="rate")
 
-with st.container():
-    st.markdown("**📌 책 추천 이유**")
-    st.write(book_reason)
+    st.markdown("**최근 31일 습관별 달성 일수**")
+    habit_counts = habit_columns.habit_counts(date.today() - timedelta(days=30), date.today(), total_habits)
+    st.bar_chart(
+        {"습관": [label for label, _ in HABITS], "달성 일수": habit_counts.tolist()}, x="습관", y="달성 일수"
+    )
 
 
 # -----------------------------
-# 달성률 + 메트릭
+# 월간 달력 (달성률)
+# 체크인 프래그먼트 안에서 그림. 기준 날짜 변경 시 달력만 다시 계산
 # -----------------------------
-st.subheader("📈 오늘의 요약")
-m1, m2, m3 = st.columns(3)
-m1.metric("달성률", f"{rate}%")
-m2.metric("달성 습관", f"{done_count}/{total_habits}")
-m3.metric("기분", f"{mood}/10")
+@fragment
+@timed("section.calendar")
+def calendar_section():
+    st.subheader("🗓️ 월간 달력")
+    selected_date = st.date_input("달력 기준 날짜", value=date.today(), key="calendar_date")
+
+    with span("build.calendar"):
+        month_days = calendar.monthrange(selected_date.year, selected_date.month)[1]
+        month_history = history_store.get_range(
+            user_id,
+            selected_date.replace(day=1),
+            selected_date.replace(day=month_days),
+        )
+        calendar_rows = build_calendar_rows(month_history, selected_date.year, selected_date.month, total_habits)
+        calendar_table = [dict(zip(CALENDAR_COLUMNS, row)) for row in calendar_rows]
+        month_rollup = history_store.get_rollups(user_id, "M", selected_date, selected_date, total_habits)
+    st.dataframe(calendar_table, use_container_width=True, height=260, hide_index=True)
+    if month_rollup:
+        month = month_rollup[0]
+        st.caption(
+            f"{selected_date.month}월: 기록 {month['days']}일 · 평균 기분 {month['mood_mean']:.1f} · "
+            + " · ".join(f"{name} {count}일" for name, count in zip(habit_names, month["habit_counts"]))
+        )
 
 
 # -----------------------------
-# 31일 바 차트 (6일 데모 + 오늘)
-# session_state로 기록 저장
+# 장기 추이: 주/월/연 집계 테이블만 읽음
 # -----------------------------
-def upsert_today_history(done: int, rate: int, mood: int):
-    today_str = date.today().isoformat()
-    history = st.session_state.history
+@fragment
+@timed("section.trends")
+def trends_section():
+    st.subheader("📆 장기 추이")
+    period_labels = {"주": "W", "월": "M", "연": "Y"}
+    period = period_labels[st.radio("집계 단위", list(period_labels), index=1, horizontal=True, key="trend_period")]
+
+    with span("build.trends"):
+        rows = history_store.get_rollups(user_id, period, date.min, date.today(), total_habits)
+    if not rows:
+        st.info("아직 기록이 없어요.")
+        return
+    trend_data = {
+        "시작일": [row["start"].isoformat() for row in rows],
+        "달성률(기록한 날 기준, %)": [row["done_sum"] / (row["days"] * total_habits) * 100 for row in rows],
+        "평균 기분(x10)": [row["mood_mean"] * 10 for row in rows],
+    }
+    st.line_chart(trend_data, x="시작일")
+
+    years = sorted({row["start"].year for row in history_store.get_rollups(user_id, "Y", date.min, date.today(), total_habits)})
+    year = st.selectbox("연간 히트맵 연도", years, index=len(years) - 1, key="heatmap_year")
+    months = history_store.get_rollups(user_id, "M", date(year, 1, 1), date(year, 12, 31), total_habits)
+    heatmap = [
+        {"월": f"{row['start'].month}월", "습관": name, "달성률": round(count / row["days"] * 100)}
+        for row in months
+        for name, count in zip(habit_names, row["habit_counts"])
+    ]
+    st.vega_lite_chart(
+        {
+            "data": {"values": heatmap},
+            "mark": "rect",
+            "encoding": {
+                "x": {"field": "월", "type": "ordinal", "sort": [f"{m}월" for m in range(1, 13)]},
+                "y": {"field": "습관", "type": "nominal", "sort": habit_names},
+                "color": {"field": "달성률", "type": "quantitative", "scale": {"domain": [0, 100]}},
+                "tooltip": [{"field": "월"}, {"field": "습관"}, {"field": "달성률"}],
+            },
+        },
+        use_container_width=True,
+    )
 
-    # 오늘 데이터가 있으면 갱신, 없으면 추가
-    replaced = False
-    for row in history:
-        if row["date"] == today_str:
-            row["done"] = int(done)
-            row["rate"] = int(rate)
-            row["mood"] = int(mood)
-            replaced = True
-            break
-    if not replaced:
-        history.append({"date": today_str, "done": int(done), "rate": int(rate), "mood": int(mood)})
 
-    # 최근 31개만 유지
-    history.sort(key=lambda x: x["date"])
-    st.session_state.history = history[-31:]
+# -----------------------------
+# 습관 체크인 UI
+# 체크/슬라이더 변경 시 이 프래그먼트만 다시 실행
+# -----------------------------
+@fragment
+@timed("section.checkin")
+def checkin_section():
+    st.subheader("✅ 오늘의 습관 체크인")
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.checkbox("🌅 기상 미션", key="habit_wake")
+        st.checkbox("💧 물 마시기", key="habit_water")
+        st.checkbox("📚 공부/독서", key="habit_study")
+    with c2:
+        st.checkbox("🏋️ 운동하기", key="habit_workout")
+        st.checkbox("😴 수면", key="habit_sleep")
+
+    mood = st.slider("🙂 오늘 기분은 어때? (1~10)", min_value=1, max_value=10, value=st.session_state.get("mood", 6), key="mood")
+    book = _todays_book(mood)
+
+    u1, u2 = st.columns(2)
+    with u1:
+        city = st.selectbox("🏙️ 도시 선택", options=cities, index=cities.index(st.session_state.get("city", "Seoul")), key="city")
+        if owm_api_key:
+            record_today_weather(get_cached_weather(city))
+    with u2:
+        st.radio("🎙️ 코치 스타일", options=coach_styles, index=coach_styles.index(st.session_state.get("coach_style", "따뜻한 멘토")), horizontal=True, key="coach_style")
+
+    # -----------------------------
+    # 오늘의 리딩 미션
+    # -----------------------------
+    mission_text = mission_for_day(date.today())
+    st.subheader("📖 오늘의 리딩 미션")
+    with st.container():
+        bcol, tcol = st.columns([1, 2])
+        with bcol:
+            if book and book.get("cover_url"):
+                st.image(cached_image(book["cover_url"], 480), use_container_width=True)
+        with tcol:
+            if book:
+                st.markdown(f"**{book.get('title')}**")
+                st.write(f"저자: {book.get('author')}")
+                if book.get("short_summary"):
+                    st.caption(book.get("short_summary"))
+            else:
+                st.info("오늘의 책 정보를 가져오지 못했어요. (OpenLibrary 네트워크 확인)")
+            st.markdown(f"**오늘의 미션:** {mission_text}")
+            st.checkbox("✅ 리딩 미션 완료", key="habit_reading")
+
+    habits_state = _current_habits_state()
+    book_reason, _ = _book_with_reason(book, mood, habits_state)
+    summary = summarize_checkin(habits_state)
+
+    with st.container():
+        st.markdown("**📌 책 추천 이유**")
+        st.write(book_reason)
+
+    # 차트는 "현재 입력값 기준 오늘"을 반영해서 보여주기
+    upsert_today_history(summary["done"], summary["rate"], mood, summary["mask"])
+
+    render_summary(summary, mood)
+    render_recent_chart()
+    # 장기 추이/달력도 오늘 기록을 보여주므로 체크인이 바뀔 때 함께 다시 그림
+    # (둘 다 프래그먼트라 집계 단위/기준 날짜만 바꾸면 그 섹션만 다시 실행)
+    trends_section()
+    calendar_section()
+
+
+checkin_section()
 
 
-# 차트는 "현재 입력값 기준 오늘"을 반영해서 보여주기
-upsert_today_history(done_count, rate, mood)
+# -----------------------------
+# 어제 리포트의 [내일 미션] 완료 체크 (보관소 키 조회)
+# -----------------------------
+@fragment
+@timed("section.missions")
+def mission_review_section():
+    yesterday = date.today() - timedelta(days=1)
+    missions = report_archive.missions_for(user_id, yesterday)
+    if not missions:
+        return
+    st.subheader("🎯 어제 받은 오늘의 미션")
+    for mission in missions:
+        checked = st.checkbox(
+            mission["text"], value=mission["done"], key=f"mission_{user_id}_{yesterday.isoformat()}_{mission['idx']}"
+        )
+        if checked != mission["done"]:
+            report_archive.set_mission_done(user_id, yesterday, mission["idx"], checked)
+    done = sum(st.session_state.get(f"mission_{user_id}_{yesterday.isoformat()}_{m['idx']}", m["done"]) for m in missions)
+    st.caption(f"{done}/{len(missions)}개 완료")
 
-df = pd.DataFrame(st.session_state.history)
-df["date"] = pd.to_datetime(df["date"])
-df = df.sort_values("date")
-df_display = df.set_index("date")[["rate"]]
 
-st.subheader("📊 최근 31일 달성률")
-st.bar_chart(df_display)
+report_archive = get_report_archive()
+mission_review_section()
 
 
 # -----------------------------
-# 월간 달력 (달성률)
+# 장기 패턴 분석: 습관별 기분 변화, 동시 달성, 요일, 날씨
 # -----------------------------
-st.subheader("🗓️ 월간 달력")
-selected_date = st.date_input("달력 기준 날짜", value=date.today())
+@fragment
+@timed("section.analytics")
+def analytics_section():
+    st.subheader("🔬 장기 패턴 분석")
+    with span("build.analytics"):
+        result = load_analytics(user_id, habit_columns, total_habits)
+    if not result or result["days"] < 3:
+        st.info("분석할 기록이 아직 부족해요.")
+        return
+    st.caption(f"기록된 {result['days']}일 기준 · 평균 기분 {result['mean_mood'] or 0:.1f}")
+
+    lift_col, week_col = st.columns(2)
+    with lift_col:
+        st.markdown("**습관별 기분 변화** (달성한 날 - 못한 날)")
+        lifts = [(name, item["lift"]) for name, item in zip(habit_names, result["mood_lift"]) if item["lift"] is not None]
+        if not lifts:
+            st.caption("비교할 기록이 부족해요.")
+        else:
+            st.bar_chart(
+                {"습관": [name for name, _ in lifts], "기분 변화": [lift for _, lift in lifts]}, x="습관", y="기분 변화"
+            )
+    with week_col:
+        st.markdown("**요일별 평균**")
+        week_rows = [
+            {
+                "요일": row["weekday"],
+                "기록 일수": row["days"],
+                "평균 기분": None if row["mean_mood"] is None else round(row["mean_mood"], 2),
+                "평균 달성 수": None if row["mean_done"] is None else round(row["mean_done"], 2),
+            }
+            for row in result["weekday"]
+        ]
+        st.dataframe(week_rows, use_container_width=True, hide_index=True)
+
+    st.markdown("**함께 달성하는 습관** (행 습관을 달성한 날 중 열 습관도 달성한 비율 %)")
+    co_rows = [
+        {
+            "습관": name,
+            **{other: None if math.isnan(rate) else round(rate * 100) for other, rate in zip(habit_names, row)},
+        }
+        for name, row in zip(habit_names, result["co_rate"].tolist())
+    ]
+    st.dataframe(co_rows, use_container_width=True, hide_index=True)
 
-calendar_map = {date.fromisoformat(row["date"]): row for row in st.session_state.history}
-cal = calendar.Calendar(firstweekday=0)
-weeks = cal.monthdatescalendar(selected_date.year, selected_date.month)
+    weather = result["weather"]
+    w1, w2, w3 = st.columns(3)
+    for col, field, label in ((w1, "temp_c", "기온"), (w2, "humidity", "습도"), (w3, "wind_mps", "바람")):
+        value = weather[field]
+        col.metric(f"{label}-기분 상관계수", "-" if value is None else f"{value:+.2f}")
+    st.caption(f"날씨가 저장된 날: {weather['days']}일 (날씨 API 키가 있을 때 하루 한 번 저장)")
 
-calendar_rows = []
-for week in weeks:
-    row = []
-    for day in week:
-        if day.month != selected_date.month:
-            row.append("")
-            continue
-        entry = calendar_map.get(day)
-        if entry:
-            row.append(f"{day.day}\n✅ {entry['done']}/{total_habits}\n🙂 {entry['mood']}")
-        else:
-            row.append(str(day.day))
-    calendar_rows.append(row)
 
-calendar_df = pd.DataFrame(calendar_rows, columns=["월", "화", "수", "목", "금", "토", "일"])
-st.dataframe(calendar_df, use_container_width=True, height=260)
-st.caption("최근 기록(최대 31일)만 표시됩니다.")
+analytics_section()
 
 
 # -----------------------------
 # 결과 표시: 버튼 -> 날씨/강아지 카드 + 리포트
+# 버튼 클릭 시 리포트 영역만 다시 실행
 # -----------------------------
-st.subheader("🧠 AI 코치 리포트")
-
-btn = st.button("컨디션 리포트 생성", use_container_width=True)
-
-if btn:
-    with st.spinner("데이터 수집 & 리포트 생성 중..."):
-        weather = get_weather(city, owm_api_key)
-        dog = get_dog_image()
-        report = generate_report(
-            openai_key=openai_api_key,
-            coach_style=coach_style,
-            habits=habits_state,
-            mood=mood,
-            weather=weather,
-            dog=dog,
-            inspiration=inspiration,
-            book=book_with_reason,
-        )
+@fragment
+@timed("section.report")
+def report_section():
+    st.subheader("🧠 AI 코치 리포트")
+
+    bcol1, bcol2 = st.columns([3, 1])
+    with bcol1:
+        btn = st.button("컨디션 리포트 생성", key="report_generate", use_container_width=True)
+    with bcol2:
+        regen = st.button("🔄 새로 생성", key="report_regenerate", use_container_width=True, help="저장된 리포트를 쓰지 않고 다시 생성합니다.")
+    stream_mode = st.checkbox("리포트를 생성되는 대로 보여주기 (스트리밍)", value=True, key="stream_report")
+
+    if not (btn or regen):
+        return
+
+    # 프래그먼트만 다시 실행될 때도 최신 값을 쓰도록 인자 대신 공용 캐시에서 읽음
+    # (첫 실행에서 늦게 받은 영감도 여기서 보임)
+    inspiration = get_cached("inspiration") or get_latest_before("inspiration")
+    habits_state = _current_habits_state()
+    summary = summarize_checkin(habits_state)
+    mood = st.session_state.get("mood", 6)
+    city = st.session_state.get("city", "Seoul")
+    coach_style = st.session_state.get("coach_style", "따뜻한 멘토")
+    _, book_with_reason = _book_with_reason(_todays_book(mood), mood, habits_state)
+
+    use_report_cache = not regen
+    report = None
+    with st.spinner("데이터 수집 & 리포트 생성 중..." if not stream_mode else "데이터 수집 중..."):
+        deadline = Deadline()
+        weather = get_cached_weather(city) if owm_api_key else None
+        report_sources = {}
+        if weather is None and owm_api_key:
+            if weather_prefetcher is not None:
+                weather_prefetcher.request_refresh()
+            else:
+                # 프리페처가 없으면 이 세션의 키로 이번 요청에서만 조회
+                report_sources["날씨"] = lambda: get_weather(city, owm_api_key)
+        insights = summarize_insights(load_analytics(user_id, habit_columns, total_habits), habit_names)
+        # 같은 입력이면 같은 프롬프트가 되도록 강아지는 사용자별로 하루 한 번만 새로 뽑음 (새로 생성 시 교체)
+        saved_dog = user_session.prefs.get("dog") or {}
+        dog = saved_dog.get("data") if saved_dog.get("date") == today_key else None
+        if dog is None or regen:
+            report_sources["강아지"] = get_dog_image
+        fetched, missed = fetch_concurrently(report_sources, deadline.remaining())
+        if "날씨" in fetched:
+            weather = fetched["날씨"]
+            put_cached("weather", weather, {"city": city})
+        record_today_weather(weather)
+        if "강아지" in fetched:
+            dog = fetched["강아지"]
+            user_session.prefs["dog"] = {"date": today_key, "data": dog}
+        if not stream_mode:
+            report = generate_report(
+                openai_key=openai_api_key,
+                coach_style=coach_style,
+                habits=habits_state,
+                mood=mood,
+                weather=weather,
+                dog=dog,
+                inspiration=inspiration,
+                book=book_with_reason,
+                timeout=max(1.0, deadline.remaining()),
+                use_cache=use_report_cache,
+                insights=insights,
+            )
+
+    if missed:
+        st.warning(f"마감 시간 안에 응답하지 않은 소스: {', '.join(missed)}")
 
     wcol, dcol = st.columns(2)
 
@@ -657,6 +638,8 @@ if btn:
             st.write(f"**기온:** {weather.get('temp_c')}°C (체감 {weather.get('feels_like_c')}°C)")
             st.write(f"**습도:** {weather.get('humidity')}%")
             st.write(f"**바람:** {weather.get('wind_mps')} m/s")
+        elif owm_api_key:
+            st.info("날씨 정보를 아직 받아오는 중이거나 가져오지 못했어요. 잠시 후 다시 생성해 보세요.")
         else:
             st.info("날씨 정보를 가져오지 못했어요. (API Key/도시/네트워크 확인)")
 
@@ -666,16 +649,47 @@ if btn:
         if dog:
             st.write(f"**품종:** {dog.get('breed')}")
             if dog.get("image_url"):
-                st.image(dog["image_url"], use_container_width=True)
+                st.image(cached_image(dog["image_url"]), use_container_width=True)
         else:
             st.info("강아지 정보를 가져오지 못했어요. (Dog CEO 네트워크 확인)")
 
     st.markdown("### 📝 리포트")
+    report_cut = False
+    if stream_mode:
+        report_placeholder = st.empty()
+        report_parts = []
+        try:
+            for delta in timed_iter("report.stream", stream_report(
+                openai_key=openai_api_key,
+                coach_style=coach_style,
+                habits=habits_state,
+                mood=mood,
+                weather=weather,
+                dog=dog,
+                inspiration=inspiration,
+                book=book_with_reason,
+                use_cache=use_report_cache,
+                insights=insights,
+            )):
+                report_parts.append(delta)
+                report_placeholder.markdown("".join(report_parts) + "▌")
+        except StreamTimeout as e:
+            report_cut = True
+            if report_parts:
+                st.caption(f"⏱️ 응답이 멈춰서 여기까지 표시했어요. ({e})")
+        except StreamIncomplete as e:
+            report_cut = True
+            if report_parts:
+                st.warning(f"✂️ 리포트가 중간에 끊겼어요. 받은 부분까지만 표시합니다. ({e}) 다시 생성해 보세요.")
+        report = "".join(report_parts).strip() or None
+        report_placeholder.markdown(report or "")
+
     if report:
-        st.markdown(report)
+        if not stream_mode:
+            st.markdown(report)
 
         share_text = f"""AI 습관 트래커 리포트 ({date.today().isoformat()})
-- 달성률: {rate}% ({done_count}/{total_habits})
+- 달성률: {summary['rate']}% ({summary['done']}/{summary['total']})
 - 기분: {mood}/10
 - 도시: {city}
 - 코치: {coach_style}
@@ -684,9 +698,165 @@ if btn:
 """
         st.markdown("### 📣 공유용 텍스트")
         st.code(share_text, language="text")
+
+        # 검색/내일 미션 확인용으로 입력값과 함께 보관 (같은 날 같은 본문은 한 번만, 끊긴 리포트는 제외)
+        if not report_cut:
+            report_archive.archive(
+                user_id,
+                date.today(),
+                report,
+                coach_style=coach_style,
+                mood=mood,
+                habits=habits_state,
+                city=city,
+                weather=weather,
+                book=book_with_reason,
+            )
     else:
         st.error("리포트 생성에 실패했어요. (OpenAI API Key/모델/네트워크 확인)")
 
+    cache_stats = get_report_cache().stats()
+    st.caption(
+        f"🗂️ 리포트 캐시: 적중 {cache_stats['hits']} / 미스 {cache_stats['misses']} "
+        f"(저장 {cache_stats['entries']}개)"
+    )
+
+
+report_section()
+
+
+# -----------------------------
+# 지난 리포트 검색 (FTS5 역색인)
+# -----------------------------
+@fragment
+@timed("section.archive")
+def archive_section():
+    st.subheader("🗄️ 지난 리포트 검색")
+    query = st.text_input(
+        "검색어 (예: 운동, 스트레칭, 책 제목)",
+        key="archive_query",
+        placeholder=f"보관된 리포트 {report_archive.count(user_id)}개",
+    )
+    if not query.strip():
+        return
+    hits = report_archive.search(user_id, query)
+    if not hits:
+        st.caption("일치하는 리포트가 없어요.")
+        return
+    for hit in hits:
+        with st.expander(f"{hit['date'].isoformat()} · {hit['coach_style'] or '-'} · 기분 {hit['mood'] or '-'}/10"):
+            st.markdown(hit["snippet"])
+            if hit["book_title"]:
+                st.caption(f"📖 {hit['book_title']}")
+            st.markdown("---")
+            st.markdown(hit["report"])
+
+
+archive_section()
+startup_profile.mark("sections")
+
+
+# -----------------------------
+# Sidebar: 성능 디버그 패널 (선택)
+# -----------------------------
+if st.sidebar.checkbox("🛠️ 성능 디버그 패널", key="debug_panel"):
+    metrics = snapshot()
+    with st.sidebar.expander("⏱️ 구간별 소요 시간", expanded=True):
+        span_rows = [
+            {
+                "구간": name,
+                "횟수": stat["count"],
+                "평균(ms)": round(stat["mean_ms"] or 0, 1),
+                "p95(ms)": stat["p95_ms"],
+                "최대(ms)": round(stat["max_ms"], 1),
+                "오류": stat["errors"],
+            }
+            for name, stat in sorted(metrics["spans"].items())
+        ]
+        st.dataframe(span_rows, use_container_width=True, hide_index=True)
+        if metrics["counters"]:
+            st.json(metrics["counters"])
+        st.download_button("Prometheus 텍스트", to_prometheus(), file_name="metrics.prom", mime="text/plain")
+        st.download_button("JSON lines", to_jsonl(), file_name="metrics.jsonl", mime="application/x-ndjson")
+    with st.sidebar.expander("👥 세션 저장소"):
+        st.json(get_session_store().stats())
+    breakers = breaker_states()
+    if breakers:
+        with st.sidebar.expander("🔌 업스트림 서킷 브레이커"):
+            st.dataframe(
+                [
+                    {"호스트": host, "상태": b["state"], "최근 호출": b["calls"], "실패": b["failures"]}
+                    for host, b in sorted(breakers.items())
+                ],
+                use_container_width=True,
+                hide_index=True,
+            )
+if startup_profile.ENABLED:
+    with st.sidebar.expander("🚀 시작 프로파일"):
+        profile = startup_profile.report()
+        st.dataframe(
+            [{"단계": name, "경과(ms)": ms} for name, ms in profile["marks_ms"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.dataframe(
+            [{"모듈": name, "import(ms)": ms} for name, ms in profile["imports_ms"][:15]],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+
+# -----------------------------
+# 기록 내보내기/가져오기 (Parquet/Arrow/CSV)
+# -----------------------------
+with st.expander("💾 기록 내보내기 / 가져오기"):
+    export_formats = {"Parquet": "parquet", "Arrow IPC": "arrow", "CSV": "csv"}
+    export_label = st.radio("형식", list(export_formats), horizontal=True, key="export_format")
+    if st.button("내보내기 파일 만들기", key="export_history"):
+        # 세션마다 새 파일 (같은 ID의 다른 세션과 겹치지 않음), 이 세션의 이전 파일은 지움
+        previous = st.session_state.pop("export_file", None)
+        if previous and os.path.exists(previous[0]):
+            os.remove(previous[0])
+        path = new_export_file(user_id, export_formats[export_label])
+        with span("history.export"):
+            rows = export_history(path, user_id)
+        st.session_state["export_file"] = (path, rows)
+    export_file = st.session_state.get("export_file")
+    if export_file and os.path.exists(export_file[0]):
+        path, rows = export_file
+        download_name = f"habit_history{os.path.splitext(path)[1]}"
+        with open(path, "rb") as f:
+            st.download_button(f"⬇️ {download_name} ({rows}일)", f, file_name=download_name)
+
+    uploaded = st.file_uploader(
+        "내보낸 파일 가져오기 (같은 날짜는 파일 값으로 덮어씀)",
+        type=[ext.lstrip(".") for ext in FORMATS],
+        key="import_file",
+    )
+    st.caption("한 사용자의 내보내기 파일을 지금 세션의 기록으로 가져옵니다.")
+    if uploaded is not None and st.button("가져오기", key="import_history"):
+        # Arrow/Parquet은 메모리 맵으로 읽으므로 디스크 임시 파일로 옮긴 뒤 가져옴 (확장자만 원본에서)
+        ext = os.path.splitext(uploaded.name)[1].lower()
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=EXPORT_DIR, prefix="upload_", suffix=ext, delete=False) as f:
+            f.write(uploaded.getbuffer())
+            path = f.name
+        try:
+            with span("history.import"):
+                result = import_history(path, as_user=user_id)
+        except Exception as e:
+            st.error(f"가져오기 실패: {e}")
+        else:
+            # 과거 기록이 바뀌었으므로 사용자 상태(통계/컬럼)를 다시 만들고 화면을 새로 그림
+            get_session_store().replace(user_id, total_habits)
+            st.session_state["import_result"] = result
+            st.rerun()
+        finally:
+            os.remove(path)
+    import_result = st.session_state.pop("import_result", None)
+    if import_result:
+        st.success(f"{import_result['rows']}일 기록을 가져왔어요. (날씨 {import_result['weather_rows']}일)")
+
 
 # -----------------------------
 # 하단: API 안내 (expander)
@@ -722,3 +892,21 @@ with st.expander("🔎 API 안내 / 설정 팁"):
   - 배포 시에는 Streamlit Secrets 또는 서버 환경변수로 키를 주입하는 방식을 권장합니다.
 """
     )
+
+
+# -----------------------------
+# 첫 실행: 캐시에 없던 일일 콘텐츠를 화면을 다 그린 뒤 받아 자리를 채움
+# -----------------------------
+if deferred_daily:
+    with span("section.daily_content.deferred"):
+        late_daily, missed_daily = _fetch_daily(deferred_daily)
+    if "inspiration" in deferred_daily:
+        inspiration = late_daily.get("inspiration")
+        with inspiration_slot.container():
+            render_inspiration(inspiration, missed_daily)
+    startup_profile.mark("deferred")
+    startup_profile.finish()
+    # 체크인/리포트가 쓰는 책은 이미 그려졌으므로, 새로 받았을 때만 한 번 다시 실행
+    if late_daily.get("daily_book") is not None:
+        st.rerun()
+startup_profile.finish()
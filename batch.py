@@ -0,0 +1,269 @@
+# batch.py
+"""
+여러 사용자의 체크인 파일(JSONL/CSV)로 코치 리포트를 한꺼번에 생성하는 헤드리스 CLI.
+- 제한된 작업자 풀 + 업스트림 호스트별 속도 제한
+- 완료한 작업을 체크포인트 파일에 기록해 중단 후 이어서 실행
+- 결과는 끝나는 순서대로 JSONL로 바로 기록
+
+사용 예:
+    python batch.py checkins.jsonl -o reports.jsonl --workers 4
+입력 행 필드:
+    user_id, date(YYYY-MM-DD), mood(1~10), city, coach_style,
+    습관 key(wake, water, study, workout, sleep, reading) 또는 "habits": {key: bool}
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date
+from urllib.parse import urlsplit
+
+import http_client
+import report
+from book_catalog import get_book_catalog
+from daily_cache import get_or_fetch
+from fetchers import get_daily_book, get_daily_inspiration, get_dog_image, get_weather
+from habit_core import HABITS, build_book_reason, habits_state_from_flags, mission_for_day
+
+# 호스트별 기본 속도 제한(초당 요청 수)
+DEFAULT_RATE_LIMITS = {
+    "api.openai.com": 2.0,
+    "api.openweathermap.org": 1.0,
+    "dog.ceo": 5.0,
+}
+
+
+def read_checkins(path: str):
+    """
+    JSONL 또는 CSV(확장자로 판별) 체크인 행을 하나씩 돌려줍니다.
+    - JSON으로 읽을 수 없는 줄은 원문 문자열 그대로 (parse_checkin에서 실패 처리)
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            yield from csv.DictReader(f)
+            return
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield line
+
+
+def _truthy(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "y", "o")
+    return bool(value)
+
+
+def parse_checkin(row: dict) -> dict:
+    """입력 행 → 체크인. 필드가 빠졌거나 형식이 틀리면 ValueError"""
+    if not isinstance(row, dict):
+        raise ValueError(f"not a check-in object: {str(row)[:80]!r}")
+    if not row.get("user_id"):
+        raise ValueError("missing user_id")
+    flags = row.get("habits") if isinstance(row.get("habits"), dict) else row
+    return {
+        "user_id": str(row["user_id"]),
+        "date": date.fromisoformat(str(row.get("date") or date.today().isoformat())),
+        "habits": habits_state_from_flags({key: _truthy(flags.get(key, False)) for _, key in HABITS}),
+        "mood": int(row.get("mood") or 6),
+        "city": row.get("city") or "Seoul",
+        "coach_style": row.get("coach_style") or "따뜻한 멘토",
+    }
+
+
+def job_key(checkin: dict) -> str:
+    return f"{checkin['user_id']}|{checkin['date'].isoformat()}"
+
+
+def load_checkpoint(path: str) -> set[str]:
+    if not os.path.exists(path):
+        return set()
+    with open(path, encoding="utf-8") as f:
+        return {line.rstrip("\n") for line in f if line.strip()}
+
+
+class BatchRunner:
+    def __init__(self, openai_key: str, owm_key: str, with_dog: bool = False):
+        self.openai_key = openai_key
+        self.owm_key = owm_key
+        self.with_dog = with_dog
+        # 같은 배치 안에서 도시별 날씨는 한 번만 조회
+        self._weather: dict[str, dict | None] = {}
+        self._weather_lock = threading.Lock()
+
+    def _weather_for(self, city: str):
+        with self._weather_lock:
+            if city in self._weather:
+                return self._weather[city]
+        weather = get_weather(city, self.owm_key)
+        with self._weather_lock:
+            self._weather[city] = weather
+        return weather
+
+    def run_one(self, checkin: dict, inspiration: dict | None, book: dict | None) -> dict:
+        started = time.monotonic()
+        # 로컬 카탈로그 스냅샷이 있으면 체크인 날짜/기분에 맞춘 책
+        book = get_book_catalog().select(checkin["date"], checkin["mood"]) or book
+        book_with_reason = None
+        if book:
+            book_with_reason = dict(book)
+            book_with_reason["reason"] = build_book_reason(
+                book, checkin["mood"], checkin["habits"], mission_for_day(checkin["date"])
+            )
+        text = report.generate_report(
+            openai_key=self.openai_key,
+            coach_style=checkin["coach_style"],
+            habits=checkin["habits"],
+            mood=checkin["mood"],
+            weather=self._weather_for(checkin["city"]),
+            dog=get_dog_image() if self.with_dog else None,
+            inspiration=inspiration,
+            book=book_with_reason,
+        )
+        return {
+            "user_id": checkin["user_id"],
+            "date": checkin["date"].isoformat(),
+            "status": "ok" if text else "failed",
+            "report": text,
+            "elapsed_sec": round(time.monotonic() - started, 3),
+        }
+
+
+def run_batch(
+    input_path: str,
+    output_path: str,
+    checkpoint_path: str,
+    runner: BatchRunner,
+    workers: int = 4,
+) -> dict:
+    """
+    입력 파일의 모든 체크인에 대해 리포트를 생성합니다.
+    - 체크포인트에 있는 작업은 건너뜀
+    - 성공한 작업만 체크포인트에 남겨, 실패한 작업은 다음 실행에서 재시도
+    - 형식이 틀린 행은 failed로 기록하고 계속 진행
+    - 도중에 예외가 나도 이미 제출한 작업의 결과는 기록/체크포인트한 뒤 전달
+    """
+    done_keys = load_checkpoint(checkpoint_path)
+    inspiration = get_or_fetch("inspiration", get_daily_inspiration)
+    book = None if get_book_catalog().ready() else get_or_fetch("daily_book", get_daily_book)
+
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+    write_lock = threading.Lock()
+    with open(output_path, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as ckpt, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as executor:
+        futures = {}
+        try:
+            for line_no, row in enumerate(read_checkins(input_path), start=1):
+                try:
+                    checkin = parse_checkin(row)
+                except Exception as e:
+                    _write_result(_invalid_row_result(row, line_no, e), None, out, ckpt, write_lock, counts)
+                    continue
+                key = job_key(checkin)
+                if key in done_keys:
+                    counts["skipped"] += 1
+                    continue
+                done_keys.add(key)
+                futures[executor.submit(runner.run_one, checkin, inspiration, book)] = key
+                # 입력이 커도 대기 중인 작업 수는 작업자 수의 몇 배로 제한
+                if len(futures) >= workers * 4:
+                    _drain(futures, out, ckpt, write_lock, counts, wait_all=False)
+        finally:
+            _drain(futures, out, ckpt, write_lock, counts, wait_all=True)
+    return counts
+
+
+def _invalid_row_result(row, line_no: int, error: Exception) -> dict:
+    fields = row if isinstance(row, dict) else {}
+    return {
+        "user_id": fields.get("user_id"),
+        "date": fields.get("date"),
+        "row": line_no,
+        "status": "failed",
+        "report": None,
+        "error": f"invalid row: {error}",
+    }
+
+
+def _write_result(result: dict, key: str | None, out, ckpt, write_lock, counts: dict):
+    with write_lock:
+        out.write(json.dumps(result, ensure_ascii=False) + "\n")
+        out.flush()
+        if key is not None and result["status"] == "ok":
+            ckpt.write(key + "\n")
+            ckpt.flush()
+    counts[result["status"]] += 1
+
+
+def _drain(futures: dict, out, ckpt, write_lock, counts: dict, wait_all: bool):
+    """끝난 작업 결과를 기록합니다. wait_all=False면 하나만 처리하고 돌아감"""
+    for future in as_completed(list(futures)):
+        key = futures.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            user_id, day = key.split("|", 1)
+            result = {"user_id": user_id, "date": day, "status": "failed", "report": None, "error": str(e)}
+        _write_result(result, key, out, ckpt, write_lock, counts)
+        if not wait_all:
+            break
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="체크인 파일로 AI 코치 리포트를 일괄 생성합니다.")
+    parser.add_argument("input", help="체크인 파일 (.jsonl 또는 .csv)")
+    parser.add_argument("-o", "--output", default="reports.jsonl", help="결과 JSONL 경로 (이어쓰기)")
+    parser.add_argument("--checkpoint", help="체크포인트 경로 (기본: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--with-dog", action="store_true", help="행마다 Dog CEO 이미지를 조회해 프롬프트에 포함")
+    parser.add_argument("--openai-base-url", help="OpenAI 호환 엔드포인트 (로컬 대체 서버 등)")
+    parser.add_argument(
+        "--rate-limit",
+        action="append",
+        default=[],
+        metavar="HOST=RPS",
+        help="호스트별 초당 요청 수 (여러 번 지정 가능)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.openai_base_url:
+        report.OPENAI_BASE_URL = args.openai_base_url.rstrip("/")
+        report.OPENAI_RESPONSES_URL = f"{report.OPENAI_BASE_URL}/responses"
+
+    rate_limits = dict(DEFAULT_RATE_LIMITS)
+    openai_host = urlsplit(report.OPENAI_RESPONSES_URL).hostname
+    if openai_host and openai_host != "api.openai.com":
+        rate_limits[openai_host] = rate_limits["api.openai.com"]
+    for spec in args.rate_limit:
+        host, _, rps = spec.partition("=")
+        rate_limits[host.strip()] = float(rps)
+    for host, rps in rate_limits.items():
+        http_client.set_rate_limit(host, rps)
+
+    runner = BatchRunner(
+        openai_key=os.getenv("OPENAI_API_KEY", ""),
+        owm_key=os.getenv("OPENWEATHERMAP_API_KEY", ""),
+        with_dog=args.with_dog,
+    )
+    counts = run_batch(
+        args.input,
+        args.output,
+        args.checkpoint or f"{args.output}.checkpoint",
+        runner,
+        workers=max(1, args.workers),
+    )
+    print(json.dumps(counts, ensure_ascii=False), file=sys.stderr)
+    return 0 if counts["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+# bench/mock_upstream.py
+"""
+벤치마크용 로컬 업스트림 대체 서버.
+- OpenWeatherMap, Dog CEO, ZenQuotes, NASA APOD, OpenLibrary, OpenAI Responses API 흉내
+- 프로필별 지연(latency), 오류율, 응답 크기 조절
+- 앱은 HABIT_UPSTREAM_BASE_URL을 이 서버 주소로 두면 모든 호출이 여기로 옴
+"""
+import io
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# latency_ms: (평균, 흔들림), error_rate: 0~1, payload_kb: 긴 텍스트 필드 크기
+PROFILES = {
+    "fast": {"latency_ms": (5, 2), "error_rate": 0.0, "payload_kb": 1},
+    "typical": {"latency_ms": (120, 60), "error_rate": 0.01, "payload_kb": 4},
+    "slow": {"latency_ms": (800, 400), "error_rate": 0.02, "payload_kb": 16},
+    "flaky": {"latency_ms": (300, 250), "error_rate": 0.2, "payload_kb": 4},
+}
+
+REPORT_TEXT = """[컨디션 등급] B
+[습관 분석] 물 마시기와 수면은 잘 지켰어요. 운동은 내일 10분부터 시작해요.
+[날씨 코멘트] 선선한 날씨라 짧은 산책이 좋아요.
+[내일 미션]
+1) 물 2L 마시기
+2) 10분 스트레칭
+3) 책 5쪽 읽기
+[오늘의 한마디] 작은 반복이 큰 변화를 만든다."""
+
+
+_images: dict[int, bytes] = {}
+
+
+def _sample_jpeg(width: int) -> bytes:
+    """원본 이미지 흉내: width x (width * 3/4) 노이즈 JPEG (크기별로 한 번만 생성)"""
+    if width not in _images:
+        from PIL import Image
+
+        img = Image.effect_noise((width, width * 3 // 4), 64).convert("RGB")
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=90)
+        _images[width] = out.getvalue()
+    return _images[width]
+
+
+def _filler(kb: int) -> str:
+    sentence = "The universe is full of quiet patterns that reward patient observation. "
+    return (sentence * (kb * 1024 // len(sentence) + 1))[: kb * 1024]
+
+
+class MockUpstreamHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    profile = PROFILES["fast"]
+    stats = {"requests": 0, "errors": 0}
+    stats_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _delay(self):
+        mean, jitter = self.profile["latency_ms"]
+        time.sleep(max(0.0, random.uniform(mean - jitter, mean + jitter)) / 1000)
+
+    def _send_json(self, status: int, data):
+        body = json.dumps(data, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _maybe_fail(self) -> bool:
+        with self.stats_lock:
+            self.stats["requests"] += 1
+            failed = random.random() < self.profile["error_rate"]
+            if failed:
+                self.stats["errors"] += 1
+        if failed:
+            self._send_json(503, {"error": "injected"})
+        return failed
+
+    def do_GET(self):
+        self._delay()
+        if self._maybe_fail():
+            return
+        path = self.path.split("?", 1)[0]
+        kb = self.profile["payload_kb"]
+        if path == "/data/2.5/weather":
+            self._send_json(200, {
+                "weather": [{"description": "맑음"}],
+                "main": {"temp": 18.5, "feels_like": 17.9, "humidity": 55},
+                "wind": {"speed": 2.1},
+            })
+        elif path == "/api/breeds/image/random":
+            self._send_json(200, {"status": "success", "message": "https://images.dog.ceo/breeds/hound-afghan/n02088094_1003.jpg"})
+        elif path == "/api/today":
+            self._send_json(200, [{"q": "Well begun is half done.", "a": "Aristotle"}])
+        elif path == "/planetary/apod":
+            self._send_json(200, {"media_type": "image", "url": "https://apod.nasa.gov/apod/image/sample.jpg",
+                                  "title": "Sample Nebula", "explanation": _filler(kb)})
+        elif path.startswith("/subjects/"):
+            works = [
+                {"key": f"/works/OL{i}W", "title": f"Self Help Book {i}", "authors": [{"name": f"Author {i}"}], "cover_id": 1000 + i}
+                for i in range(30)
+            ]
+            self._send_json(200, {"works": works})
+        elif path == "/search.json":
+            docs = [
+                {"key": f"/works/OL{i}W", "title": f"Self Help Book {i}", "author_name": [f"Author {i}"],
+                 "cover_i": 1000 + i, "number_of_pages_median": 120 + i * 10}
+                for i in range(30)
+            ]
+            self._send_json(200, {"docs": docs})
+        elif re.fullmatch(r"/works/OL\d+W\.json", path):
+            self._send_json(200, {"description": {"value": _filler(kb)}})
+        elif path.endswith(".jpg"):
+            body = _sample_jpeg(2048 if "apod" in path else 1024)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        self._delay()
+        if self._maybe_fail():
+            return
+        if self.path.split("?", 1)[0] != "/v1/responses":
+            self._send_json(404, {"error": "not found"})
+            return
+        if not payload.get("stream"):
+            self._send_json(200, {"output_text": REPORT_TEXT})
+            return
+
+        # server-sent events: 줄 단위 조각 전송
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        mean, _ = self.profile["latency_ms"]
+        for line in REPORT_TEXT.splitlines(keepends=True):
+            event = {"type": "response.output_text.delta", "delta": line}
+            self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(mean / 1000 / 10)
+        self.wfile.write(b'data: {"type": "response.completed"}\n\n')
+        self.wfile.flush()
+        self.close_connection = True
+
+
+def start_mock_upstream(profile: str = "fast", port: int = 0) -> tuple[ThreadingHTTPServer, str]:
+    """백그라운드 스레드로 서버를 띄우고 (server, base_url)을 반환합니다."""
+    handler = type("ProfiledHandler", (MockUpstreamHandler,), {
+        "profile": PROFILES[profile],
+        "stats": {"requests": 0, "errors": 0},
+        "stats_lock": threading.Lock(),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -0,0 +1,160 @@
+# bench/run_bench.py
+"""
+앱 rerun / 리포트 생성 지연 벤치마크.
+- 로컬 업스트림 대체 서버(mock_upstream)를 띄우고 streamlit.testing AppTest로 app.py 실행
+- p50/p95/p99 지연과 최대 메모리(프로세스 peak RSS)를 JSON으로 저장해 커밋 간 비교
+
+사용 예:
+    python -m bench.run_bench --profile typical --reruns 30 --reports 10 -o bench_results/typical.json
+    python -m bench.run_bench --profile typical --compare bench_results/typical.json
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values: list[float], pct: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples_ms: list[float]) -> dict:
+    return {
+        "n": len(samples_ms),
+        "p50_ms": percentile(samples_ms, 50),
+        "p95_ms": percentile(samples_ms, 95),
+        "p99_ms": percentile(samples_ms, 99),
+        "max_ms": max(samples_ms) if samples_ms else None,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def _timed_run(at) -> float:
+    started = time.perf_counter()
+    at.run()
+    elapsed = (time.perf_counter() - started) * 1000
+    if at.exception:
+        raise RuntimeError(f"app raised: {at.exception[0].value}")
+    return elapsed
+
+
+def run_benchmark(profile: str, reruns: int, reports: int, stream: bool) -> dict:
+    from bench.mock_upstream import start_mock_upstream
+
+    server, base_url = start_mock_upstream(profile)
+    data_dir = tempfile.mkdtemp(prefix="habit-bench-")
+    # 앱 모듈이 import 시점에 읽는 설정이므로 AppTest 실행 전에 지정
+    os.environ.update({
+        "HABIT_UPSTREAM_BASE_URL": base_url,
+        "HABIT_DATA_DIR": data_dir,
+        "OPENAI_API_KEY": "bench",
+        "OPENWEATHERMAP_API_KEY": "bench",
+        "NASA_API_KEY": "bench",
+    })
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    from streamlit.testing.v1 import AppTest
+
+    try:
+        at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=120)
+        cold_ms = _timed_run(at)
+
+        habit_keys = ["habit_wake", "habit_water", "habit_study", "habit_workout", "habit_sleep"]
+        rerun_ms = []
+        for i in range(reruns):
+            box = at.checkbox(key=habit_keys[i % len(habit_keys)])
+            box.set_value(not box.value)
+            rerun_ms.append(_timed_run(at))
+
+        at.checkbox(key="stream_report").set_value(stream)
+        report_ms = []
+        cached_report_ms = []
+        for _ in range(reports):
+            # 새로 생성: 캐시를 건너뛰는 실제 생성 경로
+            at.button(key="report_regenerate").click()
+            report_ms.append(_timed_run(at))
+            at.button(key="report_generate").click()
+            cached_report_ms.append(_timed_run(at))
+    finally:
+        server.shutdown()
+    # Linux는 KB 단위
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    return {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "profile": profile,
+        "stream": stream,
+        "upstream": dict(server.RequestHandlerClass.stats),
+        "cold_start_ms": cold_ms,
+        "rerun": summarize(rerun_ms),
+        "report": summarize(report_ms),
+        "report_cached": summarize(cached_report_ms),
+        "peak_memory_mb": round(peak_kb / 1024, 2),
+    }
+
+
+def compare(current: dict, baseline: dict) -> list[str]:
+    lines = [f"baseline {baseline.get('commit')} → current {current.get('commit')}"]
+    for section in ("rerun", "report", "report_cached"):
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            old = (baseline.get(section) or {}).get(key)
+            new = (current.get(section) or {}).get(key)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            lines.append(f"{section:>14} {key}: {old:9.1f} → {new:9.1f} ms ({change:+.1f}%)")
+    old_mem, new_mem = baseline.get("peak_memory_mb"), current.get("peak_memory_mb")
+    if old_mem is not None and new_mem is not None:
+        lines.append(f"{'peak memory':>14}: {old_mem} → {new_mem} MB")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    from bench.mock_upstream import PROFILES
+
+    parser = argparse.ArgumentParser(description="AI 습관 트래커 rerun/리포트 지연 벤치마크")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="fast")
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--reports", type=int, default=5)
+    parser.add_argument("--no-stream", action="store_true", help="블로킹 리포트 경로 측정")
+    parser.add_argument("-o", "--output", help="결과 JSON 저장 경로")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(args.profile, args.reruns, args.reports, stream=not args.no_stream)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print("\n".join(compare(result, json.load(f))))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
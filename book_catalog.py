@@ -0,0 +1,325 @@
+# book_catalog.py
+"""
+OpenLibrary 도서 카탈로그 로컬 스냅샷.
+- 여러 주제(subject)의 작품 목록(제목/저자/표지 ID/쪽수)과 소개글을 SQLite에 저장
+- 백그라운드 스레드가 오래된 주제 목록과 빠진 소개글만 조금씩 채움
+- 메모리 색인(주제별, 짧은 책)으로 오늘의 책/기분별 추천을 네트워크 없이 고름
+"""
+import logging
+import threading
+import time
+from datetime import date, timedelta
+
+import http_client
+from db import connect
+from instrumentation import incr, set_gauge, span
+
+SUBJECTS = ("self_help", "happiness", "mindfulness", "motivation", "productivity")
+# build_book_reason과 같은 기분 구간(4 이하/8 이상)에 맞춘 추천 주제
+MOOD_SUBJECTS = {
+    "low": ("happiness", "mindfulness"),
+    "mid": ("self_help", "productivity"),
+    "high": ("motivation", "productivity"),
+}
+# 기분이 가라앉은 날은 이 쪽수 이하의 짧은 책을 우선
+SHORT_BOOK_PAGES = 220
+WORKS_PER_SUBJECT = 60
+SUBJECT_REFRESH_SEC = 7 * 24 * 60 * 60
+# 한 번 깰 때마다 소개글을 채울 작품 수
+DESCRIPTIONS_PER_TICK = 6
+TICK_SEC = 60
+# 소개글 조회가 200이 아닌 작품은 이만큼 뒤에 다시 시도 (실패할 때마다 두 배, 최대 SUBJECT_REFRESH_SEC)
+DESCRIPTION_RETRY_SEC = 60 * 60
+
+logger = logging.getLogger(__name__)
+
+
+def mood_band(mood: int | None) -> str:
+    if mood is None:
+        return "mid"
+    if mood <= 4:
+        return "low"
+    if mood >= 8:
+        return "high"
+    return "mid"
+
+
+def _cover_url(work: dict) -> str | None:
+    if work.get("cover_id"):
+        return f"https://covers.openlibrary.org/b/id/{work['cover_id']}-L.jpg"
+    if work.get("cover_edition_key"):
+        return f"https://covers.openlibrary.org/b/olid/{work['cover_edition_key']}-L.jpg"
+    return None
+
+
+class BookCatalog:
+    def __init__(self, name: str = "book_catalog"):
+        self._lock = threading.Lock()
+        self._conn = connect(f"{name}.sqlite3")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS works (
+                key TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                author TEXT,
+                cover_id INTEGER,
+                cover_edition_key TEXT,
+                pages INTEGER,
+                description TEXT
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS work_subjects (
+                subject TEXT NOT NULL,
+                rank INTEGER NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (subject, rank)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS subjects (
+                subject TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS description_failures (
+                key TEXT PRIMARY KEY,
+                failures INTEGER NOT NULL,
+                retry_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            """
+        )
+        self._by_subject: dict[str, list[dict]] = {}
+        self._short_by_subject: dict[str, list[dict]] = {}
+        self._refresher: threading.Thread | None = None
+        self._load_index()
+
+    # -----------------------------
+    # 메모리 색인 (핫패스)
+    # -----------------------------
+    def _load_index(self):
+        with self._lock:
+            works = {
+                row[0]: {
+                    "key": row[0], "title": row[1], "author": row[2], "cover_id": row[3],
+                    "cover_edition_key": row[4], "pages": row[5], "description": row[6],
+                }
+                for row in self._conn.execute(
+                    "SELECT key, title, author, cover_id, cover_edition_key, pages, description FROM works"
+                )
+            }
+            links = self._conn.execute("SELECT subject, key FROM work_subjects ORDER BY subject, rank").fetchall()
+        by_subject: dict[str, list[dict]] = {}
+        for subject, key in links:
+            if key in works:
+                by_subject.setdefault(subject, []).append(works[key])
+        short = {
+            subject: [w for w in items if w["pages"] and w["pages"] <= SHORT_BOOK_PAGES]
+            for subject, items in by_subject.items()
+        }
+        # 색인은 통째로 바꿔 끼워, 읽는 쪽은 lock 없이 봄
+        self._by_subject, self._short_by_subject = by_subject, short
+        set_gauge("catalog.works", len(works))
+
+    def ready(self) -> bool:
+        return any(self._by_subject.values())
+
+    def _pool(self, subjects: tuple[str, ...], short_only: bool) -> list[dict]:
+        index = self._short_by_subject if short_only else self._by_subject
+        pool, seen = [], set()
+        for subject in subjects:
+            for work in index.get(subject, ()):
+                if work["key"] not in seen:
+                    seen.add(work["key"])
+                    pool.append(work)
+        return pool
+
+    def _pick(self, day: date, mood: int | None) -> dict | None:
+        band = mood_band(mood)
+        subjects = MOOD_SUBJECTS[band]
+        pool = (self._pool(subjects, short_only=True) if band == "low" else []) or self._pool(subjects, False)
+        if not pool:
+            pool = self._pool(SUBJECTS, short_only=False)
+        if not pool:
+            return None
+        return pool[day.toordinal() % len(pool)]
+
+    def select(self, day: date | None = None, mood: int | None = None) -> dict | None:
+        """
+        day(기본 오늘)와 기분 구간으로 정해지는 책 (get_daily_book과 같은 형식).
+        - 메모리 색인만 보므로 네트워크/디스크 접근 없음
+        - 카탈로그가 아직 비어 있으면 None
+        """
+        work = self._pick(day or date.today(), mood)
+        if work is None:
+            return None
+        return {
+            "title": work["title"] or "알 수 없음",
+            "author": work["author"] or "알 수 없음",
+            "cover_url": _cover_url(work),
+            "short_summary": work["description"] or None,
+        }
+
+    # -----------------------------
+    # 백그라운드 갱신
+    # -----------------------------
+    def _stale_subjects(self) -> list[str]:
+        now = time.time()
+        with self._lock:
+            fetched = dict(self._conn.execute("SELECT subject, fetched_at FROM subjects").fetchall())
+        return [s for s in SUBJECTS if now - fetched.get(s, 0.0) >= SUBJECT_REFRESH_SEC]
+
+    def refresh_subject(self, subject: str) -> bool:
+        """주제별 작품 목록을 받아 저장합니다. 이미 받은 소개글은 유지"""
+        try:
+            with span("refresh.catalog.subject"):
+                r = http_client.get(
+                    "https://openlibrary.org/search.json",
+                    params={
+                        "subject": subject,
+                        "fields": "key,title,author_name,cover_i,cover_edition_key,number_of_pages_median",
+                        "limit": WORKS_PER_SUBJECT,
+                    },
+                )
+            if r.status_code != 200:
+                return False
+            docs = r.json().get("docs", [])
+        except Exception:
+            return False
+        rows = []
+        for doc in docs:
+            if not doc.get("key") or not doc.get("title"):
+                continue
+            authors = doc.get("author_name") or []
+            rows.append((
+                doc["key"], doc["title"], authors[0] if authors else None, doc.get("cover_i"),
+                doc.get("cover_edition_key"), doc.get("number_of_pages_median"),
+            ))
+        if not rows:
+            return False
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT INTO works (key, title, author, cover_id, cover_edition_key, pages)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                        title = excluded.title, author = excluded.author, cover_id = excluded.cover_id,
+                        cover_edition_key = excluded.cover_edition_key, pages = excluded.pages
+                    """,
+                    rows,
+                )
+                self._conn.execute("DELETE FROM work_subjects WHERE subject = ?", (subject,))
+                self._conn.executemany(
+                    "INSERT INTO work_subjects (subject, rank, key) VALUES (?, ?, ?)",
+                    [(subject, rank, row[0]) for rank, row in enumerate(rows)],
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO subjects (subject, fetched_at) VALUES (?, ?)", (subject, time.time())
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return True
+
+    def _description_queue(self, limit: int) -> list[str]:
+        """
+        소개글이 없는 작품 키. 오늘/내일 추천될 책을 먼저
+        - 최근 조회에 실패한 작품은 다시 시도할 때까지 빼서, 계속 실패하는 몇 개가 매번 자리를 차지하지 않음
+        """
+        with self._lock:
+            backing_off = {
+                row[0] for row in self._conn.execute(
+                    "SELECT key FROM description_failures WHERE retry_at > ?", (time.time(),)
+                )
+            }
+        upcoming = []
+        for day in (date.today(), date.today() + timedelta(days=1)):
+            for band in MOOD_SUBJECTS:
+                work = self._pick(day, {"low": 1, "mid": 6, "high": 10}[band])
+                if work and work["description"] is None and work["key"] not in backing_off | set(upcoming):
+                    upcoming.append(work["key"])
+        with self._lock:
+            rest = [
+                row[0] for row in self._conn.execute(
+                    """
+                    SELECT w.key FROM works w LEFT JOIN description_failures f ON f.key = w.key
+                    WHERE w.description IS NULL AND (f.retry_at IS NULL OR f.retry_at <= ?)
+                    ORDER BY f.failures IS NOT NULL, f.failures, w.key
+                    LIMIT ?
+                    """,
+                    (time.time(), limit + len(upcoming)),
+                )
+            ]
+        return (upcoming + [k for k in rest if k not in upcoming])[:limit]
+
+    def _record_description_failure(self, key: str):
+        with self._lock:
+            row = self._conn.execute("SELECT failures FROM description_failures WHERE key = ?", (key,)).fetchone()
+            failures = (row[0] if row else 0) + 1
+            delay = min(SUBJECT_REFRESH_SEC, DESCRIPTION_RETRY_SEC * 2 ** (failures - 1))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO description_failures (key, failures, retry_at) VALUES (?, ?, ?)",
+                (key, failures, time.time() + delay),
+            )
+        incr("catalog.description_failures")
+
+    def describe(self, key: str) -> bool:
+        try:
+            with span("refresh.catalog.description"):
+                r = http_client.get(f"https://openlibrary.org{key}.json")
+            if r.status_code != 200:
+                self._record_description_failure(key)
+                return False
+            desc = r.json().get("description")
+        except Exception:
+            return False
+        if isinstance(desc, dict):
+            desc = desc.get("value")
+        # 소개글이 없는 작품은 빈 문자열로 표시해 다시 조회하지 않음
+        with self._lock:
+            self._conn.execute(
+                "UPDATE works SET description = ? WHERE key = ?", (desc if isinstance(desc, str) else "", key)
+            )
+            self._conn.execute("DELETE FROM description_failures WHERE key = ?", (key,))
+        return True
+
+    def refresh_once(self) -> bool:
+        """오래된 주제 목록과 빠진 소개글 일부를 채우고, 바뀐 게 있으면 색인을 다시 만듭니다."""
+        changed = False
+        for subject in self._stale_subjects():
+            changed |= self.refresh_subject(subject)
+        if changed:
+            self._load_index()
+        for key in self._description_queue(DESCRIPTIONS_PER_TICK):
+            changed |= self.describe(key)
+        if changed:
+            self._load_index()
+        return changed
+
+    def start_refresh(self):
+        """갱신 스레드를 한 번만 띄움"""
+        with self._lock:
+            if self._refresher is not None:
+                return
+            self._refresher = threading.Thread(target=self._refresh_loop, daemon=True, name="catalog-refresh")
+        self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            # SQLite 오류(디스크 가득 참, 잠금 등) 한 번으로 갱신 스레드가 끝나지 않도록 기록만 하고 계속
+            try:
+                self.refresh_once()
+            except Exception:
+                incr("catalog.refresh_errors")
+                logger.exception("catalog refresh failed")
+            time.sleep(TICK_SEC)
+
+
+_catalog: BookCatalog | None = None
+_catalog_lock = threading.Lock()
+
+
+def get_book_catalog() -> BookCatalog:
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = BookCatalog()
+        return _catalog
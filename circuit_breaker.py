@@ -0,0 +1,117 @@
+# circuit_breaker.py
+"""
+업스트림 호스트별 서킷 브레이커.
+- closed: 최근 호출 결과를 창(window)에 모아 실패율이 기준을 넘으면 open
+- open: 쿨다운 동안 호출 없이 바로 실패 (CircuitOpenError)
+- half-open: 쿨다운이 지나면 시험 호출 하나만 통과, 성공하면 closed / 실패하면 다시 open
+- 상태는 프로세스 전역이라 모든 세션이 공유하고 계측 게이지로 노출
+"""
+import threading
+import time
+from collections import deque
+
+from instrumentation import incr, set_gauge
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+# 계측 게이지 값
+STATE_GAUGE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+WINDOW_SIZE = 20
+MIN_CALLS = 5
+FAILURE_RATE_THRESHOLD = 0.5
+COOLDOWN_SEC = 30.0
+
+
+class CircuitOpenError(Exception):
+    """열린 브레이커가 호출을 막았을 때"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"circuit open for {host} (retry in {retry_in:.1f}s)")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    def __init__(self, host: str, window_size: int = WINDOW_SIZE, min_calls: int = MIN_CALLS,
+                 failure_rate: float = FAILURE_RATE_THRESHOLD, cooldown_sec: float = COOLDOWN_SEC):
+        self.host = host
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.cooldown_sec = cooldown_sec
+        self.state = CLOSED
+        self._results: deque[bool] = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+        self._publish()
+
+    def _publish(self):
+        set_gauge(f"breaker.{self.host}.state", STATE_GAUGE[self.state])
+
+    def _transition(self, state: str):
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            incr(f"breaker.{self.host}.opened")
+        if state == CLOSED:
+            self._results.clear()
+        self._probing = False
+        self._publish()
+
+    def before_call(self):
+        """호출 전에 부릅니다. 막혀 있으면 CircuitOpenError"""
+        with self._lock:
+            if self.state == OPEN:
+                waited = time.monotonic() - self._opened_at
+                if waited < self.cooldown_sec:
+                    incr(f"breaker.{self.host}.rejected")
+                    raise CircuitOpenError(self.host, self.cooldown_sec - waited)
+                self._transition(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                # 시험 호출은 한 번에 하나만
+                if self._probing:
+                    incr(f"breaker.{self.host}.rejected")
+                    raise CircuitOpenError(self.host, 0.0)
+                self._probing = True
+
+    def record(self, success: bool):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._transition(CLOSED if success else OPEN)
+                return
+            if self.state == OPEN:
+                return
+            self._results.append(success)
+            if len(self._results) < self.min_calls:
+                return
+            failures = self._results.count(False)
+            if failures / len(self._results) >= self.failure_rate:
+                self._transition(OPEN)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "calls": len(self._results),
+                "failures": self._results.count(False),
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(host: str) -> CircuitBreaker:
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+def breaker_states() -> dict[str, dict]:
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {b.host: b.snapshot() for b in breakers}
@@ -0,0 +1,192 @@
+# daily_cache.py
+"""
+세션 간에 공유되는 디스크 기반 캐시.
+- 키: (source, date, params)
+- 소스별 TTL, 항목 수/바이트 상한을 넘으면 LRU 순서로 제거
+- SQLite 파일에 저장되어 서버 프로세스를 재시작해도 유지
+- 선택적으로 디코딩한 값을 메모리에 한 벌만 두고 모든 세션이 같은 객체를 참조 (읽기 전용으로 사용)
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Callable
+
+from db import connect
+
+# 소스별 TTL(초). 일일 콘텐츠는 날짜가 바뀐 뒤에도 갱신 중 보여줄 수 있도록 이틀 보관
+SOURCE_TTLS = {
+    "inspiration": 48 * 60 * 60,
+    "daily_book": 48 * 60 * 60,
+    # 프리페처가 10분마다 갱신하므로 한두 번 실패해도 비지 않을 만큼
+    "weather": 30 * 60,
+}
+DEFAULT_TTL = 60 * 60
+
+
+class DiskCache:
+    """
+    SQLite 테이블 하나를 쓰는 TTL + LRU 캐시.
+    - value는 JSON 직렬화 가능한 값만 저장
+    - hits/misses 카운터 제공
+    - memo_entries > 0이면 최근 값을 디코딩된 채로 메모리에 보관 (호출 측은 값을 수정하면 안 됨)
+    """
+
+    def __init__(self, name: str, max_entries: int = 512, max_bytes: int = 32 * 1024 * 1024,
+                 memo_entries: int = 0):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.memo_entries = memo_entries
+        self.hits = 0
+        self.misses = 0
+        self._memo: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn = connect(f"{name}.sqlite3")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed_at)")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            memo = self._memo.get(key)
+            if memo is not None and memo[0] > now:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return memo[1]
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return default
+            self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            value = json.loads(row[0])
+            self._remember(key, row[1], value)
+        return value
+
+    def _remember(self, key: str, expires_at: float, value: Any):
+        if not self.memo_entries:
+            return
+        self._memo[key] = (expires_at, value)
+        self._memo.move_to_end(key)
+        while len(self._memo) > self.memo_entries:
+            self._memo.popitem(last=False)
+
+    def set(self, key: str, value: Any, ttl: float = DEFAULT_TTL):
+        encoded = json.dumps(value, ensure_ascii=False)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded.encode("utf-8")), now + ttl, now),
+            )
+            self._memo.pop(key, None)
+            self._evict(now)
+
+    def latest(self, key_from: str, key_to: str) -> Any:
+        """
+        key_from <= key < key_to 중 가장 큰 키의 값을 만료 여부와 관계없이 반환합니다.
+        - stale-while-revalidate에서 새 값이 오기 전까지 보여줄 이전 값 조회용
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key >= ? AND key < ? ORDER BY key DESC LIMIT 1",
+                (key_from, key_to),
+            ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def delete(self, key: str):
+        with self._lock:
+            self._memo.pop(key, None)
+            self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+
+    def _evict(self, now: float):
+        # 만료 항목 먼저 제거한 뒤, 상한을 넘으면 가장 오래 안 쓴 항목부터 제거
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (now,))
+        count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        rows = self._conn.execute("SELECT key, size FROM cache ORDER BY accessed_at").fetchall()
+        victims = []
+        for key, size in rows:
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            self._memo.pop(key, None)
+            count -= 1
+            total -= size
+        self._conn.executemany("DELETE FROM cache WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache").fetchone()
+        return {"entries": count, "bytes": total, "hits": self.hits, "misses": self.misses}
+
+
+def make_key(source: str, day: str, params: dict | None = None) -> str:
+    params_part = ""
+    if params:
+        encoded = json.dumps(params, sort_keys=True, ensure_ascii=False)
+        params_part = hashlib.sha256(encoded.encode("utf-8")).hexdigest()[:16]
+    return f"{source}:{day}:{params_part}"
+
+
+_daily_cache: DiskCache | None = None
+_daily_cache_lock = threading.Lock()
+
+
+def get_daily_cache() -> DiskCache:
+    global _daily_cache
+    with _daily_cache_lock:
+        if _daily_cache is None:
+            # 일일 콘텐츠/날씨는 모든 세션이 같은 값을 읽으므로 디코딩한 값을 메모리에 공유
+            _daily_cache = DiskCache("daily_content", memo_entries=64)
+        return _daily_cache
+
+
+def get_cached(source: str, params: dict | None = None, day: date | None = None) -> Any:
+    day = day or date.today()
+    return get_daily_cache().get(make_key(source, day.isoformat(), params))
+
+
+def put_cached(source: str, value: Any, params: dict | None = None, day: date | None = None):
+    """
+    실패 결과(None)는 저장하지 않아 다른 세션이 다시 시도할 수 있게 합니다.
+    """
+    if value is None:
+        return
+    day = day or date.today()
+    ttl = SOURCE_TTLS.get(source, DEFAULT_TTL)
+    get_daily_cache().set(make_key(source, day.isoformat(), params), value, ttl)
+
+
+def get_latest_before(source: str, day: date | None = None) -> Any:
+    """
+    day 이전 날짜로 저장된 source 값 중 가장 최근 것 (만료됐어도 남아 있으면 반환).
+    - 키가 source:YYYY-MM-DD:... 형식이라 문자열 순서 = 날짜 순서
+    """
+    day = day or date.today()
+    return get_daily_cache().latest(f"{source}:", f"{source}:{day.isoformat()}")
+
+
+def get_or_fetch(source: str, fetch_fn: Callable[[], Any], params: dict | None = None) -> Any:
+    cached = get_cached(source, params)
+    if cached is not None:
+        return cached
+    value = fetch_fn()
+    put_cached(source, value, params)
+    return value
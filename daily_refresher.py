@@ -0,0 +1,130 @@
+# daily_refresher.py
+"""
+일일 콘텐츠 백그라운드 갱신 (stale-while-revalidate).
+- 작업자 스레드 하나가 프로세스 전체의 갱신을 맡아, 사용자 요청은 조회를 기다리지 않음
+- 자정 직전에 미리 가져올 수 있는 소스(날짜로 고르는 추천 도서)는 다음 날 값을 미리 저장
+- 자정 직후에는 날짜에 묶인 소스를 갱신하고, 그동안 화면에는 전날 값을 보여줌
+"""
+import queue
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Callable
+
+from daily_cache import get_cached, put_cached
+from instrumentation import incr, set_gauge, span
+
+# 자정 몇 초 전부터 다음 날 콘텐츠를 미리 가져올지
+PREFETCH_LEAD_SEC = 5 * 60
+# 실패한 갱신을 다시 시도하기까지 기다리는 시간
+RETRY_AFTER_SEC = 60
+# 스케줄러가 날짜 경계를 확인하는 주기
+TICK_SEC = 30
+
+
+class DailyRefresher:
+    """
+    fetchers: {source: (fetch_fn(day), 미리 가져오기 가능 여부)}
+    - 같은 (source, day) 갱신은 큐에 한 번만 들어감
+    """
+
+    def __init__(self, fetchers: dict[str, tuple[Callable[[date], object], bool]]):
+        self.fetchers = dict(fetchers)
+        self._queue: queue.Queue = queue.Queue()
+        self._pending: set[tuple[str, date]] = set()
+        self._failed_at: dict[tuple[str, date], float] = {}
+        self._lock = threading.Lock()
+        threading.Thread(target=self._work, daemon=True, name="daily-refresh").start()
+        threading.Thread(target=self._schedule, daemon=True, name="daily-refresh-schedule").start()
+
+    def register(self, fetchers: dict[str, tuple[Callable[[date], object], bool]]):
+        """아직 등록되지 않은 소스를 추가합니다 (이미 있는 소스는 그대로 둠)"""
+        with self._lock:
+            missing = {source: spec for source, spec in fetchers.items() if source not in self.fetchers}
+            if missing:
+                self.fetchers = {**self.fetchers, **missing}
+
+    def unregister(self, source: str):
+        """더 이상 갱신할 필요가 없는 소스를 뺍니다 (이미 큐에 들어간 갱신은 건너뜀)"""
+        with self._lock:
+            if source in self.fetchers:
+                self.fetchers = {name: spec for name, spec in self.fetchers.items() if name != source}
+
+    def request_refresh(self, source: str, day: date | None = None) -> bool:
+        """갱신을 큐에 넣습니다. 이미 대기 중이거나 최근 실패했으면 False"""
+        day = day or date.today()
+        key = (source, day)
+        with self._lock:
+            if source not in self.fetchers or key in self._pending:
+                return False
+            failed_at = self._failed_at.get(key)
+            if failed_at is not None and time.monotonic() - failed_at < RETRY_AFTER_SEC:
+                return False
+            self._pending.add(key)
+            set_gauge("refresh.pending", len(self._pending))
+        self._queue.put(key)
+        return True
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def _work(self):
+        while True:
+            source, day = self._queue.get()
+            spec = self.fetchers.get(source)
+            if spec is None:
+                with self._lock:
+                    self._pending.discard((source, day))
+                    set_gauge("refresh.pending", len(self._pending))
+                continue
+            data = None
+            try:
+                with span(f"refresh.{source}"):
+                    fetch_fn, _ = spec
+                    data = fetch_fn(day)
+            except Exception:
+                data = None
+            if data is not None:
+                put_cached(source, data, day=day)
+            else:
+                incr(f"refresh.{source}.failed")
+            with self._lock:
+                self._pending.discard((source, day))
+                if data is None:
+                    self._failed_at[(source, day)] = time.monotonic()
+                else:
+                    self._failed_at.pop((source, day), None)
+                set_gauge("refresh.pending", len(self._pending))
+
+    def _schedule(self):
+        # 첫 확인은 한 주기 뒤에: 시작 직후 조회는 처음 접속한 세션이 맡음
+        time.sleep(TICK_SEC)
+        while True:
+            now = datetime.now()
+            today = now.date()
+            tomorrow = today + timedelta(days=1)
+            until_midnight = (datetime.combine(tomorrow, datetime.min.time()) - now).total_seconds()
+            for source, (_, prefetchable) in self.fetchers.items():
+                # 오늘 값이 없으면(자정 직후 등) 바로 갱신
+                if get_cached(source, day=today) is None:
+                    self.request_refresh(source, today)
+                if prefetchable and until_midnight <= PREFETCH_LEAD_SEC and get_cached(source, day=tomorrow) is None:
+                    self.request_refresh(source, tomorrow)
+            # 자정을 넘기자마자 다시 확인하도록 대기 시간을 맞춤
+            time.sleep(max(1.0, min(TICK_SEC, until_midnight + 1.0)))
+
+
+_refresher: DailyRefresher | None = None
+_refresher_lock = threading.Lock()
+
+
+def get_daily_refresher(fetchers: dict[str, tuple[Callable[[date], object], bool]]) -> DailyRefresher:
+    """프로세스에 하나만 띄우는 갱신기. 나중 호출에서 처음 보는 소스는 추가로 등록"""
+    global _refresher
+    with _refresher_lock:
+        if _refresher is None:
+            _refresher = DailyRefresher(fetchers)
+        else:
+            _refresher.register(fetchers)
+        return _refresher
@@ -0,0 +1,35 @@
+# db.py
+"""
+앱 전역에서 공유하는 로컬 SQLite 저장소 연결 도우미.
+- 데이터 디렉터리: HABIT_DATA_DIR 환경변수 (기본 .data)
+- WAL 모드로 열어 읽기와 쓰기가 서로 막지 않도록 함
+"""
+import os
+import sqlite3
+import threading
+
+DATA_DIR = os.getenv("HABIT_DATA_DIR", ".data")
+
+_connections: dict[str, sqlite3.Connection] = {}
+_connections_lock = threading.Lock()
+
+
+def data_path(name: str) -> str:
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
+
+
+def connect(name: str) -> sqlite3.Connection:
+    """
+    이름별로 프로세스 전역 연결 하나를 재사용합니다.
+    - 여러 세션(스레드)이 공유하므로 check_same_thread=False
+    - 동시 쓰기는 호출 측에서 lock으로 직렬화
+    """
+    with _connections_lock:
+        conn = _connections.get(name)
+        if conn is None:
+            conn = sqlite3.connect(data_path(name), check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            _connections[name] = conn
+        return conn
@@ -0,0 +1,66 @@
+# fanout.py
+"""
+독립적인 외부 호출들을 동시에 실행하고, 하나의 전체 마감 시간(deadline) 안에
+끝난 결과만 모아서 돌려주는 fetch 오케스트레이터.
+"""
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable
+
+# 전체 마감 시간(초). 환경변수로 조정 가능
+DEFAULT_DEADLINE_SEC = float(os.getenv("FETCH_DEADLINE_SEC", "20"))
+
+
+def fetch_concurrently(
+    tasks: dict[str, Callable[[], Any]],
+    deadline_sec: float | None = None,
+) -> tuple[dict[str, Any], list[str]]:
+    """
+    tasks의 각 호출을 스레드 풀에서 동시에 실행합니다.
+    - deadline_sec 안에 끝난 소스의 결과만 results에 담김
+    - 마감까지 끝나지 않은 소스 이름은 missed로 반환
+    - 예외가 난 소스는 None 결과로 처리 (기존 fetcher의 실패 시 None 규칙과 동일)
+    """
+    if deadline_sec is None:
+        deadline_sec = DEFAULT_DEADLINE_SEC
+    if not tasks:
+        return {}, []
+
+    # 마감을 넘긴 호출은 백그라운드에서 끝나도록 두고 기다리지 않음
+    executor = ThreadPoolExecutor(max_workers=len(tasks), thread_name_prefix="fanout")
+    try:
+        futures = {executor.submit(fn): name for name, fn in tasks.items()}
+        done, _ = wait(futures, timeout=max(0.0, deadline_sec))
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results: dict[str, Any] = {}
+    missed: list[str] = []
+    for future, name in futures.items():
+        if future not in done:
+            missed.append(name)
+            continue
+        try:
+            results[name] = future.result()
+        except Exception:
+            results[name] = None
+    return results, missed
+
+
+class Deadline:
+    """
+    여러 단계에 걸친 호출이 하나의 예산을 나눠 쓰도록 남은 시간을 계산합니다.
+    """
+
+    def __init__(self, budget_sec: float | None = None):
+        if budget_sec is None:
+            budget_sec = DEFAULT_DEADLINE_SEC
+        self.budget_sec = budget_sec
+        self._start = time.monotonic()
+
+    def remaining(self) -> float:
+        return max(0.0, self.budget_sec - (time.monotonic() - self._start))
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
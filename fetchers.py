@@ -0,0 +1,226 @@
+# fetchers.py
+"""
+외부 API 연동 함수.
+- 실패 시 None을 반환하는 규칙은 모든 fetcher 공통
+- 네트워크 호출은 모두 http_client를 거침
+"""
+import os
+from datetime import date
+
+import http_client
+from fanout import fetch_concurrently
+from instrumentation import timed
+
+
+@timed("fetch.weather")
+def get_weather(city: str, api_key: str):
+    """
+    OpenWeatherMap에서 현재 날씨를 가져옵니다.
+    - 한국어, 섭씨
+    - 실패 시 None
+    - 호스트별 connect/read timeout + 재시도 (http_client)
+    """
+    if not api_key:
+        return None
+
+    try:
+        url = "https://api.openweathermap.org/data/2.5/weather"
+        params = {
+            "q": city,
+            "appid": api_key,
+            "units": "metric",
+            "lang": "kr",
+        }
+        r = http_client.get(url, params=params)
+        if r.status_code != 200:
+            return None
+        data = r.json()
+
+        weather_desc = None
+        if isinstance(data.get("weather"), list) and data["weather"]:
+            weather_desc = data["weather"][0].get("description")
+
+        main = data.get("main", {})
+        wind = data.get("wind", {})
+
+        return {
+            "city": city,
+            "temp_c": main.get("temp"),
+            "feels_like_c": main.get("feels_like"),
+            "humidity": main.get("humidity"),
+            "desc": weather_desc,
+            "wind_mps": wind.get("speed"),
+        }
+    except Exception:
+        return None
+
+
+@timed("fetch.dog")
+def get_dog_image():
+    """
+    Dog CEO에서 랜덤 강아지 이미지 URL과 품종을 가져옵니다.
+    - 실패 시 None
+    - 호스트별 connect/read timeout + 재시도 (http_client)
+    """
+    try:
+        url = "https://dog.ceo/api/breeds/image/random"
+        r = http_client.get(url)
+        if r.status_code != 200:
+            return None
+        data = r.json()
+        if data.get("status") != "success":
+            return None
+
+        img_url = data.get("message")
+        if not img_url or not isinstance(img_url, str):
+            return None
+
+        # 품종 추정: .../breeds/{breed}/... 또는 .../breeds/{breed-sub}/...
+        # 예: https://images.dog.ceo/breeds/hound-afghan/n02088094_1003.jpg
+        breed = "알 수 없음"
+        try:
+            parts = img_url.split("/breeds/")
+            if len(parts) > 1:
+                breed_part = parts[1].split("/")[0]  # hound-afghan
+                breed = breed_part.replace("-", " ").strip()
+        except Exception:
+            pass
+
+        return {"image_url": img_url, "breed": breed}
+    except Exception:
+        return None
+
+
+@timed("fetch.apod")
+def _fetch_apod():
+    """
+    NASA APOD 이미지/설명을 가져옵니다.
+    - NASA_API_KEY 환경변수가 없거나 실패 시 None
+    - 호스트별 connect/read timeout + 재시도 (http_client)
+    """
+    nasa_key = os.getenv("NASA_API_KEY", "").strip()
+    if not nasa_key:
+        return None
+    try:
+        url = "https://api.nasa.gov/planetary/apod"
+        params = {"api_key": nasa_key}
+        r = http_client.get(url, params=params)
+        if r.status_code != 200:
+            return None
+        data = r.json()
+        if data.get("media_type") != "image":
+            return None
+        return {
+            "image_url": data.get("url"),
+            "title": data.get("title"),
+            "description": data.get("explanation"),
+        }
+    except Exception:
+        return None
+
+
+@timed("fetch.zenquotes")
+def _fetch_zen_quote():
+    """
+    ZenQuotes에서 오늘의 명언을 가져옵니다.
+    - 실패 시 None
+    - 호스트별 connect/read timeout + 재시도 (http_client)
+    """
+    try:
+        quote_url = "https://zenquotes.io/api/today"
+        r = http_client.get(quote_url)
+        if r.status_code != 200:
+            return None
+        data = r.json()
+        if isinstance(data, list) and data:
+            return {"quote": data[0].get("q"), "author": data[0].get("a")}
+        return None
+    except Exception:
+        return None
+
+
+@timed("fetch.inspiration")
+def get_daily_inspiration(deadline_sec: float | None = None):
+    """
+    무료 공개 API로부터 오늘의 영감을 가져옵니다.
+    - ZenQuotes(quote) + NASA APOD(optional image)를 동시에 호출
+    - 마감 안에 끝난 소스만 반영
+    - 실패 시 None
+    """
+    result = {
+        "image_url": None,
+        "title": None,
+        "description": None,
+        "quote": None,
+        "author": None,
+    }
+
+    fetched, _ = fetch_concurrently(
+        {"apod": _fetch_apod, "zenquotes": _fetch_zen_quote},
+        deadline_sec,
+    )
+    for part in fetched.values():
+        if part:
+            result.update(part)
+
+    if any(value is not None for value in result.values()):
+        return result
+    return None
+
+
+@timed("fetch.book")
+def get_daily_book(day: date | None = None):
+    """
+    OpenLibrary에서 오늘(또는 day)의 추천 도서를 가져옵니다.
+    - 날짜로 목록에서 고르므로 다음 날 책을 미리 가져올 수 있음
+    - 실패 시 None
+    - 호스트별 connect/read timeout + 재시도 (http_client)
+    - 작품 상세는 목록 결과에 의존하므로 내부 두 호출은 순차 실행
+    """
+    try:
+        url = "https://openlibrary.org/subjects/self_help.json?limit=30"
+        r = http_client.get(url)
+        if r.status_code != 200:
+            return None
+        data = r.json()
+        works = data.get("works", [])
+        if not isinstance(works, list) or not works:
+            return None
+
+        idx = (day or date.today()).toordinal() % len(works)
+        work = works[idx]
+
+        title = work.get("title") or "알 수 없음"
+        author = "알 수 없음"
+        if isinstance(work.get("authors"), list) and work["authors"]:
+            author = work["authors"][0].get("name") or author
+
+        cover_url = None
+        cover_id = work.get("cover_id")
+        cover_edition = work.get("cover_edition_key")
+        if cover_id:
+            cover_url = f"https://covers.openlibrary.org/b/id/{cover_id}-L.jpg"
+        elif cover_edition:
+            cover_url = f"https://covers.openlibrary.org/b/olid/{cover_edition}-L.jpg"
+
+        short_summary = None
+        work_key = work.get("key")
+        if work_key:
+            work_url = f"https://openlibrary.org{work_key}.json"
+            wr = http_client.get(work_url)
+            if wr.status_code == 200:
+                wdata = wr.json()
+                desc = wdata.get("description")
+                if isinstance(desc, dict):
+                    short_summary = desc.get("value")
+                elif isinstance(desc, str):
+                    short_summary = desc
+
+        return {
+            "title": title,
+            "author": author,
+            "cover_url": cover_url,
+            "short_summary": short_summary,
+        }
+    except Exception:
+        return None
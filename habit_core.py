@@ -0,0 +1,124 @@
+# habit_core.py
+"""
+습관 트래커의 순수 로직 (Streamlit 의존 없음).
+- 공용 설정(습관/도시/코치 스타일/리딩 미션)
+- 체크인 요약, 책 추천 이유, 월간 달력 표 구성
+"""
+import calendar
+from datetime import date
+
+HABITS = [
+    ("🌅 기상 미션", "wake"),
+    ("💧 물 마시기", "water"),
+    ("📚 공부/독서", "study"),
+    ("🏋️ 운동하기", "workout"),
+    ("😴 수면", "sleep"),
+    ("📖 리딩 미션", "reading"),
+]
+
+cities = [
+    "Seoul", "Busan", "Incheon", "Daegu", "Daejeon",
+    "Gwangju", "Suwon", "Ulsan", "Sejong", "Jeju"
+]
+coach_styles = ["스파르타 코치", "따뜻한 멘토", "게임 마스터"]
+
+mission_options = [
+    "5쪽 읽기",
+    "10분 읽기",
+    "핵심 문장 1개 기록하기",
+    "챕터 1개 훑어보기",
+]
+
+CALENDAR_COLUMNS = ["월", "화", "수", "목", "금", "토", "일"]
+
+
+def mission_for_day(day: date) -> str:
+    return mission_options[day.toordinal() % len(mission_options)]
+
+
+def habits_state_from_flags(flags: dict) -> dict:
+    """
+    습관 key(wake, water, ...) → 완료 여부를 리포트/통계에 쓰는 한국어 이름 → 완료 여부로 바꿉니다.
+    - HABITS 순서 유지
+    """
+    return {label.split(" ", 1)[1]: bool(flags.get(key)) for label, key in HABITS}
+
+
+def summarize_checkin(habits_state: dict) -> dict:
+    """
+    체크인 요약.
+    - done: 달성 개수, total: 습관 수, rate: 달성률(%)
+    - mask: HABITS 순서대로 i번째 습관 달성 여부를 i번째 비트에
+    """
+    done = sum(1 for v in habits_state.values() if v)
+    total = len(habits_state)
+    return {
+        "done": done,
+        "total": total,
+        "rate": int(round(done / total * 100)),
+        "mask": sum(1 << i for i, v in enumerate(habits_state.values()) if v),
+    }
+
+
+def demo_history_rows(today: date) -> list[dict]:
+    """기록이 없는 사용자용 데모 6일 샘플(고정값)"""
+    demo_counts = [3, 4, 4, 2, 5, 3]   # 6개 습관 중 달성 개수
+    demo_moods = [5, 6, 7, 4, 8, 6]    # 기분 1~10
+    rows = []
+    for i in range(6, 0, -1):
+        idx = 6 - i
+        rows.append(
+            {
+                "day": date.fromordinal(today.toordinal() - i),
+                "done": int(demo_counts[idx]),
+                "rate": int(round(demo_counts[idx] / 6 * 100)),
+                "mood": int(demo_moods[idx]),
+                "habits": (1 << demo_counts[idx]) - 1,
+            }
+        )
+    return rows
+
+
+def build_book_reason(book: dict | None, mood: int, habits: dict, mission_text: str) -> str:
+    if not book:
+        return "오늘은 가볍게 몰입할 수 있는 주제로 분위기를 환기하기 좋아요."
+
+    reasons = []
+    if mood <= 4:
+        reasons.append("기분이 조금 가라앉은 날이라 부담 없는 자기돌봄 메시지가 도움이 돼요.")
+    elif mood >= 8:
+        reasons.append("에너지가 높은 날이라 실행력을 끌어올리는 메시지가 잘 맞아요.")
+    else:
+        reasons.append("무난한 컨디션이라 균형 잡힌 자기계발 주제가 어울려요.")
+
+    if habits.get("공부/독서") or habits.get("리딩 미션"):
+        reasons.append("이미 학습 흐름이 이어지고 있어, 한 챕터만 읽어도 성취감을 얻기 쉬워요.")
+    else:
+        reasons.append("짧은 미션으로 시작하면 독서 습관에 부담 없이 진입할 수 있어요.")
+
+    reasons.append(f"오늘의 미션은 '{mission_text}'로 설정했어요.")
+    return " ".join(reasons)
+
+
+def build_calendar_rows(month_history: list[dict], year: int, month: int, total_habits: int) -> list[list[str]]:
+    """
+    월간 달력 표의 행 목록(주 단위, 월요일 시작)을 만듭니다.
+    - 다른 달 날짜는 빈 칸, 기록이 있는 날은 달성 개수/기분 표시
+    """
+    calendar_map = {date.fromisoformat(row["date"]): row for row in month_history}
+    cal = calendar.Calendar(firstweekday=0)
+
+    calendar_rows = []
+    for week in cal.monthdatescalendar(year, month):
+        row = []
+        for day in week:
+            if day.month != month:
+                row.append("")
+                continue
+            entry = calendar_map.get(day)
+            if entry:
+                row.append(f"{day.day}\n✅ {entry['done']}/{total_habits}\n🙂 {entry['mood']}")
+            else:
+                row.append(str(day.day))
+        calendar_rows.append(row)
+    return calendar_rows
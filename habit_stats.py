@@ -0,0 +1,173 @@
+# habit_stats.py
+"""
+체크인이 바뀔 때마다 O(1)로 갱신되는 증분 통계.
+- 습관별 현재/최장 연속 달성(streak)
+- 7/30/90일 이동 달성률, 이동 평균 기분
+- 사용자별 인스턴스는 session_store가 메모리 상한 안에서 관리
+"""
+import threading
+from datetime import date, timedelta
+
+from history_store import get_history_store
+
+WINDOWS = (7, 30, 90)
+
+
+class HabitStats:
+    """
+    기준일(anchor, 마지막으로 기록된 날) 이전의 집계와 기준일의 행을 분리해서 유지합니다.
+    - 오늘 행이 바뀌면 오늘 몫만 교체 → O(1)
+    - 날짜가 넘어가면 오늘 행을 과거 집계에 합치고, 창 밖으로 나간 날을 뺌 (하루당 O(1))
+    """
+
+    def __init__(self, n_habits: int, row_lookup=None):
+        self.n_habits = n_habits
+        # row_lookup(day: date) -> dict | None, 창에서 빠지는 과거 행 조회용
+        self._row_lookup = row_lookup
+        self._lock = threading.Lock()
+        self.anchor: date | None = None
+        self.today_row: dict | None = None
+        self._run_prev = [0] * n_habits       # 기준일 전날까지 이어진 연속 달성
+        self._longest_prev = [0] * n_habits   # 기준일 전까지의 최장 연속 달성
+        self._past_done = {w: 0 for w in WINDOWS}
+        self._past_mood_sum = {w: 0 for w in WINDOWS}
+        self._past_mood_count = {w: 0 for w in WINDOWS}
+
+    # -----------------------------
+    # 갱신
+    # -----------------------------
+    def record(self, day: date, habits_mask: int, done: int, mood: int) -> bool:
+        """
+        day의 체크인을 반영합니다.
+        - 값이 이전과 같으면 아무것도 하지 않고 False
+        - 기준일보다 과거 날짜는 증분 갱신이 불가능하므로 False (호출 측에서 rebuild)
+        """
+        row = {"habits": int(habits_mask), "done": int(done), "mood": int(mood)}
+        with self._lock:
+            if self.anchor is not None and day < self.anchor:
+                return False
+            if self.anchor is None:
+                self.anchor = day
+            while self.anchor < day:
+                self._advance()
+            if self.today_row == row:
+                return False
+            self.today_row = row
+            return True
+
+    def _advance(self):
+        prev_row = self.today_row
+        prev_mask = prev_row["habits"] if prev_row else 0
+        for h in range(self.n_habits):
+            if prev_mask >> h & 1:
+                self._run_prev[h] += 1
+            else:
+                self._run_prev[h] = 0
+            self._longest_prev[h] = max(self._longest_prev[h], self._run_prev[h])
+
+        if prev_row:
+            for w in WINDOWS:
+                self._past_done[w] += prev_row["done"]
+                self._past_mood_sum[w] += prev_row["mood"]
+                self._past_mood_count[w] += 1
+
+        self.anchor = self.anchor + timedelta(days=1)
+        self.today_row = None
+
+        # 새 기준일 기준 창(anchor-w+1 ~ anchor)에서 빠지는 날 제거
+        if self._row_lookup is None:
+            return
+        for w in WINDOWS:
+            dropped = self._row_lookup(self.anchor - timedelta(days=w))
+            if dropped:
+                self._past_done[w] -= dropped["done"]
+                self._past_mood_sum[w] -= dropped["mood"]
+                self._past_mood_count[w] -= 1
+
+    # -----------------------------
+    # 조회
+    # -----------------------------
+    def streaks(self) -> list[tuple[int, int]]:
+        """
+        습관별 (현재 연속, 최장 연속).
+        - 오늘 아직 체크하지 않았으면 어제까지의 연속 기록을 현재 값으로 봄
+        """
+        with self._lock:
+            mask = self.today_row["habits"] if self.today_row else 0
+            result = []
+            for h in range(self.n_habits):
+                current = self._run_prev[h] + (mask >> h & 1)
+                result.append((current, max(self._longest_prev[h], current)))
+            return result
+
+    def rolling_rate(self, window: int) -> float:
+        """최근 window일(오늘 포함) 달성률(%). 기록 없는 날은 0개 달성으로 계산"""
+        with self._lock:
+            done = self._past_done[window] + (self.today_row["done"] if self.today_row else 0)
+        return done / (window * self.n_habits) * 100
+
+    def rolling_mood(self, window: int) -> float | None:
+        """최근 window일 중 기록이 있는 날의 평균 기분"""
+        with self._lock:
+            total = self._past_mood_sum[window]
+            count = self._past_mood_count[window]
+            if self.today_row:
+                total += self.today_row["mood"]
+                count += 1
+        if not count:
+            return None
+        return total / count
+
+    # -----------------------------
+    # 직렬화 (세션 저장소가 메모리에서 내릴 때)
+    # -----------------------------
+    def to_state(self) -> dict:
+        with self._lock:
+            return {
+                "anchor": self.anchor.toordinal() if self.anchor else None,
+                "today_row": self.today_row,
+                "run_prev": list(self._run_prev),
+                "longest_prev": list(self._longest_prev),
+                "past_done": [self._past_done[w] for w in WINDOWS],
+                "past_mood_sum": [self._past_mood_sum[w] for w in WINDOWS],
+                "past_mood_count": [self._past_mood_count[w] for w in WINDOWS],
+            }
+
+    @classmethod
+    def from_state(cls, state: dict, n_habits: int, row_lookup=None) -> "HabitStats":
+        stats = cls(n_habits, row_lookup)
+        stats.anchor = date.fromordinal(state["anchor"]) if state["anchor"] else None
+        stats.today_row = state["today_row"]
+        stats._run_prev = list(state["run_prev"])
+        stats._longest_prev = list(state["longest_prev"])
+        stats._past_done = dict(zip(WINDOWS, state["past_done"]))
+        stats._past_mood_sum = dict(zip(WINDOWS, state["past_mood_sum"]))
+        stats._past_mood_count = dict(zip(WINDOWS, state["past_mood_count"]))
+        return stats
+
+
+def build_stats(rows: list[dict], n_habits: int, row_lookup=None) -> HabitStats:
+    """날짜순 기록 전체로부터 집계를 한 번 재구성합니다."""
+    by_day = {date.fromisoformat(row["date"]): row for row in rows}
+    # 재구성 중에는 메모리의 행으로 창 밖 날짜를 조회하고, 끝나면 외부 조회로 교체
+    stats = HabitStats(n_habits, by_day.get)
+    for day, row in by_day.items():
+        stats.record(day, row["habits"], row["done"], row["mood"])
+    stats._row_lookup = row_lookup
+    return stats
+
+
+def history_row_lookup(user_id: str):
+    """창에서 빠지는 과거 행을 기록 저장소에서 조회하는 함수"""
+    store = get_history_store()
+
+    def row_lookup(day: date):
+        rows = store.get_range(user_id, day, day)
+        return rows[0] if rows else None
+
+    return row_lookup
+
+
+def load_stats(user_id: str, n_habits: int) -> HabitStats:
+    rows = get_history_store().get_range(user_id, date.min, date.max)
+    return build_stats(rows, n_habits, history_row_lookup(user_id))
@@ -0,0 +1,126 @@
+# history_columns.py
+"""
+체크인 기록의 압축 컬럼 표현.
+- 날짜 ordinal을 인덱스로 쓰는 배열 두 개: 습관 비트마스크(uint8) + 기분(int8)
+- 하루 2바이트, 기록 없는 날은 기분 0
+- 습관별 달성 횟수는 NumPy unpackbits 합계로 벡터화
+"""
+import threading
+from array import array
+from datetime import date
+
+import numpy as np
+
+from history_store import get_history_store
+
+
+class HabitColumns:
+    def __init__(self):
+        self.base: int | None = None   # 첫 번째 칸의 날짜 ordinal
+        self.masks = array("B")
+        self.moods = array("b")
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.masks)
+
+    @property
+    def nbytes(self) -> int:
+        return self.masks.itemsize * len(self.masks) + self.moods.itemsize * len(self.moods)
+
+    def to_bytes(self) -> bytes:
+        """base(8바이트) + masks + moods (세션 저장소가 메모리에서 내릴 때)"""
+        with self._lock:
+            base = -1 if self.base is None else self.base
+            return base.to_bytes(8, "little", signed=True) + self.masks.tobytes() + self.moods.tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "HabitColumns":
+        columns = cls()
+        base = int.from_bytes(data[:8], "little", signed=True)
+        if base >= 0:
+            n = (len(data) - 8) // 2
+            columns.base = base
+            columns.masks = array("B", data[8:8 + n])
+            columns.moods = array("b", data[8 + n:8 + 2 * n])
+        return columns
+
+    def _ensure(self, ordinal: int):
+        if self.base is None:
+            self.base = ordinal
+        if ordinal < self.base:
+            # 앞쪽으로 확장: 드문 경우(과거 가져오기)라 재할당 허용
+            pad = self.base - ordinal
+            self.masks = array("B", bytes(pad)) + self.masks
+            self.moods = array("b", bytes(pad)) + self.moods
+            self.base = ordinal
+        end = ordinal - self.base + 1
+        if end > len(self.masks):
+            pad = end - len(self.masks)
+            self.masks.frombytes(bytes(pad))
+            self.moods.frombytes(bytes(pad))
+
+    def set(self, day: date, habits_mask: int, mood: int):
+        ordinal = day.toordinal()
+        with self._lock:
+            self._ensure(ordinal)
+            idx = ordinal - self.base
+            self.masks[idx] = habits_mask
+            self.moods[idx] = mood
+
+    def get(self, day: date) -> tuple[int, int] | None:
+        """(mask, mood), 기록이 없으면 None"""
+        with self._lock:
+            if self.base is None:
+                return None
+            idx = day.toordinal() - self.base
+            if idx < 0 or idx >= len(self.moods) or not self.moods[idx]:
+                return None
+            return self.masks[idx], self.moods[idx]
+
+    def window(self, start: date, end: date) -> tuple[np.ndarray, np.ndarray]:
+        """
+        start ~ end(포함) 구간의 (masks, moods) 배열. 범위 밖 날짜는 0으로 채움.
+        """
+        n = end.toordinal() - start.toordinal() + 1
+        masks = np.zeros(max(n, 0), dtype=np.uint8)
+        moods = np.zeros(max(n, 0), dtype=np.int8)
+        with self._lock:
+            if self.base is None or n <= 0:
+                return masks, moods
+            lo = max(start.toordinal(), self.base)
+            hi = min(end.toordinal(), self.base + len(self.masks) - 1)
+            if lo <= hi:
+                src = slice(lo - self.base, hi - self.base + 1)
+                dst = slice(lo - start.toordinal(), hi - start.toordinal() + 1)
+                masks[dst] = np.frombuffer(self.masks, dtype=np.uint8)[src]
+                moods[dst] = np.frombuffer(self.moods, dtype=np.int8)[src]
+        return masks, moods
+
+    def habit_counts(self, start: date, end: date, n_habits: int) -> np.ndarray:
+        """구간 안에서 습관별 달성 일수"""
+        masks, _ = self.window(start, end)
+        bits = np.unpackbits(masks[:, None], axis=1, bitorder="little")[:, :n_habits]
+        return bits.sum(axis=0)
+
+    def done_counts(self, start: date, end: date) -> np.ndarray:
+        """구간 안에서 날짜별 달성 습관 수 (popcount)"""
+        masks, _ = self.window(start, end)
+        return np.unpackbits(masks[:, None], axis=1).sum(axis=1)
+
+
+def load_columns(user_id: str) -> HabitColumns:
+    rows = get_history_store().scan(user_id, date.min, date.max)
+    columns = HabitColumns()
+    if not rows:
+        return columns
+    # 전체 구간을 한 번에 할당한 뒤 채움
+    columns.base = rows[0][0]
+    span = rows[-1][0] - rows[0][0] + 1
+    columns.masks = array("B", bytes(span))
+    columns.moods = array("b", bytes(span))
+    for ordinal, habits_mask, mood in rows:
+        idx = ordinal - columns.base
+        columns.masks[idx] = habits_mask
+        columns.moods[idx] = mood
+    return columns
@@ -0,0 +1,341 @@
+# history_export.py
+"""
+체크인 기록 대량 내보내기/가져오기 (Arrow IPC, Parquet, CSV).
+- 형식은 확장자로 판별: .arrow/.feather(Arrow IPC 파일), .parquet, .csv
+- 내보내기: 기록 저장소를 키 기반 페이지로 읽어 RecordBatch 단위로 바로 기록 (전체를 메모리에 올리지 않음)
+- 읽기: Arrow IPC는 메모리 맵으로 열어 복사 없이(zero-copy) 컬럼을 봄, Parquet는 메모리 맵 I/O
+- 가져오기: 배치마다 upsert_many 한 번 (한 트랜잭션 + 집계 차이 갱신)
+- 날씨(도시/기온/습도/바람)는 같은 행의 선택 컬럼으로 함께 옮김
+
+사용 예:
+    python history_export.py export history.parquet [--user default]
+    python history_export.py import history.arrow [--user default]
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+import numpy as np
+
+from db import DATA_DIR
+from history_store import MAX_HABIT_BITS, get_history_store
+
+# 한 번에 읽고 쓰는 행 수 (배치 하나가 수백 KB 수준)
+BATCH_ROWS = 16384
+FORMATS = {".arrow": "arrow", ".feather": "arrow", ".parquet": "parquet", ".csv": "csv"}
+REQUIRED_COLUMNS = ("user_id", "date", "done", "rate", "mood", "habits")
+WEATHER_COLUMNS = ("city", "temp_c", "humidity", "wind_mps")
+EXPORT_DIR = os.path.join(DATA_DIR, "exports")
+# 앱에서 만든 내보내기 파일은 이 시간이 지나면 다음 내보내기 때 지움
+EXPORT_FILE_TTL_SEC = 60 * 60
+# date32(1970-01-01부터 일수) ↔ date.toordinal() 변환 차이
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def schema():
+    # pyarrow는 내보내기/가져오기를 할 때만 불러옴 (앱 콜드 스타트에 포함하지 않음)
+    import pyarrow as pa
+
+    return pa.schema([
+        ("user_id", pa.string()),
+        ("date", pa.date32()),
+        ("done", pa.int8()),
+        ("rate", pa.int8()),
+        ("mood", pa.int8()),
+        ("habits", pa.uint8() if MAX_HABIT_BITS <= 8 else pa.uint32()),
+        ("city", pa.string()),
+        ("temp_c", pa.float64()),
+        ("humidity", pa.float64()),
+        ("wind_mps", pa.float64()),
+    ])
+
+
+def format_of(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in FORMATS:
+        raise ValueError(f"지원하지 않는 형식: {ext or path} (지원: {', '.join(FORMATS)})")
+    return FORMATS[ext]
+
+
+# -----------------------------
+# 내보내기
+# -----------------------------
+def iter_export_batches(user_id: str | None = None, batch_rows: int = BATCH_ROWS):
+    """기록 저장소 전체(또는 한 사용자)를 (user_id, date) 순서의 RecordBatch로 돌려줍니다."""
+    import pyarrow as pa
+
+    store = get_history_store()
+    out_schema = schema()
+    after = None
+    while True:
+        rows = store.scan_export(after, batch_rows, user_id)
+        if not rows:
+            return
+        after = (rows[-1][0], rows[-1][1])
+        columns = list(zip(*rows))
+        columns[1] = np.asarray(columns[1], dtype=np.int32) - _EPOCH_ORDINAL
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, out_schema)],
+            schema=out_schema,
+        )
+        if len(rows) < batch_rows:
+            return
+
+
+def export_history(path: str, user_id: str | None = None, batch_rows: int = BATCH_ROWS) -> int:
+    """path 확장자 형식으로 기록을 씁니다. 쓴 행 수를 반환"""
+    import pyarrow as pa
+
+    fmt = format_of(path)
+    out_schema = schema()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    written = 0
+    if fmt == "arrow":
+        writer = pa.ipc.new_file(path, out_schema)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(path, out_schema, compression="zstd")
+    else:
+        import pyarrow.csv as pacsv
+
+        writer = pacsv.CSVWriter(path, out_schema)
+    with writer:
+        for batch in iter_export_batches(user_id, batch_rows):
+            if fmt == "parquet":
+                writer.write_batch(batch, row_group_size=batch_rows)
+            else:
+                writer.write_batch(batch)
+            written += batch.num_rows
+    return written
+
+
+def _user_tag(user_id: str | None) -> str:
+    """파일 이름에 쓸 사용자 표시. 입력 문자열을 그대로 쓰지 않고 해시 (경로 조작 방지)"""
+    if user_id is None:
+        return "all"
+    return hashlib.sha256(user_id.encode("utf-8")).hexdigest()[:16]
+
+
+def prune_export_files(max_age_sec: float = EXPORT_FILE_TTL_SEC):
+    """EXPORT_DIR에서 오래된 내보내기/업로드 임시 파일을 지웁니다."""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - max_age_sec
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            continue
+
+
+def new_export_file(user_id: str | None, fmt: str, prefix: str = "history") -> str:
+    """
+    EXPORT_DIR 아래에 겹치지 않는 빈 파일을 만들고 경로를 반환합니다 (앱 다운로드/업로드용).
+    - 이름: {prefix}_{사용자 ID 해시}_{임의 문자열}{확장자} → 같은 ID의 두 세션도 서로 덮어쓰지 않음
+    - 다 쓴 파일은 호출 측에서 지우거나 prune_export_files가 정리
+    """
+    ext = {"arrow": ".arrow", "parquet": ".parquet", "csv": ".csv"}[fmt]
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    prune_export_files()
+    with tempfile.NamedTemporaryFile(
+        dir=EXPORT_DIR, prefix=f"{prefix}_{_user_tag(user_id)}_", suffix=ext, delete=False
+    ) as f:
+        return f.name
+
+
+# -----------------------------
+# 읽기
+# -----------------------------
+def _csv_convert_options():
+    import pyarrow.csv as pacsv
+
+    # 파일에 없는 컬럼(예: 날씨)의 타입 지정은 무시됨
+    return pacsv.ConvertOptions(
+        column_types={field.name: field.type for field in schema()},
+        strings_can_be_null=True,
+    )
+
+
+def read_export(path: str):
+    """
+    내보낸 파일 전체를 pyarrow.Table로 엽니다.
+    - Arrow IPC: 메모리 맵 위의 버퍼를 그대로 씀 (복사 없음, 필요한 페이지만 OS가 읽음)
+    - Parquet: 메모리 맵으로 읽은 뒤 디코딩
+    - CSV: 스키마 타입으로 변환해 읽음
+    """
+    import pyarrow as pa
+
+    fmt = format_of(path)
+    if fmt == "arrow":
+        return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, memory_map=True)
+    import pyarrow.csv as pacsv
+
+    return pacsv.read_csv(path, convert_options=_csv_convert_options())
+
+
+def iter_file_batches(path: str, batch_rows: int = BATCH_ROWS):
+    """파일을 RecordBatch 단위로 읽습니다 (가져오기용, 전체를 한 번에 올리지 않음)."""
+    import pyarrow as pa
+
+    fmt = format_of(path)
+    if fmt == "arrow":
+        reader = pa.ipc.open_file(pa.memory_map(path, "r"))
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+    elif fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        yield from pq.ParquetFile(path, memory_map=True).iter_batches(batch_size=batch_rows)
+    else:
+        import pyarrow.csv as pacsv
+
+        yield from pacsv.open_csv(
+            path,
+            read_options=pacsv.ReadOptions(block_size=1 << 20),
+            convert_options=_csv_convert_options(),
+        )
+
+
+# -----------------------------
+# 가져오기
+# -----------------------------
+def _batch_rows(batch, user_id: str | None, as_user: str | None = None) -> tuple[list[tuple], list[tuple]]:
+    """
+    RecordBatch → (upsert_many 행, upsert_weather_many 행). 필수 컬럼이 없으면 ValueError
+    - as_user: 행의 user_id를 이 값으로 바꿔 씀
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    missing = [name for name in REQUIRED_COLUMNS if name not in batch.schema.names]
+    if missing:
+        raise ValueError(f"필수 컬럼 없음: {', '.join(missing)}")
+    if user_id is not None:
+        batch = batch.filter(pc.equal(batch.column("user_id"), user_id))
+    if batch.num_rows == 0:
+        return [], []
+    types = {field.name: field.type for field in schema()}
+    columns = {name: batch.column(name).cast(types[name]) for name in batch.schema.names if name in types}
+    if any(columns[name].null_count for name in REQUIRED_COLUMNS):
+        raise ValueError("필수 컬럼에 빈 값이 있음")
+    days = (columns["date"].cast(pa.int32()).to_numpy() + _EPOCH_ORDINAL).tolist()
+    user_ids = [as_user] * batch.num_rows if as_user is not None else columns["user_id"].to_pylist()
+    rows = list(zip(
+        user_ids, days,
+        *(columns[name].to_pylist() for name in ("done", "rate", "mood", "habits")),
+    ))
+    # 날씨 컬럼 중 하나라도 값이 있는 행만 날씨 테이블로
+    has_weather = np.zeros(batch.num_rows, dtype=bool)
+    for name in WEATHER_COLUMNS:
+        if name in columns:
+            has_weather |= columns[name].is_valid().to_numpy(zero_copy_only=False)
+    weather_rows = []
+    if has_weather.any():
+        values = [columns[name].to_pylist() if name in columns else [None] * batch.num_rows for name in WEATHER_COLUMNS]
+        weather_rows = [(user_ids[i], days[i], *(column[i] for column in values)) for i in np.flatnonzero(has_weather)]
+    return rows, weather_rows
+
+
+def file_user_ids(path: str, batch_rows: int = BATCH_ROWS) -> set[str]:
+    """파일에 들어 있는 user_id 목록"""
+    import pyarrow.compute as pc
+
+    users: set[str] = set()
+    for batch in iter_file_batches(path, batch_rows):
+        if "user_id" not in batch.schema.names:
+            raise ValueError("필수 컬럼 없음: user_id")
+        users.update(u for u in pc.unique(batch.column("user_id")).to_pylist() if u is not None)
+    return users
+
+
+def import_history(
+    path: str,
+    user_id: str | None = None,
+    batch_rows: int = BATCH_ROWS,
+    as_user: str | None = None,
+) -> dict:
+    """
+    내보낸 파일을 기록 저장소에 가져옵니다. 같은 (user_id, 날짜)는 파일 값으로 덮어씀.
+    - user_id를 주면 그 사용자 행만 가져옴
+    - as_user를 주면 (한 사용자 파일만 허용) 모든 행을 이 사용자 기록으로 가져옴
+    - 반환: {"rows": 가져온 행 수, "weather_rows": 날씨 행 수, "users": 사용자 ID 목록}
+    - 사용 중인 세션 상태는 호출 측에서 다시 만들어야 함 (session_store.replace/invalidate)
+    """
+    if as_user is not None and user_id is None and len(file_user_ids(path, batch_rows)) > 1:
+        raise ValueError("여러 사용자 기록이 든 파일은 한 사용자로 가져올 수 없음")
+    store = get_history_store()
+    imported = weather_imported = 0
+    users: set[str] = set()
+    for batch in iter_file_batches(path, batch_rows):
+        rows, weather_rows = _batch_rows(batch, user_id, as_user)
+        imported += store.upsert_many(rows)
+        store.upsert_weather_many(weather_rows)
+        weather_imported += len(weather_rows)
+        users.update(row[0] for row in rows)
+    return {"rows": imported, "weather_rows": weather_imported, "users": sorted(users)}
+
+
+def export_arrays(table, user_id: str) -> tuple[np.ndarray, np.ndarray, int, list[tuple]] | None:
+    """
+    read_export 결과에서 한 사용자의 하루 한 칸 (masks, moods, 시작 ordinal, 날씨 행)을 만듭니다.
+    - analytics.compute_analytics 입력 형식. 사용자 행이 없으면 None
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    table = table.filter(pc.equal(table["user_id"], user_id))
+    if table.num_rows == 0:
+        return None
+    days = table["date"].cast(pa.int32()).to_numpy() + _EPOCH_ORDINAL
+    start = int(days.min())
+    masks = np.zeros(int(days.max()) - start + 1, dtype=np.uint8)
+    moods = np.zeros(len(masks), dtype=np.uint8)
+    masks[days - start] = table["habits"].to_numpy()
+    moods[days - start] = table["mood"].to_numpy()
+    weather_rows = []
+    if all(name in table.column_names for name in WEATHER_COLUMNS[1:]):
+        values = np.column_stack([
+            days.astype(np.float64),
+            *(table[name].to_numpy(zero_copy_only=False).astype(np.float64) for name in WEATHER_COLUMNS[1:]),
+        ])
+        weather_rows = [tuple(row) for row in values[~np.isnan(values[:, 1:]).all(axis=1)]]
+    return masks, moods, start, weather_rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="체크인 기록을 Arrow/Parquet/CSV로 내보내거나 가져옵니다.")
+    parser.add_argument("command", choices=("export", "import"))
+    parser.add_argument("path", help="파일 경로 (.arrow/.feather/.parquet/.csv)")
+    parser.add_argument("--user", default=None, help="이 사용자 기록만 (기본: 전체)")
+    parser.add_argument("--as-user", default=None, help="import: 한 사용자 파일을 이 사용자 기록으로 가져옴")
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "export":
+            written = export_history(args.path, args.user, args.batch_rows)
+            print(f"exported {written} rows -> {args.path}", file=sys.stderr)
+        else:
+            result = import_history(args.path, args.user, args.batch_rows, as_user=args.as_user)
+            print(
+                f"imported {result['rows']} rows ({result['weather_rows']} weather) "
+                f"for {len(result['users'])} users <- {args.path}",
+                file=sys.stderr,
+            )
+    except (OSError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
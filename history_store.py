@@ -0,0 +1,374 @@
+# history_store.py
+"""
+사용자별 체크인 기록을 영구 저장하는 SQLite(WAL) 저장소.
+- (user_id, day) 기본키 B-tree → 오늘 기록 upsert는 O(log n) 키 기반 쓰기
+- 기간 범위 조회로 바 차트/월간 달력이 필요한 구간만 읽음
+- 날씨-기분 분석용으로 사용자가 고른 도시의 그날 날씨를 함께 보관
+- 주/월/연 단위 집계(rollup) 테이블을 upsert마다 차이(delta)만큼 갱신
+  → 지난 달/연간/여러 해 추이는 원본 일 단위 행 대신 집계 행 몇 개만 읽음
+"""
+import threading
+from datetime import date
+
+from db import connect
+
+# 집계 단위: W(월요일 시작 주), M(월), Y(연). 키는 구간 첫날의 ordinal
+ROLLUP_PERIODS = ("W", "M", "Y")
+# habits 비트마스크가 담을 수 있는 최대 습관 수
+MAX_HABIT_BITS = 8
+_HABIT_COLS = [f"h{i}" for i in range(MAX_HABIT_BITS)]
+
+
+def period_start(day: date, period: str) -> date:
+    if period == "W":
+        return date.fromordinal(day.toordinal() - day.weekday())
+    if period == "M":
+        return day.replace(day=1)
+    return day.replace(month=1, day=1)
+
+
+def _rollup_delta(old: tuple | None, new: tuple) -> list[int] | None:
+    """old/new: (done, mood, habits). 집계에 더할 차이 [days, mood_sum, done_sum, h0..h7], 변화 없으면 None"""
+    old_done, old_mood, old_habits = old or (0, 0, 0)
+    done, mood, habits = new
+    delta = [
+        0 if old else 1,
+        mood - old_mood,
+        done - old_done,
+        *[(habits >> i & 1) - (old_habits >> i & 1) for i in range(MAX_HABIT_BITS)],
+    ]
+    if old and not any(delta):
+        return None
+    return delta
+
+
+class HistoryStore:
+    def __init__(self, name: str = "history.sqlite3"):
+        self._lock = threading.Lock()
+        self._conn = connect(name)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS checkins (
+                user_id TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                done INTEGER NOT NULL,
+                rate INTEGER NOT NULL,
+                mood INTEGER NOT NULL,
+                habits INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day)
+            ) WITHOUT ROWID
+            """
+        )
+        # 이전 버전 파일에는 습관별 달성 비트마스크 컬럼이 없음
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(checkins)")}
+        if "habits" not in columns:
+            self._conn.execute("ALTER TABLE checkins ADD COLUMN habits INTEGER NOT NULL DEFAULT 0")
+        rollups_exist = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'rollups'"
+        ).fetchone()
+        self._conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS rollups (
+                user_id TEXT NOT NULL,
+                period TEXT NOT NULL,
+                start INTEGER NOT NULL,
+                days INTEGER NOT NULL DEFAULT 0,
+                mood_sum INTEGER NOT NULL DEFAULT 0,
+                done_sum INTEGER NOT NULL DEFAULT 0,
+                {", ".join(f"{col} INTEGER NOT NULL DEFAULT 0" for col in _HABIT_COLS)},
+                PRIMARY KEY (user_id, period, start)
+            ) WITHOUT ROWID
+            """
+        )
+        if not rollups_exist:
+            # 집계 테이블이 없던 파일: 기존 기록으로 한 번 채움
+            self._rebuild_rollups()
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS daily_weather (
+                user_id TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                city TEXT,
+                temp_c REAL,
+                humidity REAL,
+                wind_mps REAL,
+                PRIMARY KEY (user_id, day)
+            ) WITHOUT ROWID
+            """
+        )
+
+    def upsert(self, user_id: str, day: date, done: int, rate: int, mood: int, habits: int = 0):
+        """
+        habits: HABITS 순서대로 i번째 습관 달성 여부를 i번째 비트에 담은 마스크
+        - 같은 트랜잭션에서 이전 값과의 차이만큼 주/월/연 집계를 갱신
+        """
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                old = self._conn.execute(
+                    "SELECT done, mood, habits FROM checkins WHERE user_id = ? AND day = ?",
+                    (user_id, day.toordinal()),
+                ).fetchone()
+                self._conn.execute(
+                    """
+                    INSERT INTO checkins (user_id, day, done, rate, mood, habits) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (user_id, day) DO UPDATE SET
+                        done = excluded.done, rate = excluded.rate, mood = excluded.mood,
+                        habits = excluded.habits
+                    """,
+                    (user_id, day.toordinal(), int(done), int(rate), int(mood), int(habits)),
+                )
+                new = (int(done), int(mood), int(habits))
+                self._apply_rollup_delta(user_id, day, old, new)
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def upsert_many(self, rows) -> int:
+        """
+        rows: (user_id, day ordinal, done, rate, mood, habits) 튜플 묶음 (대량 가져오기용)
+        - 한 트랜잭션으로 쓰고, 바뀐 집계 구간마다 차이를 합쳐 한 번씩만 갱신
+        - 같은 (user_id, day)가 여러 번 있으면 마지막 값이 남음
+        """
+        latest = {(str(r[0]), int(r[1])): tuple(int(v) for v in r[2:6]) for r in rows}
+        if not latest:
+            return 0
+        days_by_user: dict[str, list[int]] = {}
+        for user_id, day in latest:
+            days_by_user.setdefault(user_id, []).append(day)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                old: dict[tuple, tuple] = {}
+                for user_id, days in days_by_user.items():
+                    for day, done, mood, habits in self._conn.execute(
+                        "SELECT day, done, mood, habits FROM checkins WHERE user_id = ? AND day BETWEEN ? AND ?",
+                        (user_id, min(days), max(days)),
+                    ):
+                        if (user_id, day) in latest:
+                            old[(user_id, day)] = (done, mood, habits)
+                self._conn.executemany(
+                    """
+                    INSERT INTO checkins (user_id, day, done, rate, mood, habits) VALUES (?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (user_id, day) DO UPDATE SET
+                        done = excluded.done, rate = excluded.rate, mood = excluded.mood,
+                        habits = excluded.habits
+                    """,
+                    [(*key, *values) for key, values in latest.items()],
+                )
+                totals: dict[tuple, list[int]] = {}
+                for (user_id, day), (done, _, mood, habits) in latest.items():
+                    delta = _rollup_delta(old.get((user_id, day)), (done, mood, habits))
+                    if delta is None:
+                        continue
+                    d = date.fromordinal(day)
+                    for period in ROLLUP_PERIODS:
+                        key = (user_id, period, period_start(d, period).toordinal())
+                        total = totals.setdefault(key, [0] * len(delta))
+                        for i, value in enumerate(delta):
+                            total[i] += value
+                self._add_rollups([(*key, *delta) for key, delta in totals.items() if any(delta)])
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(latest)
+
+    def _apply_rollup_delta(self, user_id: str, day: date, old: tuple | None, new: tuple):
+        """old/new: (done, mood, habits). 새로 생긴 날이면 old=None"""
+        delta = _rollup_delta(old, new)
+        if delta is None:
+            return
+        self._add_rollups(
+            [(user_id, period, period_start(day, period).toordinal(), *delta) for period in ROLLUP_PERIODS]
+        )
+
+    def _add_rollups(self, rows: list[tuple]):
+        """rows: (user_id, period, start, days, mood_sum, done_sum, h0..h7) 차이를 더함"""
+        updates = ", ".join(
+            f"{col} = {col} + excluded.{col}" for col in ["days", "mood_sum", "done_sum", *_HABIT_COLS]
+        )
+        self._conn.executemany(
+            f"""
+            INSERT INTO rollups (user_id, period, start, days, mood_sum, done_sum, {", ".join(_HABIT_COLS)})
+            VALUES (?, ?, ?, {", ".join("?" * (3 + MAX_HABIT_BITS))})
+            ON CONFLICT (user_id, period, start) DO UPDATE SET {updates}
+            """,
+            rows,
+        )
+
+    def _rebuild_rollups(self, user_id: str | None = None):
+        """원본 행으로 집계를 처음부터 다시 만듭니다 (마이그레이션/대량 가져오기 뒤)."""
+        where, args = ("WHERE user_id = ?", (user_id,)) if user_id is not None else ("", ())
+        totals: dict[tuple, list[int]] = {}
+        for uid, day, done, mood, habits in self._conn.execute(
+            f"SELECT user_id, day, done, mood, habits FROM checkins {where}", args
+        ):
+            d = date.fromordinal(day)
+            for period in ROLLUP_PERIODS:
+                row = totals.setdefault((uid, period, period_start(d, period).toordinal()), [0] * (3 + MAX_HABIT_BITS))
+                row[0] += 1
+                row[1] += mood
+                row[2] += done
+                for i in range(MAX_HABIT_BITS):
+                    row[3 + i] += habits >> i & 1
+        self._conn.execute(f"DELETE FROM rollups {where}", args)
+        self._conn.executemany(
+            f"""
+            INSERT INTO rollups (user_id, period, start, days, mood_sum, done_sum, {", ".join(_HABIT_COLS)})
+            VALUES (?, ?, ?, {", ".join("?" * (3 + MAX_HABIT_BITS))})
+            """,
+            [(*key, *row) for key, row in totals.items()],
+        )
+
+    def get_rollups(self, user_id: str, period: str, start: date, end: date, n_habits: int) -> list[dict]:
+        """
+        start ~ end 날짜가 속한 period 집계 행을 시간순으로 반환합니다.
+        - 각 행: {"start": date, "days", "mood_mean", "done_sum", "habit_counts": [습관별 달성 일수]}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT start, days, mood_sum, done_sum, {", ".join(_HABIT_COLS[:n_habits])} FROM rollups
+                WHERE user_id = ? AND period = ? AND start BETWEEN ? AND ?
+                ORDER BY start
+                """,
+                (user_id, period, period_start(start, period).toordinal(), period_start(end, period).toordinal()),
+            ).fetchall()
+        return [
+            {
+                "start": date.fromordinal(row[0]),
+                "days": row[1],
+                "mood_mean": row[2] / row[1] if row[1] else None,
+                "done_sum": row[3],
+                "habit_counts": list(row[4:]),
+            }
+            for row in rows
+            if row[1]
+        ]
+
+    def get_range(self, user_id: str, start: date, end: date) -> list[dict]:
+        """
+        start ~ end(포함) 구간의 기록을 날짜순으로 반환합니다.
+        - 각 행: {"date": "YYYY-MM-DD", "done", "rate", "mood", "habits"}
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT day, done, rate, mood, habits FROM checkins
+                WHERE user_id = ? AND day BETWEEN ? AND ?
+                ORDER BY day
+                """,
+                (user_id, start.toordinal(), end.toordinal()),
+            ).fetchall()
+        return [
+            {"date": date.fromordinal(day).isoformat(), "done": done, "rate": rate, "mood": mood, "habits": habits}
+            for day, done, rate, mood, habits in rows
+        ]
+
+    def scan(self, user_id: str, start: date, end: date) -> list[tuple[int, int, int]]:
+        """
+        dict 변환 없이 (day ordinal, habits, mood) 튜플만 날짜순으로 반환합니다.
+        - 컬럼 배열 적재처럼 행 수가 많은 경로용
+        """
+        with self._lock:
+            return self._conn.execute(
+                """
+                SELECT day, habits, mood FROM checkins
+                WHERE user_id = ? AND day BETWEEN ? AND ?
+                ORDER BY day
+                """,
+                (user_id, start.toordinal(), end.toordinal()),
+            ).fetchall()
+
+    def upsert_weather(self, user_id: str, day: date, weather: dict):
+        """get_weather 결과에서 분석에 쓰는 수치만 저장합니다."""
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO daily_weather (user_id, day, city, temp_c, humidity, wind_mps)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    user_id, day.toordinal(), weather.get("city"),
+                    weather.get("temp_c"), weather.get("humidity"), weather.get("wind_mps"),
+                ),
+            )
+
+    def scan_weather(self, user_id: str, start: date, end: date) -> list[tuple]:
+        """(day ordinal, temp_c, humidity, wind_mps) 튜플을 날짜순으로 반환합니다."""
+        with self._lock:
+            return self._conn.execute(
+                """
+                SELECT day, temp_c, humidity, wind_mps FROM daily_weather
+                WHERE user_id = ? AND day BETWEEN ? AND ?
+                ORDER BY day
+                """,
+                (user_id, start.toordinal(), end.toordinal()),
+            ).fetchall()
+
+    def upsert_weather_many(self, rows):
+        """rows: (user_id, day ordinal, city, temp_c, humidity, wind_mps) 튜플 묶음"""
+        rows = list(rows)
+        if not rows:
+            return
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    """
+                    INSERT OR REPLACE INTO daily_weather (user_id, day, city, temp_c, humidity, wind_mps)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def scan_export(self, after: tuple[str, int] | None, limit: int, user_id: str | None = None) -> list[tuple]:
+        """
+        (user_id, day) 순서로 after 다음 행부터 limit개 (키 기반 페이지 → 구간마다 짧게만 lock).
+        반환: (user_id, day ordinal, done, rate, mood, habits, city, temp_c, humidity, wind_mps)
+        """
+        where, args = [], []
+        if user_id is not None:
+            where.append("c.user_id = ?")
+            args.append(user_id)
+        if after is not None:
+            where.append("(c.user_id, c.day) > (?, ?)")
+            args += list(after)
+        with self._lock:
+            return self._conn.execute(
+                f"""
+                SELECT c.user_id, c.day, c.done, c.rate, c.mood, c.habits,
+                       w.city, w.temp_c, w.humidity, w.wind_mps
+                FROM checkins c
+                LEFT JOIN daily_weather w ON w.user_id = c.user_id AND w.day = c.day
+                {"WHERE " + " AND ".join(where) if where else ""}
+                ORDER BY c.user_id, c.day
+                LIMIT ?
+                """,
+                (*args, limit),
+            ).fetchall()
+
+    def has_history(self, user_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM checkins WHERE user_id = ? LIMIT 1", (user_id,)
+            ).fetchone()
+        return row is not None
+
+
+_history_store: HistoryStore | None = None
+_history_store_lock = threading.Lock()
+
+
+def get_history_store() -> HistoryStore:
+    global _history_store
+    with _history_store_lock:
+        if _history_store is None:
+            _history_store = HistoryStore()
+        return _history_store
@@ -0,0 +1,248 @@
+# http_client.py
+"""
+모든 외부 API 호출이 공유하는 HTTP 클라이언트 계층.
+- 호스트별 requests.Session(커넥션 풀 + keep-alive) 재사용
+- 멱등 GET은 지터가 섞인 지수 백오프로 제한 횟수만큼 재시도
+- 호스트별 (connect, read) timeout 분리
+- 호스트별 서킷 브레이커: 장애 중인 호스트는 timeout을 기다리지 않고 바로 실패
+- 같은 GET이 동시에 여러 번 오면 한 번만 보내고 결과를 나눠 가짐 (single-flight)
+- 호스트별 토큰 버킷: 한도를 넘는 호출은 잠시 줄 세우고, 대기 한도를 넘으면 버림
+"""
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from circuit_breaker import get_breaker
+from instrumentation import incr, span
+from rate_limit import RateLimitedError, TokenBucket
+
+# 호스트별 (connect, read) timeout(초)
+HOST_TIMEOUTS = {
+    "api.openweathermap.org": (3.05, 8),
+    "dog.ceo": (3.05, 5),
+    "zenquotes.io": (3.05, 8),
+    "api.nasa.gov": (3.05, 10),
+    "openlibrary.org": (3.05, 10),
+    "api.openai.com": (3.05, 30),
+}
+DEFAULT_TIMEOUT = (3.05, 10)
+
+MAX_RETRIES = 2
+BACKOFF_BASE_SEC = 0.3
+BACKOFF_MAX_SEC = 4.0
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+POOL_MAXSIZE = 16
+
+# 설정 시 모든 업스트림 요청을 이 주소(로컬 대체 서버 등)로 보냄. 원래 호스트는 X-Upstream-Host 헤더로 전달
+UPSTREAM_OVERRIDE = os.getenv("HABIT_UPSTREAM_BASE_URL", "").rstrip("/")
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+# 호스트별 기본 속도 제한: (초당 요청 수, burst, 최대 대기 초)
+# - ZenQuotes 무료 API는 30초에 5회, 넘으면 서버 IP가 한동안 차단됨
+# - OpenLibrary는 과도한 동시 호출 자제를 요청
+HOST_RATE_LIMITS = {
+    "zenquotes.io": (5 / 30, 5, 2.0),
+    "openlibrary.org": (3.0, 6, 5.0),
+}
+
+# 호스트별 호출 속도 제한 (설정된 호스트만): (버킷, 최대 대기 초 또는 None=무제한 대기)
+_rate_limits: dict[str, tuple[TokenBucket, float | None]] = {}
+
+# single-flight: 진행 중인 GET 키 → 같은 결과를 기다리는 호출들이 공유하는 항목
+_inflight: dict[str, "_Flight"] = {}
+_inflight_lock = threading.Lock()
+
+
+def set_rate_limit(host: str, rate: float, burst: float | None = None, max_wait: float | None = None):
+    """
+    host로 가는 요청을 초당 rate개(최대 burst개 몰아서)로 제한합니다.
+    - max_wait=None이면 토큰이 생길 때까지 기다림 (배치 등)
+    - max_wait초 안에 토큰을 못 얻으면 RateLimitedError로 버림
+    """
+    _rate_limits[host] = (TokenBucket(rate, burst), max_wait)
+
+
+for _host, (_rate, _burst, _max_wait) in HOST_RATE_LIMITS.items():
+    set_rate_limit(_host, _rate, _burst, _max_wait)
+
+
+def _throttle(host: str):
+    limit = _rate_limits.get(host)
+    if limit is None:
+        return
+    bucket, max_wait = limit
+    if not bucket.acquire(max_wait):
+        incr(f"http.{host}.shed")
+        raise RateLimitedError(host, max_wait or 0.0)
+
+
+class _Flight:
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response: requests.Response | None = None
+        self.error: BaseException | None = None
+
+
+def _flight_key(url: str, params: dict | None, headers: dict | None) -> str:
+    encoded = json.dumps([url, params or {}, headers or {}], sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _session_for(host: str) -> requests.Session:
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _sessions[host] = session
+        return session
+
+
+def _timeout_for(host: str, timeout: float | tuple | None) -> tuple:
+    """
+    timeout이 숫자로 주어지면 남은 마감 시간으로 보고 read timeout의 상한으로 사용합니다.
+    """
+    connect_timeout, read_timeout = HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT)
+    if timeout is None:
+        return connect_timeout, read_timeout
+    if isinstance(timeout, tuple):
+        return timeout
+    return min(connect_timeout, timeout), min(read_timeout, timeout)
+
+
+def _resolve(url: str, headers: dict | None) -> tuple[str, str, dict | None]:
+    """(원래 호스트, 실제 요청 URL, 헤더)"""
+    parts = urlsplit(url)
+    host = parts.hostname or ""
+    if not UPSTREAM_OVERRIDE:
+        return host, url, headers
+    override = urlsplit(UPSTREAM_OVERRIDE)
+    target = urlunsplit((override.scheme, override.netloc, parts.path, parts.query, parts.fragment))
+    return host, target, {**(headers or {}), "X-Upstream-Host": host}
+
+
+def _send(host: str, send_fn) -> requests.Response:
+    """
+    브레이커를 거쳐 요청 하나를 보냅니다.
+    - 브레이커가 열려 있으면 CircuitOpenError (요청 없이 즉시)
+    - 연결 오류/timeout/5xx는 실패로, 나머지 응답은 성공으로 기록
+    """
+    breaker = get_breaker(host)
+    breaker.before_call()
+    try:
+        with span(f"http.{host}"):
+            r = send_fn()
+    except BaseException:
+        breaker.record(False)
+        raise
+    breaker.record(r.status_code < 500)
+    return r
+
+
+def _backoff_delay(attempt: int, retry_after: str | None = None) -> float:
+    if retry_after:
+        try:
+            return min(BACKOFF_MAX_SEC, max(0.0, float(retry_after)))
+        except ValueError:
+            pass
+    # full jitter: [0.5, 1.5) 배 범위에서 흔들어 동시 재시도가 몰리지 않게 함
+    delay = BACKOFF_BASE_SEC * (2 ** attempt)
+    return min(BACKOFF_MAX_SEC, delay * random.uniform(0.5, 1.5))
+
+
+def get(url: str, params: dict | None = None, headers: dict | None = None,
+        timeout: float | tuple | None = None, retries: int = MAX_RETRIES, stream: bool = False) -> requests.Response:
+    """
+    멱등 GET 요청. 같은 (URL, params, headers) 요청이 진행 중이면 새로 보내지 않고 그 결과를 함께 받음.
+    - 공유된 응답은 본문이 이미 읽혀 있으므로 여러 호출자가 r.json()을 써도 됨
+    - stream=True면 본문을 읽지 않은 응답을 반환 (나눠 가질 수 없으므로 single-flight 없이, 호출 측이 닫음)
+    """
+    if stream:
+        return _get(url, params, headers, timeout, retries, stream=True)
+    key = _flight_key(url, params, headers)
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+    if not leader:
+        incr(f"http.{urlsplit(url).hostname or ''}.coalesced")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.response
+
+    try:
+        flight.response = _get(url, params, headers, timeout, retries)
+        return flight.response
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+def _get(url: str, params: dict | None, headers: dict | None,
+         timeout: float | tuple | None, retries: int, stream: bool = False) -> requests.Response:
+    """
+    single-flight 아래에서 실제로 보내는 GET.
+    - 연결 오류/timeout/재시도 대상 상태 코드면 백오프 후 재시도
+    - 재시도가 끝나면 마지막 응답을 반환하거나 마지막 예외를 다시 발생
+    - 브레이커가 열리면 남은 재시도 없이 CircuitOpenError
+    """
+    host, url, headers = _resolve(url, headers)
+    session = _session_for(host)
+    request_timeout = _timeout_for(host, timeout)
+
+    attempt = 0
+    while True:
+        _throttle(host)
+        try:
+            r = _send(
+                host,
+                lambda: session.get(url, params=params, headers=headers, timeout=request_timeout, stream=stream),
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+            incr(f"http.{host}.retries")
+            time.sleep(_backoff_delay(attempt))
+            attempt += 1
+            continue
+        if r.status_code not in RETRY_STATUSES or attempt >= retries:
+            return r
+        retry_after = r.headers.get("Retry-After")
+        r.close()
+        incr(f"http.{host}.retries")
+        time.sleep(_backoff_delay(attempt, retry_after))
+        attempt += 1
+
+
+def post(url: str, headers: dict | None = None, data: str | bytes | None = None,
+         timeout: float | tuple | None = None, stream: bool = False) -> requests.Response:
+    """
+    POST 요청. 멱등이 아니므로 재시도하지 않고 풀링된 커넥션만 재사용합니다.
+    """
+    host, url, headers = _resolve(url, headers)
+    session = _session_for(host)
+    _throttle(host)
+    return _send(
+        host,
+        lambda: session.post(url, headers=headers, data=data, timeout=_timeout_for(host, timeout), stream=stream),
+    )
@@ -0,0 +1,211 @@
+# image_cache.py
+"""
+외부 이미지 프록시 + 썸네일 디스크 캐시.
+- 원본은 한 번만 내려받고, 표시 너비로 줄여 WebP로 다시 인코딩해 저장
+- 키: (URL, 너비). 전체 바이트 상한을 넘으면 가장 오래 안 쓴 이미지부터 제거
+- 앱은 원격 URL 대신 캐시된 바이트를 st.image에 넘김 (실패하면 호출 측에서 URL로 대체)
+- 화면 그리기 중에는 내려받지 않음: 첫 요청은 백그라운드 작업자에 맡기고 이번 실행은 URL을 씀
+- 원본은 크기 상한까지만 받고, 실패/초과한 이미지는 잠시 다시 시도하지 않음(negative cache)
+"""
+import hashlib
+import io
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import http_client
+from db import connect
+from instrumentation import incr, timed
+
+MAX_BYTES = 64 * 1024 * 1024
+# wide 레이아웃의 1/3~1/2 컬럼 기준 표시 너비(px)
+DISPLAY_WIDTH = 640
+WEBP_QUALITY = 80
+# 원본이 이보다 크면 디코딩하지 않음 (APOD 원본은 수 MB~수십 MB)
+MAX_SOURCE_BYTES = 25 * 1024 * 1024
+# 내려받기/디코딩에 실패한 이미지를 다시 시도하기까지의 시간(초)
+FAILURE_TTL_SEC = 10 * 60
+FETCH_WORKERS = 2
+_CHUNK_BYTES = 64 * 1024
+
+
+class ImageCache:
+    def __init__(self, name: str = "image_cache", max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # 같은 이미지를 여러 세션이 동시에 요청해도 한 번만 내려받도록 키별 lock
+        self._key_locks: dict[str, threading.Lock] = {}
+        # 키 → 다시 시도할 수 있는 시각(monotonic)
+        self._failures: dict[str, float] = {}
+        self._pending: set[str] = set()
+        self._executor = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="image-fetch")
+        self._conn = connect(f"{name}.sqlite3")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS images (
+                key TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS images_accessed ON images (accessed_at)")
+
+    def _read(self, key: str) -> bytes | None:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM images WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("UPDATE images SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return bytes(row[0])
+
+    def _write(self, key: str, data: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO images (key, data, size, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time()),
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for victim, size in self._conn.execute("SELECT key, size FROM images ORDER BY accessed_at"):
+                if total <= self.max_bytes:
+                    break
+                victims.append((victim,))
+                total -= size
+            self._conn.executemany("DELETE FROM images WHERE key = ?", victims)
+
+    def get(self, url: str, width: int, wait: bool = True) -> bytes | None:
+        """
+        표시 너비 width로 줄인 이미지 바이트. 내려받기/디코딩 실패 시 None
+        - wait=False면 캐시에 없을 때 백그라운드 내려받기만 걸고 바로 None (화면 그리기용)
+        - 최근 실패한 이미지는 FAILURE_TTL_SEC 동안 내려받지 않고 None
+        """
+        key = hashlib.sha256(f"{width}:{url}".encode("utf-8")).hexdigest()
+        data = self._read(key)
+        if data is not None:
+            incr("image_cache.hits")
+            return data
+        if self._failed_recently(key):
+            incr("image_cache.negative_hits")
+            return None
+        if not wait:
+            self._schedule(key, url, width)
+            return None
+        return self._fill(key, url, width)
+
+    def _failed_recently(self, key: str) -> bool:
+        with self._lock:
+            retry_at = self._failures.get(key)
+            if retry_at is None:
+                return False
+            if retry_at > time.monotonic():
+                return True
+            del self._failures[key]
+            return False
+
+    def _fill(self, key: str, url: str, width: int) -> bytes | None:
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            # 기다리는 동안 다른 세션이 채웠거나 실패를 기록했을 수 있음
+            data = self._read(key)
+            if data is None and not self._failed_recently(key):
+                incr("image_cache.misses")
+                data = _fetch_thumbnail(url, width)
+                if data is not None:
+                    self._write(key, data)
+                else:
+                    with self._lock:
+                        self._failures[key] = time.monotonic() + FAILURE_TTL_SEC
+        with self._lock:
+            self._key_locks.pop(key, None)
+        return data
+
+    def _schedule(self, key: str, url: str, width: int):
+        """같은 키는 한 번만 작업자에 넘김"""
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        self._executor.submit(self._fill_in_background, key, url, width)
+
+    def _fill_in_background(self, key: str, url: str, width: int):
+        try:
+            self._fill(key, url, width)
+        finally:
+            with self._lock:
+                self._pending.discard(key)
+
+    def stats(self) -> dict:
+        with self._lock:
+            count, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images").fetchone()
+        return {"entries": count, "bytes": total}
+
+
+@timed("image.fetch")
+def _fetch_thumbnail(url: str, width: int) -> bytes | None:
+    try:
+        r = http_client.get(url, stream=True)
+    except Exception:
+        return None
+    try:
+        if r.status_code != 200:
+            return None
+        # 크기를 알려주면 받기 전에 거르고, 모르면 받으면서 상한을 넘는 순간 중단
+        length = r.headers.get("Content-Length")
+        if length and length.isdigit() and int(length) > MAX_SOURCE_BYTES:
+            incr("image_cache.oversized")
+            return None
+        raw = bytearray()
+        for chunk in r.iter_content(_CHUNK_BYTES):
+            raw += chunk
+            if len(raw) > MAX_SOURCE_BYTES:
+                incr("image_cache.oversized")
+                return None
+        return make_thumbnail(bytes(raw), width)
+    except Exception:
+        return None
+    finally:
+        r.close()
+
+
+def make_thumbnail(raw: bytes, width: int) -> bytes:
+    """원본 바이트를 width 이하로 줄여 WebP로 인코딩합니다."""
+    # Pillow는 첫 썸네일을 만들 때 import (캐시 적중만 있는 실행은 불러오지 않음)
+    from PIL import Image
+
+    with Image.open(io.BytesIO(raw)) as img:
+        # JPEG은 디코딩 단계에서 미리 축소해 큰 원본도 빠르게 처리
+        img.draft("RGB", (width, width * 4))
+        if img.mode not in ("RGB", "RGBA"):
+            img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+        if img.width > width:
+            img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+        out = io.BytesIO()
+        img.save(out, format="WEBP", quality=WEBP_QUALITY, method=4)
+    return out.getvalue()
+
+
+_image_cache: ImageCache | None = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    global _image_cache
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageCache()
+        return _image_cache
+
+
+def cached_image(url: str | None, width: int = DISPLAY_WIDTH):
+    """
+    st.image에 넘길 값: 캐시된 썸네일 바이트, 아직 없거나 실패하면 원래 URL.
+    - 렌더링을 막지 않음: 첫 요청은 백그라운드에서 썸네일을 만들어 다음 실행부터 캐시에서 씀
+    """
+    if not url:
+        return url
+    return get_image_cache().get(url, width, wait=False) or url
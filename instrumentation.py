@@ -0,0 +1,213 @@
+# instrumentation.py
+"""
+핫패스 계측: 타이밍 span을 프로세스 전역 카운터/히스토그램으로 집계합니다.
+- span(name) 컨텍스트 매니저 또는 @timed(name) 데코레이터로 측정
+- Prometheus 텍스트 포맷 / JSON lines로 내보내기
+"""
+import functools
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 히스토그램 버킷 상한(초)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Histogram:
+    __slots__ = ("count", "total", "max", "buckets", "errors")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.errors = 0
+
+    def observe(self, seconds: float, error: bool):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        if error:
+            self.errors += 1
+        for i, upper in enumerate(BUCKETS):
+            if seconds <= upper:
+                self.buckets[i] += 1
+                break
+
+    def quantile(self, q: float) -> float | None:
+        """버킷 상한 기준 근사 분위수"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for upper, n in zip(BUCKETS, self.buckets):
+            seen += n
+            if seen >= target:
+                return upper
+        return self.max
+
+
+_histograms: dict[str, _Histogram] = {}
+_counters: dict[str, float] = {}
+_gauges: dict[str, float] = {}
+_lock = threading.Lock()
+
+
+def observe(name: str, seconds: float, error: bool = False):
+    with _lock:
+        hist = _histograms.get(name)
+        if hist is None:
+            hist = _histograms[name] = _Histogram()
+        hist.observe(seconds, error)
+
+
+def incr(name: str, value: float = 1.0):
+    with _lock:
+        _counters[name] = _counters.get(name, 0.0) + value
+
+
+def set_gauge(name: str, value: float):
+    with _lock:
+        _gauges[name] = value
+
+
+@contextmanager
+def span(name: str):
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        observe(name, time.perf_counter() - started, error)
+
+
+def timed(name: str):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def timed_iter(name: str, iterator):
+    """제너레이터 전체(마지막 조각까지)를 하나의 span으로 측정"""
+    with span(name):
+        yield from iterator
+
+
+def snapshot() -> dict:
+    with _lock:
+        spans = {
+            name: {
+                "count": h.count,
+                "errors": h.errors,
+                "total_sec": h.total,
+                "mean_ms": h.total / h.count * 1000 if h.count else None,
+                "p50_ms": None if h.quantile(0.5) is None else h.quantile(0.5) * 1000,
+                "p95_ms": None if h.quantile(0.95) is None else h.quantile(0.95) * 1000,
+                "max_ms": h.max * 1000,
+                "buckets": list(h.buckets),
+            }
+            for name, h in _histograms.items()
+        }
+        return {"spans": spans, "counters": dict(_counters), "gauges": dict(_gauges)}
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _counters.clear()
+        _gauges.clear()
+
+
+def _metric_name(name: str) -> str:
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+
+def to_prometheus(prefix: str = "habit_tracker") -> str:
+    """Prometheus text exposition format (span은 histogram, 나머지는 counter/gauge)"""
+    data = snapshot()
+    lines = [
+        f"# HELP {prefix}_span_seconds Hot-path span durations.",
+        f"# TYPE {prefix}_span_seconds histogram",
+    ]
+    for name, s in sorted(data["spans"].items()):
+        label = f'span="{name}"'
+        cumulative = 0
+        for upper, n in zip(BUCKETS, s["buckets"]):
+            cumulative += n
+            lines.append(f'{prefix}_span_seconds_bucket{{{label},le="{upper}"}} {cumulative}')
+        lines.append(f'{prefix}_span_seconds_bucket{{{label},le="+Inf"}} {s["count"]}')
+        lines.append(f"{prefix}_span_seconds_sum{{{label}}} {s['total_sec']}")
+        lines.append(f"{prefix}_span_seconds_count{{{label}}} {s['count']}")
+    lines.append(f"# TYPE {prefix}_span_errors_total counter")
+    for name, s in sorted(data["spans"].items()):
+        lines.append(f'{prefix}_span_errors_total{{span="{name}"}} {s["errors"]}')
+    for name, value in sorted(data["counters"].items()):
+        metric = f"{prefix}_{_metric_name(name)}_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    for name, value in sorted(data["gauges"].items()):
+        metric = f"{prefix}_{_metric_name(name)}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def to_jsonl() -> str:
+    """span/counter/gauge마다 JSON 한 줄"""
+    data = snapshot()
+    ts = time.time()
+    lines = []
+    for name, s in sorted(data["spans"].items()):
+        lines.append(json.dumps({"ts": ts, "type": "span", "name": name, **s}))
+    for name, value in sorted(data["counters"].items()):
+        lines.append(json.dumps({"ts": ts, "type": "counter", "name": name, "value": value}))
+    for name, value in sorted(data["gauges"].items()):
+        lines.append(json.dumps({"ts": ts, "type": "gauge", "name": name, "value": value}))
+    return "\n".join(lines) + "\n"
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1"):
+    """
+    /metrics(Prometheus)와 /metrics.jsonl을 내보내는 로컬 HTTP 서버를 한 번만 띄웁니다.
+    """
+    global _server
+
+    class _Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path == "/metrics":
+                body, ctype = to_prometheus(), "text/plain; version=0.0.4"
+            elif self.path == "/metrics.jsonl":
+                body, ctype = to_jsonl(), "application/x-ndjson"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    with _server_lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port), _Handler)
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, daemon=True, name="metrics").start()
+        return _server
@@ -0,0 +1,108 @@
+# prompt_budget.py
+"""
+리포트 프롬프트의 섹션별 토큰 예산.
+- 토크나이저 없이 쓰는 로컬 토큰 수 추정 (BPE 토크나이저보다 약간 크게 잡음)
+- 예산을 넘는 긴 필드(APOD 설명, 책 소개 등)는 앞 문장부터 예산 안에서 골라 담고,
+  첫 문장부터 넘치면 단어 경계에서 자름 → 같은 입력이면 항상 같은 결과
+- 일일 콘텐츠는 모든 리포트에서 같으므로 압축 결과를 프로세스 안에서 캐시
+"""
+import os
+import re
+from functools import lru_cache
+
+# 섹션별 최대 토큰 수
+# - PROMPT_SECTION_BUDGETS="inspiration_description=80,book_summary=60" 형식으로 덮어쓰기
+# - build_report_prompts의 budgets 인자로 호출마다 바꿀 수도 있음
+SECTION_BUDGETS = {
+    "inspiration_title": 30,
+    "inspiration_description": 120,
+    "quote": 60,
+    "book_summary": 100,
+    "book_reason": 80,
+    "insights": 120,
+}
+for _spec in filter(None, os.getenv("PROMPT_SECTION_BUDGETS", "").split(",")):
+    _section, _, _budget = _spec.partition("=")
+    SECTION_BUDGETS[_section.strip()] = int(_budget)
+
+ELLIPSIS = "…"
+_SENTENCE_END = re.compile(r"(?<=[.!?。])\s+|\n+")
+_ASCII_WORD = re.compile(r"[A-Za-z0-9]+|[^\sA-Za-z0-9]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    BPE 토크나이저(cl100k/o200k)의 토큰 수를 넘지 않게 잡은 근사치.
+    - 영문/숫자: 4글자당 1토큰, 단어 수보다 적게 잡지 않음
+    - 한글 등 비ASCII 문자: 글자당 1토큰
+    """
+    if not text:
+        return 0
+    ascii_chars = 0
+    other = 0
+    for ch in text:
+        if ch.isascii():
+            if not ch.isspace():
+                ascii_chars += 1
+        else:
+            other += 1
+    ascii_pieces = sum(1 for piece in _ASCII_WORD.findall(text) if piece.isascii())
+    return max(ascii_pieces, (ascii_chars + 3) // 4) + other
+
+
+def _split_sentences(text: str) -> list[str]:
+    return [s.strip() for s in _SENTENCE_END.split(text) if s and s.strip()]
+
+
+def _truncate_words(text: str, budget: int) -> str:
+    """단어 경계에서 잘라 예산 안에 맞춤 (말줄임표 포함)"""
+    words = text.split()
+    kept: list[str] = []
+    for word in words:
+        candidate = " ".join(kept + [word]) + ELLIPSIS
+        if estimate_tokens(candidate) > budget:
+            break
+        kept.append(word)
+    if not kept:
+        # 띄어쓰기 없는 긴 문자열: 글자 단위로 자름
+        chars = ""
+        for ch in text:
+            if estimate_tokens(chars + ch + ELLIPSIS) > budget:
+                break
+            chars += ch
+        return chars + ELLIPSIS if chars else ""
+    return " ".join(kept) + ELLIPSIS
+
+
+@lru_cache(maxsize=256)
+def condense(text: str, budget: int) -> str:
+    """
+    text를 budget 토큰 이하로 줄입니다.
+    - 예산 안이면 그대로
+    - 앞에서부터 문장을 순서대로 담고, 남는 문장은 버림
+    """
+    text = text.strip()
+    if estimate_tokens(text) <= budget:
+        return text
+    kept: list[str] = []
+    used = 0
+    for sentence in _split_sentences(text):
+        cost = estimate_tokens(sentence) + (1 if kept else 0)
+        # 끝에 붙일 말줄임표 1토큰 몫을 남겨 둠
+        if used + cost + 1 > budget:
+            break
+        kept.append(sentence)
+        used += cost
+    if not kept:
+        return _truncate_words(text, budget)
+    return " ".join(kept) + ELLIPSIS
+
+
+def fit(text: str | None, section: str, budgets: dict | None = None) -> str | None:
+    """섹션 예산에 맞춘 텍스트. budgets는 기본 예산 위에 덮어씀. 예산이 정해지지 않은 섹션은 그대로 반환"""
+    if not text:
+        return text
+    budget = {**SECTION_BUDGETS, **(budgets or {})}.get(section)
+    if budget is None:
+        return text
+    return condense(str(text), int(budget))
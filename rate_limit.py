@@ -0,0 +1,55 @@
+# rate_limit.py
+"""
+업스트림별 호출 속도 제한용 토큰 버킷.
+"""
+import threading
+import time
+
+
+class RateLimitedError(Exception):
+    """대기 한도 안에 토큰을 얻지 못해 호출을 버렸을 때"""
+
+    def __init__(self, host: str, waited: float):
+        super().__init__(f"rate limited for {host} (gave up after {waited:.1f}s)")
+        self.host = host
+        self.waited = waited
+
+
+class TokenBucket:
+    """
+    초당 rate개씩 토큰이 차고 최대 burst개까지 쌓이는 버킷.
+    - acquire(timeout): 토큰이 생길 때까지 기다림, timeout 안에 못 얻으면 False
+    """
+
+    def __init__(self, rate: float, burst: float | None = None):
+        self.rate = float(rate)
+        self.burst = float(burst if burst is not None else max(1.0, rate))
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """토큰을 얻으면 0, 못 얻으면 다음 토큰까지 기다려야 할 시간(초)"""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return 0.0
+            return (1.0 - self._tokens) / self.rate
+
+    def acquire(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait_sec = self.try_acquire()
+            if wait_sec <= 0.0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0.0:
+                    return False
+                wait_sec = min(wait_sec, remaining)
+            time.sleep(wait_sec)
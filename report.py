@@ -0,0 +1,284 @@
+# report.py
+"""
+AI 코치 리포트 생성: 프롬프트 구성 + OpenAI Responses API 호출(일반/스트리밍).
+- Streamlit에 의존하지 않으므로 UI 밖(배치 등)에서도 재사용 가능
+"""
+import json
+import os
+import time
+
+import http_client
+from instrumentation import timed
+from prompt_budget import fit
+from report_cache import get_cached_report, put_cached_report, report_cache_key
+from report_stream import FIRST_TOKEN_TIMEOUT_SEC, IDLE_TIMEOUT_SEC, iter_text_deltas
+
+
+def _system_prompt_for_style(style: str) -> str:
+    if style == "스파르타 코치":
+        return (
+            "너는 매우 엄격하고 직설적인 습관 코치다. 핑계는 받아주지 않는다. "
+            "하지만 모욕적이거나 공격적이면 안 된다. 짧고 강하게, 실행 중심으로 말해라."
+        )
+    if style == "따뜻한 멘토":
+        return (
+            "너는 따뜻하고 공감적인 멘토다. 사용자의 노력과 감정을 존중하고, "
+            "작은 성공을 칭찬하며 부드럽게 다음 행동을 제안한다."
+        )
+    # 게임 마스터
+    return (
+        "너는 RPG 세계관의 게임 마스터다. 사용자의 하루를 퀘스트/스탯/버프로 묘사한다. "
+        "너무 길게 늘어놓지 말고, 재미있지만 실행 가능한 미션으로 마무리해라."
+    )
+
+
+def build_report_prompts(
+    coach_style: str,
+    habits: dict,
+    mood: int,
+    weather: dict | None,
+    dog: dict | None,
+    inspiration: dict | None,
+    book: dict | None,
+    insights: str | None = None,
+    budgets: dict | None = None,
+) -> tuple[str, str]:
+    """
+    리포트 요청에 쓸 (system prompt, user prompt)를 만듭니다.
+    - 긴 필드는 섹션별 토큰 예산에 맞춰 줄임 (prompt_budget.SECTION_BUDGETS, budgets로 덮어쓰기)
+    - insights: 장기 기록 분석 요약 (analytics.summarize_insights), 없으면 섹션 생략
+    """
+    weather_summary = "날씨 정보 없음"
+    if weather:
+        weather_summary = (
+            f"{weather.get('city')} / {weather.get('desc')} / "
+            f"{weather.get('temp_c')}°C (체감 {weather.get('feels_like_c')}°C) / "
+            f"습도 {weather.get('humidity')}% / 바람 {weather.get('wind_mps')} m/s"
+        )
+
+    dog_summary = "강아지 정보 없음"
+    if dog:
+        dog_summary = f"오늘의 강아지 품종: {dog.get('breed')}"
+
+    inspiration_summary = "오늘의 영감 정보 없음"
+    if inspiration:
+        inspiration_parts = []
+        if inspiration.get("title"):
+            inspiration_parts.append(f"제목: {fit(inspiration.get('title'), 'inspiration_title', budgets)}")
+        if inspiration.get("description"):
+            inspiration_parts.append(f"설명: {fit(inspiration.get('description'), 'inspiration_description', budgets)}")
+        if inspiration.get("quote"):
+            quote_author = inspiration.get("author") or "익명"
+            inspiration_parts.append(f"문구: \"{fit(inspiration.get('quote'), 'quote', budgets)}\" — {quote_author}")
+        if inspiration_parts:
+            inspiration_summary = " / ".join(inspiration_parts)
+
+    book_summary = "오늘의 책 정보 없음"
+    if book:
+        book_parts = [f"{book.get('title')} - {book.get('author')}"]
+        if book.get("short_summary"):
+            book_parts.append(f"요약: {fit(book.get('short_summary'), 'book_summary', budgets)}")
+        if book.get("reason"):
+            book_parts.append(f"추천 이유: {fit(book.get('reason'), 'book_reason', budgets)}")
+        book_summary = " / ".join(book_parts)
+
+    insights_section = ""
+    if insights:
+        insights_section = f"\n[장기 패턴]\n{fit(insights, 'insights', budgets)}\n"
+
+    habits_kor = "\n".join([f"- {k}: {'✅' if v else '❌'}" for k, v in habits.items()])
+    system_prompt = _system_prompt_for_style(coach_style)
+
+    # 출력 형식 고정
+    format_spec = """
+아래 형식(섹션 제목 포함)을 반드시 지켜서 한국어로 작성해.
+각 섹션은 2~5문장 정도로 간결하게.
+
+[컨디션 등급] (S/A/B/C/D 중 하나)
+[습관 분석]
+[날씨 코멘트]
+[내일 미션] (3개, 체크박스처럼 '1) ...' 형태)
+[오늘의 한마디] (한 줄)
+""".strip()
+
+    user_prompt = f"""
+오늘 체크인 데이터야.
+
+[습관]
+{habits_kor}
+
+[기분 점수] {mood}/10
+
+[날씨]
+{weather_summary}
+
+[강아지]
+{dog_summary}
+
+[오늘의 영감]
+{inspiration_summary}
+
+[오늘의 책]
+{book_summary}
+{insights_section}
+리포트에는 오늘의 영감 내용을 반드시 언급하고, 책의 주제나 메시지를 사용자의 습관/기분과 연결해줘.
+장기 패턴이 있으면 [습관 분석]에서 근거로 활용해줘.
+
+요구 출력 형식:
+{format_spec}
+""".strip()
+
+    return system_prompt, user_prompt
+
+
+# 로컬 대체 서버로 테스트할 때 OPENAI_BASE_URL로 교체
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1").rstrip("/")
+OPENAI_RESPONSES_URL = f"{OPENAI_BASE_URL}/responses"
+REPORT_MODEL = "gpt-4.1-mini"
+
+
+def _report_request(openai_key: str, system_prompt: str, user_prompt: str, stream: bool = False):
+    headers = {
+        "Authorization": f"Bearer {openai_key}",
+        "Content-Type": "application/json",
+    }
+    payload = {
+        "model": REPORT_MODEL,
+        "input": [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt},
+        ],
+    }
+    if stream:
+        payload["stream"] = True
+    return headers, json.dumps(payload)
+
+
+def _parse_report_response(data: dict) -> str | None:
+    # responses API는 output_text 또는 output 배열을 가질 수 있음
+    text = data.get("output_text")
+    if text and isinstance(text, str):
+        return text.strip()
+
+    # fallback: output 구조 파싱
+    out = data.get("output", [])
+    chunks = []
+    if isinstance(out, list):
+        for item in out:
+            content = item.get("content", [])
+            if isinstance(content, list):
+                for c in content:
+                    if c.get("type") in ("output_text", "text") and isinstance(c.get("text"), str):
+                        chunks.append(c["text"])
+    if chunks:
+        return "\n".join(chunks).strip()
+
+    return None
+
+
+@timed("report.generate")
+def generate_report(
+    openai_key: str,
+    coach_style: str,
+    habits: dict,
+    mood: int,
+    weather: dict | None,
+    dog: dict | None,
+    inspiration: dict | None,
+    book: dict | None,
+    timeout: float | None = None,
+    use_cache: bool = True,
+    insights: str | None = None,
+):
+    """
+    습관 + 기분 + 날씨 + 강아지 품종 + 영감 + 책 정보를 묶어 OpenAI에 전달해 리포트를 생성합니다.
+    - 모델: gpt-5-mini
+    - 실패 시 None
+    - timeout: 전체 마감에서 남은 시간을 넘겨받을 수 있음
+    - 같은 프롬프트의 리포트가 캐시에 있으면 바로 반환 (use_cache=False면 새로 생성)
+    """
+    if not openai_key:
+        return None
+
+    system_prompt, user_prompt = build_report_prompts(
+        coach_style, habits, mood, weather, dog, inspiration, book, insights=insights
+    )
+    cache_key = report_cache_key(system_prompt, user_prompt, REPORT_MODEL)
+    if use_cache:
+        cached = get_cached_report(cache_key)
+        if cached:
+            return cached
+
+    # OpenAI Responses API (HTTP) 사용
+    try:
+        headers, body = _report_request(openai_key, system_prompt, user_prompt)
+        r = http_client.post(OPENAI_RESPONSES_URL, headers=headers, data=body, timeout=timeout)
+        if r.status_code != 200:
+            return None
+        data = r.json()
+        # 중간에 끊긴(incomplete) 응답은 완성된 리포트로 쓰거나 캐시하지 않음
+        if data.get("status", "completed") != "completed":
+            return None
+        report = _parse_report_response(data)
+    except Exception:
+        return None
+    put_cached_report(cache_key, report)
+    return report
+
+
+def stream_report(
+    openai_key: str,
+    coach_style: str,
+    habits: dict,
+    mood: int,
+    weather: dict | None,
+    dog: dict | None,
+    inspiration: dict | None,
+    book: dict | None,
+    use_cache: bool = True,
+    insights: str | None = None,
+):
+    """
+    generate_report와 같은 프롬프트로 리포트를 스트리밍 생성합니다.
+    - 텍스트 조각을 도착하는 대로 yield
+    - 연결 실패/오류 응답이면 아무것도 yield하지 않음
+    - 첫 토큰/토큰 사이 timeout은 report_stream.StreamTimeout으로 전달
+    - response.completed 없이 끝나면 report_stream.StreamIncomplete로 전달
+    - 캐시 적중 시 전체 리포트를 한 번에 yield, response.completed까지 받은 리포트만 캐시에 저장
+    """
+    if not openai_key:
+        return
+
+    system_prompt, user_prompt = build_report_prompts(
+        coach_style, habits, mood, weather, dog, inspiration, book, insights=insights
+    )
+    cache_key = report_cache_key(system_prompt, user_prompt, REPORT_MODEL)
+    if use_cache:
+        cached = get_cached_report(cache_key)
+        if cached:
+            yield cached
+            return
+
+    headers, body = _report_request(openai_key, system_prompt, user_prompt, stream=True)
+    # 소켓 read timeout은 두 timeout 중 긴 쪽 (숫자 하나를 넘기면 스트림 내내 read timeout으로 적용되어
+    # idle timeout이 더 길게 설정돼도 그보다 먼저 끊김). 첫 토큰/idle 구분은 iter_text_deltas가 맡음
+    read_timeout = max(FIRST_TOKEN_TIMEOUT_SEC, IDLE_TIMEOUT_SEC)
+    started = time.monotonic()
+    try:
+        r = http_client.post(
+            OPENAI_RESPONSES_URL, headers=headers, data=body,
+            timeout=(http_client.DEFAULT_TIMEOUT[0], read_timeout), stream=True,
+        )
+    except Exception:
+        return
+    if r.status_code != 200:
+        r.close()
+        return
+    parts = []
+    # StreamTimeout/StreamIncomplete는 그대로 올려보내므로 끊긴 리포트는 아래 저장에 닿지 않음
+    # 응답 헤더를 기다린 시간도 첫 토큰 timeout에 포함
+    first_token_timeout = max(0.0, FIRST_TOKEN_TIMEOUT_SEC - (time.monotonic() - started))
+    for delta in iter_text_deltas(r, first_token_timeout=first_token_timeout):
+        parts.append(delta)
+        yield delta
+    put_cached_report(cache_key, "".join(parts).strip())
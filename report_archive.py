@@ -0,0 +1,262 @@
+# report_archive.py
+"""
+생성된 코치 리포트 보관소 (SQLite FTS5 역색인).
+- 리포트 본문과 입력값(습관/기분/코치 스타일/날씨/책)을 함께 영구 저장
+- 본문/미션/책 제목/도시를 FTS5로 색인 → 수년치 리포트도 검색어로 바로 찾음
+  (한국어 조사가 붙은 단어도 찾도록 검색어마다 접두어 검색, 2~3글자 접두어 색인)
+- "[내일 미션]" 항목은 (user_id, 날짜, 순번) 키 테이블에 따로 저장
+  → 어제 미션은 키 조회 한 번으로 가져오고, 완료 여부도 여기 기록
+"""
+import json
+import re
+import threading
+import time
+from datetime import date, timedelta
+
+from db import connect
+from instrumentation import span
+
+MISSION_HEADER = "[내일 미션]"
+SEARCH_LIMIT = 20
+# 검색 결과 발췌 길이(토큰 수)
+SNIPPET_TOKENS = 16
+
+_HEADER_LINE = re.compile(r"^\s*(?:#+\s*)?\[[^\]]+\]")
+_MISSION_ITEM = re.compile(r"^\s*(?:\d+\s*[).:]|[-*•]|☐|\[ \])\s*(.+?)\s*$")
+_SEARCH_TERM = re.compile(r"\w+")
+
+
+def parse_missions(report: str | None) -> list[str]:
+    """리포트의 [내일 미션] 섹션에서 '1) ...' / '- ...' 형태 항목을 순서대로 뽑습니다."""
+    if not report:
+        return []
+    missions = []
+    in_section = False
+    for line in report.splitlines():
+        # 굵게 표시(**)는 항목 기호로 오인하지 않도록 먼저 제거
+        line = line.replace("**", "")
+        if MISSION_HEADER in line:
+            in_section = True
+            # 헤더와 같은 줄에 첫 항목이 있는 경우
+            line = line.split(MISSION_HEADER, 1)[1]
+        elif _HEADER_LINE.match(line):
+            if in_section:
+                break
+            continue
+        if not in_section:
+            continue
+        match = _MISSION_ITEM.match(line)
+        if match:
+            text = match.group(1).strip()
+            if text:
+                missions.append(text)
+    return missions
+
+
+def fts_query(text: str) -> str | None:
+    """사용자 검색어 → FTS5 MATCH 식. 단어마다 접두어 검색, 모든 단어 포함(AND)"""
+    terms = _SEARCH_TERM.findall(text or "")
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+
+class ReportArchive:
+    def __init__(self, name: str = "report_archive.sqlite3"):
+        self._lock = threading.Lock()
+        self._conn = connect(name)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS reports (
+                id INTEGER PRIMARY KEY,
+                user_id TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                coach_style TEXT,
+                mood INTEGER,
+                habits TEXT,
+                city TEXT,
+                weather TEXT,
+                book TEXT,
+                book_title TEXT,
+                missions TEXT,
+                report TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS reports_user_day ON reports (user_id, day);
+            CREATE VIRTUAL TABLE IF NOT EXISTS reports_fts USING fts5(
+                report, missions, book_title, city,
+                content = 'reports', content_rowid = 'id',
+                tokenize = 'unicode61', prefix = '2 3'
+            );
+            CREATE TRIGGER IF NOT EXISTS reports_ai AFTER INSERT ON reports BEGIN
+                INSERT INTO reports_fts (rowid, report, missions, book_title, city)
+                VALUES (new.id, new.report, new.missions, new.book_title, new.city);
+            END;
+            CREATE TRIGGER IF NOT EXISTS reports_ad AFTER DELETE ON reports BEGIN
+                INSERT INTO reports_fts (reports_fts, rowid, report, missions, book_title, city)
+                VALUES ('delete', old.id, old.report, old.missions, old.book_title, old.city);
+            END;
+            CREATE TABLE IF NOT EXISTS missions (
+                user_id TEXT NOT NULL,
+                day INTEGER NOT NULL,
+                idx INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                done INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (user_id, day, idx)
+            ) WITHOUT ROWID;
+            """
+        )
+
+    def archive(
+        self,
+        user_id: str,
+        day: date,
+        report: str,
+        coach_style: str | None = None,
+        mood: int | None = None,
+        habits: dict | None = None,
+        city: str | None = None,
+        weather: dict | None = None,
+        book: dict | None = None,
+    ) -> int | None:
+        """
+        리포트와 입력값을 저장합니다. 같은 날 마지막 리포트와 본문이 같으면 저장하지 않음 (None).
+        - 그날의 [내일 미션]은 가장 최근 리포트 기준으로 교체 (이미 표시한 완료 여부는 같은 문구면 유지)
+        """
+        report = report.strip()
+        if not report:
+            return None
+        missions = parse_missions(report)
+        with self._lock:
+            last = self._conn.execute(
+                "SELECT report FROM reports WHERE user_id = ? AND day = ? ORDER BY id DESC LIMIT 1",
+                (user_id, day.toordinal()),
+            ).fetchone()
+            if last and last[0] == report:
+                return None
+            self._conn.execute("BEGIN")
+            try:
+                cur = self._conn.execute(
+                    """
+                    INSERT INTO reports (user_id, day, created_at, coach_style, mood, habits, city, weather, book,
+                                         book_title, missions, report)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        user_id, day.toordinal(), time.time(), coach_style, mood,
+                        json.dumps(habits, ensure_ascii=False) if habits is not None else None,
+                        city,
+                        json.dumps(weather, ensure_ascii=False) if weather else None,
+                        json.dumps(book, ensure_ascii=False) if book else None,
+                        " - ".join(filter(None, [(book or {}).get("title"), (book or {}).get("author")])) or None,
+                        "\n".join(missions),
+                        report,
+                    ),
+                )
+                done = {
+                    text for (text,) in self._conn.execute(
+                        "SELECT text FROM missions WHERE user_id = ? AND day = ? AND done = 1",
+                        (user_id, day.toordinal()),
+                    )
+                }
+                self._conn.execute("DELETE FROM missions WHERE user_id = ? AND day = ?", (user_id, day.toordinal()))
+                self._conn.executemany(
+                    "INSERT INTO missions (user_id, day, idx, text, done) VALUES (?, ?, ?, ?, ?)",
+                    [(user_id, day.toordinal(), i, text, int(text in done)) for i, text in enumerate(missions)],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return cur.lastrowid
+
+    def missions_for(self, user_id: str, day: date) -> list[dict]:
+        """day에 만든 리포트의 [내일 미션] 항목 (키 조회). [{"idx", "text", "done"}]"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT idx, text, done FROM missions WHERE user_id = ? AND day = ? ORDER BY idx",
+                (user_id, day.toordinal()),
+            ).fetchall()
+        return [{"idx": idx, "text": text, "done": bool(done)} for idx, text, done in rows]
+
+    def yesterdays_missions(self, user_id: str, today: date | None = None) -> list[dict]:
+        """어제 리포트가 오늘 하라고 한 미션"""
+        return self.missions_for(user_id, (today or date.today()) - timedelta(days=1))
+
+    def set_mission_done(self, user_id: str, day: date, idx: int, done: bool):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE missions SET done = ? WHERE user_id = ? AND day = ? AND idx = ?",
+                (int(done), user_id, day.toordinal(), idx),
+            )
+
+    def search(self, user_id: str, query: str, limit: int = SEARCH_LIMIT) -> list[dict]:
+        """
+        사용자의 리포트를 검색어로 찾습니다 (관련도순, 같으면 최근 날짜 먼저).
+        - snippet: 검색어 주변 발췌, 일치 부분은 **굵게**
+        """
+        match = fts_query(query)
+        if match is None:
+            return []
+        with span("archive.search"), self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT r.id, r.day, r.coach_style, r.mood, r.city, r.book_title, r.report,
+                       snippet(reports_fts, -1, '**', '**', '…', {SNIPPET_TOKENS})
+                FROM reports_fts
+                JOIN reports r ON r.id = reports_fts.rowid
+                WHERE reports_fts MATCH ? AND r.user_id = ?
+                ORDER BY bm25(reports_fts), r.day DESC
+                LIMIT ?
+                """,
+                (match, user_id, limit),
+            ).fetchall()
+        return [
+            {
+                "id": rid, "date": date.fromordinal(day), "coach_style": coach_style, "mood": mood,
+                "city": city, "book_title": book_title, "report": report, "snippet": " ".join(snippet.split()),
+            }
+            for rid, day, coach_style, mood, city, book_title, report, snippet in rows
+        ]
+
+    def get(self, report_id: int) -> dict | None:
+        """저장된 리포트 한 건과 입력값"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT user_id, day, created_at, coach_style, mood, habits, city, weather, book, report
+                FROM reports WHERE id = ?
+                """,
+                (report_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        user_id, day, created_at, coach_style, mood, habits, city, weather, book, report = row
+        return {
+            "user_id": user_id,
+            "date": date.fromordinal(day),
+            "created_at": created_at,
+            "coach_style": coach_style,
+            "mood": mood,
+            "habits": json.loads(habits) if habits else None,
+            "city": city,
+            "weather": json.loads(weather) if weather else None,
+            "book": json.loads(book) if book else None,
+            "report": report,
+        }
+
+    def count(self, user_id: str) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reports WHERE user_id = ?", (user_id,)).fetchone()[0]
+
+
+_archive: ReportArchive | None = None
+_archive_lock = threading.Lock()
+
+
+def get_report_archive() -> ReportArchive:
+    global _archive
+    with _archive_lock:
+        if _archive is None:
+            _archive = ReportArchive()
+        return _archive
@@ -0,0 +1,43 @@
+# report_cache.py
+"""
+생성된 코치 리포트를 프롬프트 내용 기준으로 재사용하는 캐시.
+- 키: (model, system prompt, user prompt)의 SHA-256
+- 로컬 SQLite에 TTL + LRU로 저장, hit/miss 카운터 제공
+"""
+import hashlib
+import os
+import threading
+
+from daily_cache import DiskCache
+
+REPORT_CACHE_TTL_SEC = float(os.getenv("REPORT_CACHE_TTL_SEC", str(12 * 60 * 60)))
+REPORT_CACHE_MAX_ENTRIES = int(os.getenv("REPORT_CACHE_MAX_ENTRIES", "1000"))
+
+_report_cache: DiskCache | None = None
+_report_cache_lock = threading.Lock()
+
+
+def get_report_cache() -> DiskCache:
+    global _report_cache
+    with _report_cache_lock:
+        if _report_cache is None:
+            _report_cache = DiskCache("report_cache", max_entries=REPORT_CACHE_MAX_ENTRIES)
+        return _report_cache
+
+
+def report_cache_key(system_prompt: str, user_prompt: str, model: str) -> str:
+    h = hashlib.sha256()
+    for part in (model, system_prompt, user_prompt):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def get_cached_report(key: str) -> str | None:
+    return get_report_cache().get(key)
+
+
+def put_cached_report(key: str, report: str | None):
+    if not report:
+        return
+    get_report_cache().set(key, report, REPORT_CACHE_TTL_SEC)
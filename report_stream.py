@@ -0,0 +1,128 @@
+# report_stream.py
+"""
+OpenAI Responses API의 server-sent event 스트림을 텍스트 조각으로 읽어옵니다.
+- 첫 토큰까지의 timeout과 토큰 사이 공백(idle) timeout을 따로 적용
+- 소켓 읽기는 별도 스레드에서 하고, 소비 측은 큐에서 timeout을 걸고 기다림
+- response.completed를 받지 못하고 끝난 스트림(실패/중단/연결 오류)은 StreamIncomplete
+"""
+import json
+import os
+import queue
+import threading
+from typing import Iterator
+
+FIRST_TOKEN_TIMEOUT_SEC = float(os.getenv("REPORT_FIRST_TOKEN_TIMEOUT_SEC", "15"))
+IDLE_TIMEOUT_SEC = float(os.getenv("REPORT_IDLE_TIMEOUT_SEC", "10"))
+
+# 한 번에 읽는 최대 바이트 (도착한 만큼만 읽으므로 작은 이벤트도 바로 전달)
+_READ_BYTES = 8192
+
+_DONE = object()
+
+
+class StreamTimeout(Exception):
+    pass
+
+
+class StreamIncomplete(Exception):
+    """response.completed 없이 스트림이 끝남. 메시지는 종료 상태 (response.incomplete 등)"""
+
+
+def _iter_chunks(response) -> Iterator[bytes]:
+    """
+    소켓에 도착한 바이트를 기다리지 않고 바로 돌려줍니다.
+    - iter_content(chunk_size=None)은 chunked가 아닌 응답(Content-Length 없이 연결 종료로 끝나는 SSE)에서
+      스트림이 끝날 때까지 모아서 한 번에 돌려주므로, 가능하면 urllib3의 read1을 사용
+    """
+    read1 = getattr(getattr(response, "raw", None), "read1", None)
+    if read1 is None:
+        yield from response.iter_content(chunk_size=None)
+        return
+    while True:
+        chunk = read1(_READ_BYTES, decode_content=True)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _iter_sse_lines(response) -> Iterator[str]:
+    """
+    바이트 스트림을 b"\n"에서만 나누고 줄마다 UTF-8로 디코딩합니다.
+    - SSE는 항상 UTF-8이므로 Content-Type에 charset이 없어도 ISO-8859-1로 읽지 않음
+    - str.splitlines처럼 \x85, \u2028 같은 문자에서 줄을 나누지 않음
+    """
+    buffer = b""
+    for chunk in _iter_chunks(response):
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.rstrip(b"\r").decode("utf-8", errors="replace")
+    if buffer:
+        yield buffer.rstrip(b"\r").decode("utf-8", errors="replace")
+
+
+def _iter_sse_events(response) -> Iterator[dict]:
+    """'data: {...}' 줄을 이벤트 dict로 변환합니다. 빈 줄/주석/[DONE]은 건너뜀"""
+    for raw in _iter_sse_lines(response):
+        if not raw or not raw.startswith("data:"):
+            continue
+        data = raw[len("data:"):].strip()
+        if data == "[DONE]":
+            return
+        try:
+            yield json.loads(data)
+        except ValueError:
+            continue
+
+
+def _reader(response, out: queue.Queue):
+    """텍스트 조각(str)을 넣고, 마지막에 (_DONE, 종료 상태)를 넣습니다."""
+    # completed 이벤트 없이 스트림이 닫히면 "closed"
+    status = "closed"
+    try:
+        for event in _iter_sse_events(response):
+            etype = event.get("type")
+            if etype == "response.output_text.delta" and isinstance(event.get("delta"), str):
+                out.put(event["delta"])
+            elif etype == "response.completed":
+                status = "completed"
+                break
+            elif etype in ("response.failed", "response.incomplete", "error"):
+                status = etype
+                break
+    except Exception as e:
+        status = f"read error: {type(e).__name__}"
+    finally:
+        out.put((_DONE, status))
+
+
+def iter_text_deltas(
+    response,
+    first_token_timeout: float = FIRST_TOKEN_TIMEOUT_SEC,
+    idle_timeout: float = IDLE_TIMEOUT_SEC,
+) -> Iterator[str]:
+    """
+    stream=True로 받은 requests 응답에서 텍스트 조각을 순서대로 돌려줍니다.
+    - 첫 조각이 first_token_timeout 안에, 이후 조각이 idle_timeout 안에 오지 않으면 StreamTimeout
+    - response.completed 없이 끝나면 (받은 조각을 모두 돌려준 뒤) StreamIncomplete
+    - 스트림이 끝나거나 timeout이 나면 응답을 닫음
+    """
+    chunks: queue.Queue = queue.Queue()
+    threading.Thread(target=_reader, args=(response, chunks), daemon=True).start()
+
+    started = False
+    try:
+        while True:
+            try:
+                item = chunks.get(timeout=idle_timeout if started else first_token_timeout)
+            except queue.Empty:
+                raise StreamTimeout("idle gap" if started else "first token")
+            if isinstance(item, tuple):
+                status = item[1]
+                if status != "completed":
+                    raise StreamIncomplete(status)
+                return
+            started = True
+            yield item
+    finally:
+        response.close()
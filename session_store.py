@@ -0,0 +1,220 @@
+# session_store.py
+"""
+서버 측 사용자 상태 저장소.
+- 사용자별 증분 통계(HabitStats) + 압축 컬럼(HabitColumns) + 작은 설정 값을 한 항목으로 묶어 관리
+- 메모리 상한을 넘거나 오래 쓰지 않은 항목은 디스크(SQLite)로 내리고, 다시 오면 바로 복원
+- 일일 콘텐츠는 여기 두지 않고 daily_cache의 공용 값을 참조
+- 상주 세션 수/바이트를 계측 게이지로 노출
+- 기록 저장소에서 새로 만드는 일은 사용자별 잠금 아래에서만 → 다른 사용자의 조회를 막지 않음
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from db import connect
+from habit_stats import HabitStats, history_row_lookup, load_stats
+from history_columns import HabitColumns, load_columns
+from instrumentation import incr, set_gauge
+
+MEMORY_CEILING_BYTES = int(float(os.getenv("HABIT_SESSION_MEMORY_MB", "64")) * 1024 * 1024)
+IDLE_EVICT_SEC = float(os.getenv("HABIT_SESSION_IDLE_SEC", str(15 * 60)))
+# 방금 쓴 항목은 상한을 넘어도 내리지 않음 (같은 rerun 안에서 계속 쓰는 중일 수 있음)
+MIN_RESIDENT_SEC = 30.0
+# HabitStats 한 개의 대략적인 고정 크기(바이트)
+STATS_OVERHEAD_BYTES = 1024
+# 요청이 없어도 오래 안 쓴 항목을 내리도록 정리하는 주기
+EVICT_INTERVAL_SEC = 60.0
+
+
+class UserSession:
+    __slots__ = ("user_id", "stats", "columns", "prefs", "last_used")
+
+    def __init__(self, user_id: str, stats: HabitStats, columns: HabitColumns, prefs: dict | None = None):
+        self.user_id = user_id
+        self.stats = stats
+        self.columns = columns
+        # 사용자별 작은 값만 (예: 오늘의 강아지). 큰 일일 콘텐츠는 넣지 않음
+        self.prefs = prefs or {}
+        self.last_used = time.monotonic()
+
+    @property
+    def nbytes(self) -> int:
+        return self.columns.nbytes + STATS_OVERHEAD_BYTES + len(json.dumps(self.prefs, ensure_ascii=False))
+
+
+class SessionStore:
+    def __init__(self, name: str = "session_spill", ceiling_bytes: int = MEMORY_CEILING_BYTES,
+                 idle_sec: float = IDLE_EVICT_SEC):
+        self.ceiling_bytes = ceiling_bytes
+        self.idle_sec = idle_sec
+        self._resident: OrderedDict[str, UserSession] = OrderedDict()
+        self._lock = threading.Lock()
+        # 사용자별 [잠금, 기다리는 호출 수]. 기록 저장소에서 읽는 동안만 잡음
+        self._user_locks: dict[str, list] = {}
+        self._conn = connect(f"{name}.sqlite3")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS spilled (
+                user_id TEXT PRIMARY KEY,
+                n_habits INTEGER NOT NULL,
+                stats TEXT NOT NULL,
+                prefs TEXT NOT NULL,
+                columns BLOB NOT NULL
+            )
+            """
+        )
+        # 내려둔 상태는 이 프로세스 동안만 유효 (재시작하면 기록 저장소에서 다시 만듦)
+        self._conn.execute("DELETE FROM spilled")
+        threading.Thread(target=self._evict_loop, daemon=True, name="session-evict").start()
+
+    def get(self, user_id: str, n_habits: int) -> UserSession:
+        with self._lock:
+            session = self._touch(user_id)
+            if session is not None:
+                return session
+        with self._user_lock(user_id):
+            with self._lock:
+                # 기다리는 동안 다른 호출이 이미 올려두었을 수 있음
+                session = self._touch(user_id)
+                if session is not None:
+                    return session
+                session = self._restore(user_id, n_habits)
+            if session is None:
+                # 기록 저장소 조회는 전역 잠금 밖에서
+                session = self._load(user_id, n_habits)
+            with self._lock:
+                self._resident[user_id] = session
+                session.last_used = time.monotonic()
+                self._enforce()
+                return session
+
+    def _touch(self, user_id: str) -> UserSession | None:
+        """상주 중이면 최근 사용으로 표시해 돌려줌. self._lock을 잡은 채로 부름"""
+        session = self._resident.get(user_id)
+        if session is None:
+            return None
+        self._resident.move_to_end(user_id)
+        session.last_used = time.monotonic()
+        self._enforce()
+        return session
+
+    @contextmanager
+    def _user_lock(self, user_id: str):
+        with self._lock:
+            entry = self._user_locks.setdefault(user_id, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._user_locks[user_id]
+
+    def _load(self, user_id: str, n_habits: int) -> UserSession:
+        return UserSession(user_id, load_stats(user_id, n_habits), load_columns(user_id))
+
+    def _restore(self, user_id: str, n_habits: int) -> UserSession | None:
+        row = self._conn.execute(
+            "SELECT n_habits, stats, prefs, columns FROM spilled WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None or row[0] != n_habits:
+            return None
+        self._conn.execute("DELETE FROM spilled WHERE user_id = ?", (user_id,))
+        incr("sessions.restored")
+        stats = HabitStats.from_state(json.loads(row[1]), n_habits, history_row_lookup(user_id))
+        return UserSession(user_id, stats, HabitColumns.from_bytes(row[3]), json.loads(row[2]))
+
+    def _spill(self, session: UserSession):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO spilled (user_id, n_habits, stats, prefs, columns) VALUES (?, ?, ?, ?, ?)",
+            (
+                session.user_id,
+                session.stats.n_habits,
+                json.dumps(session.stats.to_state()),
+                json.dumps(session.prefs, ensure_ascii=False),
+                session.columns.to_bytes(),
+            ),
+        )
+        incr("sessions.evicted")
+
+    def _enforce(self):
+        """오래 안 쓴 항목, 그다음 상한을 넘는 만큼 가장 오래된 항목부터 디스크로 내림"""
+        now = time.monotonic()
+        sizes = {user_id: s.nbytes for user_id, s in self._resident.items()}
+        total = sum(sizes.values())
+        for user_id in list(self._resident):
+            session = self._resident[user_id]
+            idle = now - session.last_used
+            if idle < MIN_RESIDENT_SEC:
+                # OrderedDict는 최근 사용 순이므로 이후 항목은 모두 더 최근
+                break
+            if idle < self.idle_sec and total <= self.ceiling_bytes:
+                break
+            self._spill(session)
+            del self._resident[user_id]
+            total -= sizes[user_id]
+        set_gauge("sessions.resident", len(self._resident))
+        set_gauge("sessions.resident_bytes", total)
+
+    def evict_idle(self):
+        """요청이 없어도 주기적으로 부를 수 있는 정리 함수"""
+        with self._lock:
+            self._enforce()
+
+    def _evict_loop(self):
+        while True:
+            time.sleep(EVICT_INTERVAL_SEC)
+            self.evict_idle()
+
+    def replace(self, user_id: str, n_habits: int) -> UserSession:
+        """과거 기록이 바뀌었을 때 사용자 상태를 기록 저장소에서 다시 만듭니다."""
+        with self._user_lock(user_id):
+            session = self._load(user_id, n_habits)
+            with self._lock:
+                self._conn.execute("DELETE FROM spilled WHERE user_id = ?", (user_id,))
+                previous = self._resident.get(user_id)
+                if previous is not None:
+                    session.prefs = previous.prefs
+                self._resident[user_id] = session
+                self._resident.move_to_end(user_id)
+                self._enforce()
+                return session
+
+    def invalidate(self, user_id: str):
+        """메모리/디스크의 사용자 상태를 버립니다. 다음 get에서 기록 저장소로 다시 만듦"""
+        # 진행 중인 get/replace가 버린 뒤에 옛 상태를 다시 올리지 않도록 사용자 잠금을 거침
+        with self._user_lock(user_id), self._lock:
+            self._conn.execute("DELETE FROM spilled WHERE user_id = ?", (user_id,))
+            self._resident.pop(user_id, None)
+            self._enforce()
+
+    def stats(self) -> dict:
+        with self._lock:
+            spilled = self._conn.execute("SELECT COUNT(*) FROM spilled").fetchone()[0]
+            return {
+                "resident": len(self._resident),
+                "resident_bytes": sum(s.nbytes for s in self._resident.values()),
+                "spilled": spilled,
+                "ceiling_bytes": self.ceiling_bytes,
+            }
+
+
+_store: SessionStore | None = None
+_store_lock = threading.Lock()
+
+
+def get_session_store() -> SessionStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SessionStore()
+        return _store
+
+
+def get_user_session(user_id: str, n_habits: int) -> UserSession:
+    return get_session_store().get(user_id, n_habits)
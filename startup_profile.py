@@ -0,0 +1,86 @@
+# startup_profile.py
+"""
+콜드 스타트 프로파일링 (HABIT_PROFILE_STARTUP=1일 때만 동작).
+- 첫 스크립트 실행의 import 시간(최상위 모듈별, 하위 import 포함)과 단계별 경과 시간을 기록
+- 첫 화면 표시(first paint)까지의 시간은 첫 요소를 그린 직후 mark("first_paint")로 측정
+- 결과는 표준 에러로 한 번 출력하고, 앱 사이드바에서 표로 볼 수 있음
+"""
+import builtins
+import os
+import sys
+import threading
+import time
+
+ENABLED = os.getenv("HABIT_PROFILE_STARTUP") == "1"
+
+_t0 = time.perf_counter()
+_marks: list[tuple[str, float]] = []
+_imports: dict[str, float] = {}
+_finished = False
+_lock = threading.Lock()
+_depth = threading.local()
+_original_import = builtins.__import__
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    # 이미 로드된 모듈이나 상대 import는 측정하지 않음
+    top = name.partition(".")[0]
+    if level or name in sys.modules or getattr(_depth, "value", 0):
+        return _original_import(name, globals, locals, fromlist, level)
+    _depth.value = 1
+    started = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _depth.value = 0
+        with _lock:
+            _imports[top] = _imports.get(top, 0.0) + time.perf_counter() - started
+
+
+def start():
+    """app.py 맨 위에서 호출: 다른 import보다 먼저 import 측정을 시작"""
+    global _t0
+    if not ENABLED or _finished:
+        return
+    _t0 = time.perf_counter()
+    builtins.__import__ = _timed_import
+
+
+def mark(name: str):
+    """첫 실행에서 지금까지의 경과 시간을 name으로 기록"""
+    if not ENABLED or _finished:
+        return
+    if name == "imports":
+        builtins.__import__ = _original_import
+    with _lock:
+        _marks.append((name, time.perf_counter() - _t0))
+
+
+def finish():
+    """첫 실행이 끝나면 호출: 측정을 멈추고 결과를 표준 에러로 한 번 출력"""
+    global _finished
+    if not ENABLED or _finished:
+        return
+    mark("script_end")
+    builtins.__import__ = _original_import
+    _finished = True
+    print(format_report(), file=sys.stderr, flush=True)
+
+
+def report() -> dict:
+    with _lock:
+        return {
+            "marks_ms": [(name, round(sec * 1000, 1)) for name, sec in _marks],
+            "imports_ms": sorted(
+                ((name, round(sec * 1000, 1)) for name, sec in _imports.items()), key=lambda item: -item[1]
+            ),
+        }
+
+
+def format_report() -> str:
+    data = report()
+    lines = ["[startup profile] 단계별 경과 시간 (첫 실행 시작 기준)"]
+    lines += [f"  {name:<24} {ms:>9.1f} ms" for name, ms in data["marks_ms"]]
+    lines.append("[startup profile] 최상위 모듈 import 시간 (하위 import 포함)")
+    lines += [f"  {name:<24} {ms:>9.1f} ms" for name, ms in data["imports_ms"]]
+    return "\n".join(lines)
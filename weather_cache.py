@@ -0,0 +1,93 @@
+# weather_cache.py
+"""
+도시별 현재 날씨 캐시 + 백그라운드 프리페처.
+- 날씨는 세션 간 공유 디스크 캐시(daily_cache)에 도시별로 저장
+- 프리페처 스레드 하나가 설정된 도시 전체를 주기적으로 동시에 조회
+  (업스트림 호출 수는 사용자 수가 아니라 도시 수에 비례)
+- 리포트 생성은 캐시만 읽고, 없으면 프리페처를 깨운 뒤 날씨 없이 진행
+- 프리페처는 서버 설정(OPENWEATHERMAP_API_KEY 환경변수) 키만 사용. 사용자가 입력한 키는 그 세션 안에서만 씀
+"""
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Iterable
+
+from daily_cache import get_cached, put_cached
+from fanout import fetch_concurrently
+from fetchers import get_weather
+from instrumentation import incr, set_gauge, span
+
+# 도시 전체를 다시 조회하는 주기(초). 캐시 TTL(daily_cache.SOURCE_TTLS)은 이보다 길게 잡아 갱신 사이에 비지 않게 함
+REFRESH_INTERVAL_SEC = 10 * 60
+# 캐시 미스로 깨우더라도 이 간격 안에는 다시 조회하지 않음 (키 오류 등으로 계속 비는 경우)
+MIN_REFRESH_GAP_SEC = 30
+
+
+SERVER_API_KEY_ENV = "OPENWEATHERMAP_API_KEY"
+
+
+def get_cached_weather(city: str) -> dict | None:
+    """
+    오늘 날짜 키의 날씨, 없으면 어제 날짜 키의 날씨.
+    - 자정 직후 다음 갱신 전까지 비지 않도록. 어느 쪽이든 TTL 안의 값만 반환
+    """
+    params = {"city": city}
+    return get_cached("weather", params) or get_cached("weather", params, day=date.today() - timedelta(days=1))
+
+
+class WeatherPrefetcher:
+    def __init__(self, cities: Iterable[str], api_key: str):
+        self.cities = list(cities)
+        self.api_key = api_key
+        self._wake = threading.Event()
+        threading.Thread(target=self._run, daemon=True, name="weather-prefetch").start()
+
+    def request_refresh(self):
+        """캐시에 없는 도시가 있을 때 다음 주기를 기다리지 않고 바로 조회"""
+        self._wake.set()
+
+    def refresh(self) -> int:
+        """설정된 도시 전체를 동시에 조회해 캐시에 넣고, 받은 도시 수를 반환합니다."""
+        api_key = self.api_key
+        if not api_key:
+            return 0
+        tasks = {city: (lambda city=city: get_weather(city, api_key)) for city in self.cities}
+        with span("refresh.weather"):
+            fetched, missed = fetch_concurrently(tasks)
+        ok = 0
+        for city, weather in fetched.items():
+            if weather is not None:
+                put_cached("weather", weather, {"city": city})
+                ok += 1
+        if len(fetched) - ok + len(missed):
+            incr("refresh.weather.failed", len(fetched) - ok + len(missed))
+        set_gauge("weather.cached_cities", ok)
+        return ok
+
+    def _run(self):
+        while True:
+            last = time.monotonic()
+            self.refresh()
+            self._wake.wait(REFRESH_INTERVAL_SEC)
+            self._wake.clear()
+            time.sleep(max(0.0, last + MIN_REFRESH_GAP_SEC - time.monotonic()))
+
+
+_prefetcher: WeatherPrefetcher | None = None
+_prefetcher_lock = threading.Lock()
+
+
+def get_weather_prefetcher(cities: Iterable[str]) -> WeatherPrefetcher | None:
+    """
+    프로세스에 하나만 띄우는 프리페처. 서버에 키가 설정돼 있지 않으면 None
+    - 방문자가 입력한 키는 공용 스레드에 넘기지 않음
+    """
+    global _prefetcher
+    api_key = os.getenv(SERVER_API_KEY_ENV)
+    if not api_key:
+        return None
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = WeatherPrefetcher(cities, api_key)
+        return _prefetcher